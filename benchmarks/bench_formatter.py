@@ -0,0 +1,129 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# bench_formatter.py
+# Compares the single-pass columnar formatter against the previous
+# _serialize_rows + _json_to_markdown_table helpers (copied below as baseline).
+#
+# Usage (from the project root):
+#   python benchmarks/bench_formatter.py --sizes 1000,100000,1000000
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mysql_agent"))
+from formatting import format_markdown_table  # noqa: E402
+
+# =======================================================================
+# BASELINE: helpers as they were in tools.py before the columnar formatter
+# =======================================================================
+
+def _serialize_rows(rows: list) -> list:
+    serialized_rows = []
+    for row in rows:
+        serialized_row = {}
+        for key, value in row.items():
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                serialized_row[key] = value.isoformat()
+            else:
+                serialized_row[key] = value
+        serialized_rows.append(serialized_row)
+    return serialized_rows
+
+
+def _json_to_markdown_table(data_list: list) -> str:
+    if not data_list:
+        return "No results found."
+    headers = data_list[0].keys()
+    header_row = "| " + " | ".join(map(str, headers)) + " |"
+    separator_row = "| " + " | ".join(["---"] * len(headers)) + " |"
+    data_rows = []
+    for row_dict in data_list:
+        row_values = [str(row_dict.get(header, '')) for header in headers]
+        data_rows.append("| " + " | ".join(row_values) + " |")
+    return "\n".join([header_row, separator_row] + data_rows)
+
+
+# =======================================================================
+# SYNTHETIC DATA (lapTimes-like rows plus a few awkward types)
+# =======================================================================
+
+# (name, MySQL type code) as they would appear in cursor.description.
+DESCRIPTION = [
+    ("raceId", 3, None, None, None, None, 0, 0),
+    ("driverId", 3, None, None, None, None, 0, 0),
+    ("lap", 3, None, None, None, None, 0, 0),
+    ("time", 253, None, None, None, None, 1, 0),
+    ("milliseconds", 3, None, None, None, None, 1, 0),
+    ("avgSpeed", 246, None, None, None, None, 1, 0),
+    ("date", 10, None, None, None, None, 1, 0),
+    ("recordedAt", 12, None, None, None, None, 1, 0),
+    ("note", 252, None, None, None, None, 1, 0),
+]
+
+
+def make_rows(n: int) -> list:
+    base = datetime.datetime(2024, 3, 2, 15, 0, 0)
+    rows = []
+    for i in range(n):
+        rows.append((
+            1000 + i // 1000, i % 20, i % 70, f"1:{30 + i % 29}.{i % 1000:03d}",
+            90000 + i % 5000, decimal.Decimal(i % 30000) / 100,
+            base.date(), base + datetime.timedelta(seconds=i),
+            None if i % 3 else b"pit|stop\nlap",
+        ))
+    return rows
+
+
+def measure(fn, *args):
+    # Time and memory are measured in separate runs: tracemalloc slows
+    # allocation-heavy code down enough to distort throughput.
+    start = time.perf_counter()
+    output = fn(*args)
+    elapsed = time.perf_counter() - start
+    chars = len(output)
+    del output
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    args = parser.parse_args()
+
+    names = [column[0] for column in DESCRIPTION]
+    print(f"{'rows':>9} | {'formatter':<9} | {'rows/sec':>12} | {'peak MiB':>9} | {'chars':>11}")
+    for n in (int(size) for size in args.sizes.split(",")):
+        tuple_rows = make_rows(n)
+        dict_rows = [dict(zip(names, row)) for row in tuple_rows]
+
+        legacy = measure(lambda rows: _json_to_markdown_table(_serialize_rows(rows)), dict_rows)
+        del dict_rows
+        columnar = measure(format_markdown_table, DESCRIPTION, tuple_rows)
+
+        for label, (elapsed, peak, chars) in (("legacy", legacy), ("columnar", columnar)):
+            print(f"{n:>9} | {label:<9} | {n / elapsed:>12,.0f} | {peak / 2**20:>9.1f} | {chars:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# bench_retrieval.py
+# Compares the prompt size of the full context against per-question retrieval,
+# and measures index build time and retrieval latency, for the F1 sample
+# context and a synthetic schema with many tables.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_retrieval.py --tables 500 --iterations 200
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mysql_agent"))
+from formatting import estimate_tokens  # noqa: E402
+from retrieval import SchemaRetriever  # noqa: E402
+
+F1_CONTEXT = os.path.join(os.path.dirname(__file__), "..", "mysql_agent", "mysql_context.txt")
+
+F1_QUESTIONS = [
+    "Who are the top 10 drivers by number of wins?",
+    "What was the average pit stop duration at Monaco in 2019?",
+    "Fastest lap times in 2021 for Lewis Hamilton",
+    "Which constructor won the most points in 2020?",
+    "How many races were held at Silverstone?",
+    "List the qualifying positions of Max Verstappen in 2022",
+    "Which circuits are in Italy?",
+    "How many drivers retired because of an engine failure?",
+]
+
+# =======================================================================
+# SYNTHETIC CONTEXT (same layout as generate_mysql_context.py output)
+# =======================================================================
+
+_DOMAINS = ["sales", "billing", "inventory", "shipping", "hr", "payroll", "crm", "support",
+            "marketing", "finance", "audit", "catalog", "pricing", "warehouse", "fleet"]
+_ENTITIES = ["customer", "order", "invoice", "product", "supplier", "employee", "ticket",
+             "campaign", "payment", "shipment", "vehicle", "contract", "account", "region",
+             "store", "refund", "lead", "asset", "budget", "schedule"]
+_ATTRIBUTES = ["name", "status", "amount", "createdAt", "updatedAt", "country", "city",
+               "priority", "category", "quantity", "price", "discount", "email", "notes"]
+
+
+def make_synthetic_context(n_tables: int, seed: int = 7):
+    """Returns (context text, questions) for a schema with `n_tables` tables."""
+    rng = random.Random(seed)
+    names = []
+    for index in range(n_tables):
+        domain = _DOMAINS[index % len(_DOMAINS)]
+        entity = _ENTITIES[(index // len(_DOMAINS)) % len(_ENTITIES)]
+        names.append(f"{domain}{entity.capitalize()}{index // (len(_DOMAINS) * len(_ENTITIES)) or ''}")
+
+    columns = {}
+    for name in names:
+        references = rng.sample(names, 2)
+        attributes = rng.sample(_ATTRIBUTES, 6)
+        columns[name] = [f"{name}Id"] + [f"{other}Id" for other in references if other != name] + attributes
+
+    schema = ["## OVERVIEW:", f"A synthetic schema with {n_tables} business tables.", "",
+              "## DATABASE INFORMATION", "", "### Database Schema:", ""]
+    samples = ["## Table Data Samples:", ""]
+    analysis = ["## Column Data Analysis:", ""]
+    for name in names:
+        schema.append(f"### Table: `{name}`")
+        schema.extend(f"- `{column}`: **INT(11)**" if column.endswith("Id") else f"- `{column}`: **VARCHAR(255)**"
+                      for column in columns[name])
+        schema.append("")
+        samples.append(f"### Samples for table `{name}`:")
+        samples.append("| " + " | ".join(columns[name]) + " |")
+        samples.append("|" + "---|" * len(columns[name]))
+        for row in range(3):
+            samples.append("| " + " | ".join(
+                str(row + 1) if column.endswith("Id") else f"{column}-{rng.randint(1, 999)}"
+                for column in columns[name]) + " |")
+        samples.append("")
+        analysis.append(f"### Analysis of Table `{name}`:")
+        analysis.extend(f"- **{column}**: Numeric. MIN=`1`, MAX=`{rng.randint(10, 10**6)}`, Distinct Values=`{rng.randint(10, 10**5)}`"
+                        for column in columns[name])
+        analysis.append("")
+
+    examples = ["## EXAMPLES:"]
+    questions = []
+    for name in rng.sample(names, min(100, n_tables)):
+        attribute = columns[name][-1]
+        question = f"How many {name} rows have each {attribute}?"
+        questions.append(question)
+        examples.append(f'**Question:** "{question}"')
+        examples.append(f'**SQL Query:** "SELECT `{attribute}`, COUNT(*) FROM `{name}` GROUP BY `{attribute}`;"')
+
+    text = "\n".join(schema + samples + analysis + examples)
+    return text, questions
+
+
+# =======================================================================
+# MEASUREMENT
+# =======================================================================
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(label: str, context: str, questions: list, iterations: int):
+    start = time.perf_counter()
+    retriever = SchemaRetriever(context)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies, tokens = [], []
+    for i in range(iterations):
+        question = questions[i % len(questions)]
+        start = time.perf_counter()
+        rendered = retriever.render(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        tokens.append(estimate_tokens(rendered))
+
+    full_tokens = estimate_tokens(context)
+    median_tokens = statistics.median(tokens)
+    print(f"{label:<12} | {len(retriever.table_names):>6} | {full_tokens:>11,} | {median_tokens:>13,.0f} | "
+          f"{max(tokens):>10,} | {100 * (1 - median_tokens / full_tokens):>6.1f}% | {build_ms:>8.1f} | "
+          f"{_percentile(latencies, 0.5):>7.2f} | {_percentile(latencies, 0.99):>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=500, help="Tables in the synthetic schema.")
+    parser.add_argument("--iterations", type=int, default=200, help="Retrievals per context.")
+    args = parser.parse_args()
+
+    print(f"{'context':<12} | {'tables':>6} | {'full tokens':>11} | {'p50 retrieved':>13} | "
+          f"{'max retr.':>10} | {'saved':>7} | {'build ms':>8} | {'p50 ms':>7} | {'p99 ms':>7}")
+    if os.path.exists(F1_CONTEXT):
+        with open(F1_CONTEXT, "r", encoding="utf-8") as f:
+            run("f1", f.read(), F1_QUESTIONS, args.iterations)
+    else:
+        print(f"f1           | skipped: {F1_CONTEXT} not found")
+
+    context, questions = make_synthetic_context(args.tables)
+    run("synthetic", context, questions, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# bench_startup.py
+# Cold-start timings of the agent package, each run in a fresh interpreter
+# started with `-X importtime`: package import, root agent construction, first
+# instruction build and the first tool call, plus the slowest imports.
+#
+# Usage (from the project root; the first tool call needs the MySQL settings
+# in mysql_agent/.env, use --skip-query without a database):
+#   python benchmarks/bench_startup.py --runs 5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Runs in the child interpreter; prints one JSON line with cumulative timings.
+CHILD = r"""
+import json, sys, time, types
+start = time.perf_counter()
+timings = {}
+
+import mysql_agent
+timings["import_package_ms"] = (time.perf_counter() - start) * 1000
+timings["driver_after_import"] = "mysql.connector" in sys.modules
+
+try:
+    mysql_agent.agent.root_agent
+    timings["root_agent_ms"] = (time.perf_counter() - start) * 1000
+except ImportError as e:
+    timings["root_agent_error"] = str(e)
+timings["driver_after_agent"] = "mysql.connector" in sys.modules
+
+from mysql_agent import prompt
+question = types.SimpleNamespace(parts=[types.SimpleNamespace(text="Who won the most races in 2021?")])
+prompt.build_mysql_prompt(types.SimpleNamespace(user_content=question))
+timings["first_instruction_ms"] = (time.perf_counter() - start) * 1000
+
+if not SKIP_QUERY:
+    from mysql_agent import tools
+    response = tools.query_mysql("SELECT 1")
+    timings["first_tool_call_ms"] = (time.perf_counter() - start) * 1000
+    if "error" in response:
+        timings["first_tool_call_error"] = response.get("details", response["error"])
+
+print("BENCH " + json.dumps(timings))
+"""
+
+
+def run_once(skip_query: bool):
+    """Runs one cold start; returns (timings, [(cumulative_us, self_us, module)])."""
+    code = CHILD.replace("SKIP_QUERY", repr(skip_query))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    timings = None
+    for line in completed.stdout.splitlines():
+        if line.startswith("BENCH "):
+            timings = json.loads(line[len("BENCH "):])
+    if timings is None:
+        raise RuntimeError(f"Child run failed:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        imports.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return timings, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list.")
+    parser.add_argument("--skip-query", action="store_true", help="Don't run the first tool call.")
+    args = parser.parse_args()
+
+    runs = [run_once(args.skip_query) for _ in range(args.runs)]
+    first, imports = runs[0]
+
+    print(f"{'phase (cumulative from interpreter start)':<42} | {'median ms':>10} | {'min ms':>8}")
+    for phase in ("import_package_ms", "root_agent_ms", "first_instruction_ms", "first_tool_call_ms"):
+        values = [timings[phase] for timings, _ in runs if phase in timings]
+        if values:
+            print(f"{phase:<42} | {statistics.median(values):>10.1f} | {min(values):>8.1f}")
+    for key in ("driver_after_import", "driver_after_agent", "root_agent_error", "first_tool_call_error"):
+        if key in first:
+            print(f"{key}: {first[key]}")
+
+    print("\nSlowest imports (cumulative, first run):")
+    print(f"{'cumulative ms':>13} | {'self ms':>8} | module")
+    for cumulative_us, self_us, module in sorted(imports, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} | {self_us / 1000:>8.1f} | {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# bench_suite.py
+# End-to-end benchmarks of query_mysql and generate_mysql_context.main against
+# a seeded synthetic F1 dataset (see f1_dataset.py), emitted as JSON so runs
+# can be compared across commits.
+#
+# - query_mysql: throughput, p50/p99 latency and peak RSS for every result
+#   size x concurrency level, plus a join/aggregate workload.
+# - generate_mysql_context.main: wall time of a full and of an incremental
+#   (nothing changed) run for every schema size. Gemini is not called; its
+#   input is written as the output instead.
+#
+# Every scenario runs in a fresh interpreter, so the agent's environment
+# settings apply and peak RSS is per scenario.
+#
+# Backends:
+#   --backend fake   SQLite-backed stand-in for mysql.connector (fake_mysql.py),
+#                    no server needed (CI). Timings only compare with each other.
+#   --backend mysql  A local MySQL/MariaDB server; MYSQL_HOST, MYSQL_USER and
+#                    MYSQL_PASSWORD come from the environment or mysql_agent/.env,
+#                    and the user needs CREATE privileges for the f1bench_*
+#                    databases. Seeded databases are reused across runs.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_suite.py --backend fake --scales 10000 --output base.json
+#   python benchmarks/bench_suite.py --backend mysql --scales 10000,1000000,50000000 \
+#       --result-sizes 1,100,1000,10000 --concurrency 1,4,16 --schema-sizes 10,100,500
+#   python benchmarks/bench_suite.py --compare base.json new.json
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+import f1_dataset  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "mysql_agent_bench")
+
+# Workload of the "rows" scenarios: a range of races of lapTimes sized to
+# return `result_rows` rows, so the cost guard sees a realistic estimate.
+ROWS_SQL = ("SELECT `raceId`, `driverId`, `lap`, `position`, `time`, `milliseconds` FROM `lapTimes` "
+            "WHERE `raceId` BETWEEN {first} AND {last} LIMIT {limit}")
+# Workload of the "aggregate" scenario: a typical join + GROUP BY question.
+AGGREGATE_SQL = ("SELECT d.`surname`, COUNT(*) AS wins FROM `results` r "
+                 "JOIN `drivers` d ON d.`driverId` = r.`driverId` "
+                 "JOIN `races` ra ON ra.`raceId` = r.`raceId` "
+                 "WHERE r.`position` = 1 AND ra.`year` >= {year} "
+                 "GROUP BY d.`surname` ORDER BY wins DESC LIMIT 10")
+
+
+# =======================================================================
+# BACKENDS AND SEEDING
+# =======================================================================
+
+def _connect(args, database=None):
+    """Opens a connection of the selected backend (to the server when `database` is None)."""
+    if args.backend == "fake":
+        import fake_mysql
+        fake_mysql.install(args.data_dir)
+    import mysql.connector
+    params = {"host": os.environ.get("MYSQL_HOST"), "user": os.environ.get("MYSQL_USER"),
+              "password": os.environ.get("MYSQL_PASSWORD")}
+    if database:
+        params["database"] = database
+    return mysql.connector.connect(**params)
+
+
+def _seed_database(args, database: str, lap_rows: int, filler_tables: int = 0) -> float:
+    """Creates and seeds `database` if needed; returns the seconds spent."""
+    started = time.perf_counter()
+    server = _connect(args)
+    cursor = server.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+    cursor.close()
+    server.close()
+    connection = _connect(args, database)
+    try:
+        if f1_dataset.seed(connection, lap_rows, filler_tables, args.filler_rows, force=args.reseed,
+                           log=lambda message: print(message, file=sys.stderr)):
+            print(f"  Seeded `{database}` in {time.perf_counter() - started:.1f}s.", file=sys.stderr)
+    finally:
+        connection.close()
+    return time.perf_counter() - started
+
+
+def _worker_env(args, database: str, extra: dict) -> dict:
+    env = dict(os.environ)
+    if args.backend == "fake":
+        env.update(MYSQL_HOST="fake", MYSQL_USER="fake", MYSQL_PASSWORD="fake", FAKE_MYSQL_DIR=args.data_dir)
+    env["MYSQL_DATABASE"] = database
+    env.update({key: str(value) for key, value in extra.items()})
+    return env
+
+
+def _run_worker(spec: dict, env: dict) -> dict:
+    """Runs one scenario in a fresh interpreter and returns its JSON result."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(spec)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    return {"error": f"worker failed (exit {completed.returncode}): {completed.stderr.strip()[-1500:]}"}
+
+
+# =======================================================================
+# WORKERS (run in the child interpreter)
+# =======================================================================
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _query_sql(spec: dict, index: int) -> str:
+    sizes = f1_dataset.dataset_size(spec["scale"])
+    if spec["workload"] == "aggregate":
+        seasons = max(1, math.ceil(sizes["races"] / f1_dataset.RACES_PER_SEASON))
+        return AGGREGATE_SQL.format(year=f1_dataset.FIRST_SEASON + index % seasons)
+    rows_per_race = f1_dataset.DRIVERS_PER_RACE * f1_dataset.LAPS_PER_RACE
+    span = max(1, math.ceil(spec["result_rows"] / rows_per_race))
+    full_races = max(1, spec["scale"] // rows_per_race)  # The last race may be partial.
+    first = 1 + (index * 7) % max(1, full_races - span + 1)
+    return ROWS_SQL.format(first=first, last=first + span - 1, limit=spec["result_rows"])
+
+
+def query_worker(spec: dict) -> dict:
+    """Calls query_mysql `requests` times from `concurrency` threads."""
+    if spec["backend"] == "fake":
+        import fake_mysql
+        fake_mysql.install()
+    sys.path.insert(0, ROOT)
+    from mysql_agent import tools
+
+    for index in range(spec["warmup"]):
+        response = tools.query_mysql(_query_sql(spec, index))
+        if "error" in response:
+            return {"error": f"warmup failed: {response.get('details', response['error'])}"}
+    baseline_rss = _peak_rss_mb()
+
+    latencies, rows, failures = [], [], []
+    counter = itertools.count(spec["warmup"])
+    last_index = spec["warmup"] + spec["requests"]
+
+    def client():
+        while True:
+            index = next(counter)
+            if index >= last_index:
+                return
+            sql = _query_sql(spec, index)
+            started = time.perf_counter()
+            response = tools.query_mysql(sql)
+            latencies.append(time.perf_counter() - started)
+            if "error" in response:
+                failures.append(response.get("details", response["error"]))
+            else:
+                rows.append(response["metadata"]["rows_read"])
+
+    threads = [threading.Thread(target=client) for _ in range(spec["concurrency"])]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": len(failures),
+        "first_error": failures[0] if failures else None,
+        "throughput_qps": round(len(latencies) / wall, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "mean_rows": round(statistics.mean(rows), 1) if rows else 0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def generate_worker(spec: dict) -> dict:
+    """Times a full and an incremental run of generate_mysql_context.main."""
+    if spec["backend"] == "fake":
+        import fake_mysql
+        fake_mysql.install()
+    output_dir = tempfile.mkdtemp(prefix="bench_context_")
+    os.environ["MYSQL_CONTEXT_FILE"] = os.path.join(output_dir, "mysql_context.txt")
+    sys.path.insert(0, ROOT)
+    try:
+        from mysql_agent import generate_mysql_context as generator
+    except ImportError as e:
+        return {"error": f"cannot import the generator: {e}"}
+    generator.generate_enhanced_prompt_with_gemini = lambda database_context: database_context
+
+    timings = {}
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        for label, force in (("full_s", True), ("incremental_s", False)):
+            started = time.perf_counter()
+            generator.main(force=force)
+            timings[label] = round(time.perf_counter() - started, 3)
+    if not os.path.exists(generator.OUTPUT_FILENAME):
+        return {"error": "no context file written: " + log.getvalue().strip()[-1500:]}
+    timings["context_chars"] = os.path.getsize(generator.OUTPUT_FILENAME)
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+# =======================================================================
+# SUITE
+# =======================================================================
+
+def _int_list(text: str) -> list:
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def _git_revision() -> dict:
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_suite(args) -> dict:
+    report = {
+        "suite": "mysql_agent",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "settings": {key: value for key, value in vars(args).items() if key not in ("worker", "compare", "output")},
+        "seed_s": {},
+        "query_mysql": [],
+        "generate_mysql_context": [],
+    }
+
+    for scale in args.scales:
+        database = f"f1bench_{scale}"
+        report["seed_s"][database] = round(_seed_database(args, database, scale), 2)
+        workloads = [("rows", size) for size in args.result_sizes] + [("aggregate", None)]
+        for (workload, result_rows), concurrency in itertools.product(workloads, args.concurrency):
+            spec = {"kind": "query", "backend": args.backend, "scale": scale, "workload": workload,
+                    "result_rows": result_rows, "concurrency": concurrency,
+                    "requests": args.requests, "warmup": args.warmup}
+            limit = result_rows or 10
+            env = _worker_env(args, database, {
+                "MYSQL_POOL_SIZE": concurrency,
+                "MYSQL_MAX_RESULT_ROWS": limit,
+                "MYSQL_MAX_RESULT_BYTES": max(1024 * 1024, limit * 256),
+                "MYSQL_CACHE_ENABLED": "true" if args.cache else "false",
+                "MYSQL_RESULT_FORMAT": args.format,
+                "MYSQL_METRICS_ENABLED": "false",
+            })
+            result = {"scale": scale, "workload": workload, "result_rows": result_rows,
+                      "concurrency": concurrency, **_run_worker(spec, env)}
+            report["query_mysql"].append(result)
+            _print_query_result(result)
+
+    for tables in args.schema_sizes:
+        database = f"f1bench_schema_{tables}"
+        # The F1 tables plus filler tables up to the requested size.
+        filler = max(0, tables - f1_dataset.BASE_TABLE_COUNT)
+        report["seed_s"][database] = round(_seed_database(args, database, args.schema_lap_rows, filler), 2)
+        spec = {"kind": "generate", "backend": args.backend}
+        env = _worker_env(args, database, {"CONTEXT_WORKERS": args.context_workers})
+        result = {"tables": f1_dataset.BASE_TABLE_COUNT + filler, "filler_rows": args.filler_rows,
+                  "workers": args.context_workers, **_run_worker(spec, env)}
+        report["generate_mysql_context"].append(result)
+        _print_generate_result(result)
+    return report
+
+
+def _print_query_result(result: dict):
+    label = f"{result['workload']}" + (f"[{result['result_rows']}]" if result["result_rows"] else "")
+    if "error" in result:
+        print(f"query_mysql  scale={result['scale']:<9} {label:<14} c={result['concurrency']:<3} ERROR {result['error']}")
+        return
+    print(f"query_mysql  scale={result['scale']:<9} {label:<14} c={result['concurrency']:<3} "
+          f"{result['throughput_qps']:>9.1f} q/s  p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+          f"rss {result['peak_rss_mb']:>7.1f} MB  errors {result['errors']}")
+
+
+def _print_generate_result(result: dict):
+    if "error" in result:
+        print(f"generator    tables={result['tables']:<6} ERROR {result['error']}")
+        return
+    print(f"generator    tables={result['tables']:<6} full {result['full_s']:>8.2f} s  "
+          f"incremental {result['incremental_s']:>7.2f} s  rss {result['peak_rss_mb']:>7.1f} MB")
+
+
+def compare(base_path: str, new_path: str):
+    """Prints the change of every metric between two reports (new / base)."""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base: {base['git']['commit'][:12]} ({base['backend']})  new: {new['git']['commit'][:12]} ({new['backend']})")
+
+    def ratio(old, value):
+        return f"{value / old:>6.2f}x" if old else "    n/a"
+
+    key = lambda r: (r["scale"], r["workload"], r["result_rows"], r["concurrency"])  # noqa: E731
+    old_queries = {key(r): r for r in base["query_mysql"] if "error" not in r}
+    for result in new["query_mysql"]:
+        old = old_queries.get(key(result))
+        if old is None or "error" in result:
+            continue
+        label = f"{result['workload']}" + (f"[{result['result_rows']}]" if result["result_rows"] else "")
+        print(f"query_mysql  scale={result['scale']:<9} {label:<14} c={result['concurrency']:<3} "
+              f"q/s {ratio(old['throughput_qps'], result['throughput_qps'])}  "
+              f"p50 {ratio(old['p50_ms'], result['p50_ms'])}  p99 {ratio(old['p99_ms'], result['p99_ms'])}  "
+              f"rss {ratio(old['peak_rss_mb'], result['peak_rss_mb'])}")
+    old_runs = {r["tables"]: r for r in base["generate_mysql_context"] if "error" not in r}
+    for result in new["generate_mysql_context"]:
+        old = old_runs.get(result["tables"])
+        if old is None or "error" in result:
+            continue
+        print(f"generator    tables={result['tables']:<6} full {ratio(old['full_s'], result['full_s'])}  "
+              f"incremental {ratio(old['incremental_s'], result['incremental_s'])}  "
+              f"rss {ratio(old['peak_rss_mb'], result['peak_rss_mb'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks of the MySQL agent.")
+    parser.add_argument("--backend", choices=("fake", "mysql"), default="fake",
+                        help="SQLite-backed stand-in (no server) or a real MySQL/MariaDB server.")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where the fake backend keeps its databases.")
+    parser.add_argument("--scales", type=_int_list, default=[10_000],
+                        help="lapTimes rows of the query datasets (10k to 50M), comma-separated.")
+    parser.add_argument("--result-sizes", type=_int_list, default=[1, 100, 1000, 10_000],
+                        help="Rows returned per query_mysql call, comma-separated.")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16],
+                        help="Threads calling query_mysql at once, comma-separated.")
+    parser.add_argument("--requests", type=int, default=200, help="Timed calls per query scenario.")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls before each query scenario.")
+    parser.add_argument("--format", default="markdown", help="MYSQL_RESULT_FORMAT of the query scenarios.")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled (off by default).")
+    parser.add_argument("--schema-sizes", type=_int_list, default=[10, 50, 200],
+                        help="Tables in the generator scenarios, comma-separated (empty to skip).")
+    parser.add_argument("--schema-lap-rows", type=int, default=10_000, help="lapTimes rows in the generator schemas.")
+    parser.add_argument("--filler-rows", type=int, default=1000, help="Rows per filler table of the generator schemas.")
+    parser.add_argument("--context-workers", type=int, default=4, help="CONTEXT_WORKERS of the generator scenarios.")
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the datasets even if already seeded.")
+    parser.add_argument("--output", help="Write the JSON report here (default: print it).")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two JSON reports and exit.")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        spec = json.loads(args.worker)
+        result = (query_worker if spec["kind"] == "query" else generate_worker)(spec)
+        print("BENCH " + json.dumps(result))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.backend == "mysql":
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(os.path.join(ROOT, "mysql_agent", ".env"))
+        except ImportError:
+            pass
+        if not all(os.environ.get(name) for name in ("MYSQL_HOST", "MYSQL_USER", "MYSQL_PASSWORD")):
+            parser.error("--backend mysql needs MYSQL_HOST, MYSQL_USER and MYSQL_PASSWORD.")
+
+    report = run_suite(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# f1_dataset.py
+# Deterministic synthetic dataset with the shape of the F1 sample database
+# (circuits, races, drivers, constructors, status, results, qualifying,
+# pitStops, lapTimes), scaled by the number of lapTimes rows, plus filler
+# tables to grow the schema for the context generator benchmark.
+#
+# The DDL and INSERTs are plain SQL accepted by MySQL, MariaDB and the
+# SQLite-backed fake_mysql connector.
+import math
+import random
+
+# Bump when the generated data changes, so seeded databases are rebuilt.
+DATASET_VERSION = "1"
+
+INSERT_BATCH_ROWS = 5000
+
+DRIVERS_PER_RACE = 20
+LAPS_PER_RACE = 60
+RACES_PER_SEASON = 22
+FIRST_SEASON = 1950
+
+_TABLES = {
+    "bench_meta": "`name` VARCHAR(64) NOT NULL PRIMARY KEY, `value` VARCHAR(255)",
+    "circuits": ("`circuitId` INT NOT NULL PRIMARY KEY, `circuitRef` VARCHAR(255), `name` VARCHAR(255), "
+                 "`location` VARCHAR(255), `country` VARCHAR(255), `lat` FLOAT, `lng` FLOAT"),
+    "constructors": ("`constructorId` INT NOT NULL PRIMARY KEY, `constructorRef` VARCHAR(255), "
+                     "`name` VARCHAR(255), `nationality` VARCHAR(255)"),
+    "drivers": ("`driverId` INT NOT NULL PRIMARY KEY, `driverRef` VARCHAR(255), `number` INT, `code` VARCHAR(3), "
+                "`forename` VARCHAR(255), `surname` VARCHAR(255), `dob` DATE, `nationality` VARCHAR(255)"),
+    "status": "`statusId` INT NOT NULL PRIMARY KEY, `status` VARCHAR(255)",
+    "races": ("`raceId` INT NOT NULL PRIMARY KEY, `year` INT, `round` INT, `circuitId` INT, "
+              "`name` VARCHAR(255), `date` DATE"),
+    "results": ("`resultId` INT NOT NULL PRIMARY KEY, `raceId` INT, `driverId` INT, `constructorId` INT, "
+                "`grid` INT, `position` INT, `points` FLOAT, `laps` INT, `milliseconds` INT, "
+                "`fastestLap` INT, `statusId` INT"),
+    "qualifying": ("`qualifyId` INT NOT NULL PRIMARY KEY, `raceId` INT, `driverId` INT, `constructorId` INT, "
+                   "`position` INT, `q1` VARCHAR(255)"),
+    "pitStops": ("`raceId` INT NOT NULL, `driverId` INT NOT NULL, `stop` INT NOT NULL, `lap` INT, "
+                 "`duration` VARCHAR(255), `milliseconds` INT, PRIMARY KEY (`raceId`, `driverId`, `stop`)"),
+    "lapTimes": ("`raceId` INT NOT NULL, `driverId` INT NOT NULL, `lap` INT NOT NULL, `position` INT, "
+                 "`time` VARCHAR(255), `milliseconds` INT, PRIMARY KEY (`raceId`, `driverId`, `lap`)"),
+}
+
+# Tables created by `seed` before any filler tables (bench_meta included).
+BASE_TABLE_COUNT = len(_TABLES)
+
+_INDEXES = [
+    ("races", "idx_races_year", "year"),
+    ("results", "idx_results_race", "raceId"),
+    ("results", "idx_results_driver", "driverId"),
+    ("qualifying", "idx_qualifying_race", "raceId"),
+    ("lapTimes", "idx_laptimes_driver", "driverId"),
+]
+
+_FILLER_COLUMNS = ("`id` INT NOT NULL PRIMARY KEY, `category` VARCHAR(32), `name` VARCHAR(255), "
+                   "`amount` DOUBLE, `quantity` INT, `created` DATE")
+
+_COUNTRIES = ["UK", "Italy", "Germany", "France", "Spain", "Monaco", "Belgium", "Brazil", "Japan", "USA",
+              "Australia", "Canada", "Austria", "Hungary", "Netherlands", "Mexico", "Bahrain", "Singapore"]
+_NATIONALITIES = ["British", "Italian", "German", "French", "Spanish", "Brazilian", "Finnish", "Dutch",
+                  "Australian", "Mexican", "Japanese", "American", "Canadian", "Austrian", "Belgian"]
+_SYLLABLES = ["ham", "ver", "sten", "lec", "ler", "ros", "berg", "al", "on", "so", "vet", "tel", "rai",
+              "ko", "nen", "bot", "tas", "per", "ez", "nor", "ris", "sai", "nz", "gas", "ly", "oc", "on"]
+_STATUSES = ["Finished", "+1 Lap", "+2 Laps", "Engine", "Gearbox", "Collision", "Accident", "Hydraulics",
+             "Brakes", "Suspension", "Retired", "Spun off", "Disqualified", "Electrical", "Power Unit"]
+
+
+def dataset_size(lap_rows: int) -> dict:
+    """Returns the row counts of every table for a given number of lapTimes rows."""
+    races = max(1, math.ceil(lap_rows / (DRIVERS_PER_RACE * LAPS_PER_RACE)))
+    return {
+        "lapTimes": lap_rows, "races": races, "results": races * DRIVERS_PER_RACE,
+        "qualifying": races * DRIVERS_PER_RACE, "pitStops": races * DRIVERS_PER_RACE * 2,
+        "drivers": 850, "constructors": 210, "circuits": 77, "status": len(_STATUSES),
+    }
+
+
+def _name(rng: random.Random, parts: int = 2) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(parts)).capitalize()
+
+
+def _lap_time(milliseconds: int) -> str:
+    return f"{milliseconds // 60000}:{milliseconds // 1000 % 60:02d}.{milliseconds % 1000:03d}"
+
+
+def _date(year: int, day_of_year: int) -> str:
+    month, day = 1 + day_of_year // 28 % 12, 1 + day_of_year % 28
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _race_drivers(race: int, sizes: dict, seed_value: int) -> list:
+    """The drivers of a race, the same for results, qualifying, pitStops and lapTimes."""
+    return random.Random(seed_value * 1_000_003 + race).sample(range(1, sizes["drivers"] + 1), DRIVERS_PER_RACE)
+
+
+def _rows(table: str, sizes: dict, rng: random.Random, seed_value: int):
+    """Yields the rows of one F1 table."""
+    if table == "circuits":
+        for i in range(1, sizes["circuits"] + 1):
+            name = _name(rng)
+            yield (i, name.lower(), f"{name} Circuit", _name(rng, 3), rng.choice(_COUNTRIES),
+                   round(rng.uniform(-60, 60), 4), round(rng.uniform(-120, 150), 4))
+    elif table == "constructors":
+        for i in range(1, sizes["constructors"] + 1):
+            name = _name(rng)
+            yield (i, name.lower(), name, rng.choice(_NATIONALITIES))
+    elif table == "drivers":
+        for i in range(1, sizes["drivers"] + 1):
+            surname = _name(rng, 3)
+            yield (i, surname.lower(), rng.randint(1, 99), surname[:3].upper(), _name(rng),
+                   surname, _date(rng.randint(1920, 2005), rng.randint(0, 335)), rng.choice(_NATIONALITIES))
+    elif table == "status":
+        for i, status in enumerate(_STATUSES, 1):
+            yield (i, status)
+    elif table == "races":
+        for i in range(1, sizes["races"] + 1):
+            year = FIRST_SEASON + (i - 1) // RACES_PER_SEASON
+            race_round = 1 + (i - 1) % RACES_PER_SEASON
+            yield (i, year, race_round, rng.randint(1, sizes["circuits"]),
+                   f"{rng.choice(_COUNTRIES)} Grand Prix", _date(year, race_round * 15))
+    elif table in ("results", "qualifying"):
+        row_id = 0
+        for race in range(1, sizes["races"] + 1):
+            for position, driver in enumerate(_race_drivers(race, sizes, seed_value), 1):
+                row_id += 1
+                constructor = 1 + driver % sizes["constructors"]
+                if table == "qualifying":
+                    yield (row_id, race, driver, constructor, position, _lap_time(rng.randint(70000, 100000)))
+                else:
+                    status = 1 if rng.random() < 0.7 else rng.randint(2, len(_STATUSES))
+                    points = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1][position - 1] if position <= 10 else 0
+                    yield (row_id, race, driver, constructor, rng.randint(1, DRIVERS_PER_RACE),
+                           position if status == 1 else None, float(points), LAPS_PER_RACE,
+                           rng.randint(5_000_000, 6_000_000) if status == 1 else None,
+                           rng.randint(1, LAPS_PER_RACE), status)
+    elif table == "pitStops":
+        for race in range(1, sizes["races"] + 1):
+            for driver in _race_drivers(race, sizes, seed_value):
+                for stop in (1, 2):
+                    milliseconds = rng.randint(19000, 40000)
+                    yield (race, driver, stop, stop * LAPS_PER_RACE // 3, f"{milliseconds / 1000:.3f}", milliseconds)
+    elif table == "lapTimes":
+        remaining = sizes["lapTimes"]
+        for race in range(1, sizes["races"] + 1):
+            for driver in _race_drivers(race, sizes, seed_value):
+                for lap in range(1, LAPS_PER_RACE + 1):
+                    if remaining == 0:
+                        return
+                    remaining -= 1
+                    milliseconds = rng.randint(70000, 110000)
+                    yield (race, driver, lap, rng.randint(1, DRIVERS_PER_RACE), _lap_time(milliseconds), milliseconds)
+
+
+def _insert(connection, table: str, rows) -> int:
+    """Inserts rows in batches (executemany sends multi-row INSERTs to MySQL)."""
+    cursor = connection.cursor()
+    inserted, batch = 0, []
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_ROWS:
+                inserted += _flush(cursor, table, batch)
+                batch = []
+        if batch:
+            inserted += _flush(cursor, table, batch)
+        connection.commit()
+    finally:
+        cursor.close()
+    return inserted
+
+
+def _flush(cursor, table: str, batch: list) -> int:
+    cursor.executemany(f"INSERT INTO `{table}` VALUES ({', '.join(['%s'] * len(batch[0]))})", batch)
+    return len(batch)
+
+
+def _recreate_table(connection, table: str, columns: str):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+        cursor.execute(f"CREATE TABLE `{table}` ({columns})")
+    finally:
+        cursor.close()
+
+
+def _meta(connection) -> dict:
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT `name`, `value` FROM `bench_meta`")
+        return dict(cursor.fetchall())
+    except Exception:
+        return {}  # Not seeded yet.
+    finally:
+        cursor.close()
+
+
+def seed(connection, lap_rows: int, filler_tables: int = 0, filler_rows: int = 1000,
+         seed_value: int = 7, force: bool = False, log=print) -> bool:
+    """
+    Creates and fills the F1 tables (and `filler_tables` extra tables) in the
+    connection's current database. Skipped when the database already holds the
+    same dataset.
+
+    Args:
+        connection: An open connection (mysql.connector or fake_mysql) to the target database.
+        lap_rows (int): Rows of `lapTimes`; the other tables are sized from it.
+        filler_tables (int): Extra tables (`extra_0001`, ...) to grow the schema.
+        filler_rows (int): Rows per filler table.
+        seed_value (int): Random seed; the same arguments always produce the same data.
+        force (bool): Rebuild even if the database is already seeded.
+
+    Returns:
+        bool: True if the data was (re)generated.
+    """
+    wanted = {"version": DATASET_VERSION, "lap_rows": str(lap_rows), "filler_tables": str(filler_tables),
+              "filler_rows": str(filler_rows), "seed": str(seed_value)}
+    if not force and _meta(connection) == wanted:
+        return False
+
+    sizes = dataset_size(lap_rows)
+    rng = random.Random(seed_value)
+    for table, columns in _TABLES.items():
+        _recreate_table(connection, table, columns)
+        if table == "bench_meta":
+            continue
+        inserted = _insert(connection, table, _rows(table, sizes, rng, seed_value))
+        log(f"  Seeded `{table}` with {inserted:,} rows.")
+    cursor = connection.cursor()
+    try:
+        for table, index, column in _INDEXES:
+            cursor.execute(f"CREATE INDEX `{index}` ON `{table}` (`{column}`)")
+    finally:
+        cursor.close()
+
+    for number in range(1, filler_tables + 1):
+        table = f"extra_{number:04d}"
+        _recreate_table(connection, table, _FILLER_COLUMNS)
+        _insert(connection, table, (
+            (i, f"cat{rng.randint(1, 20)}", _name(rng, 3), round(rng.uniform(0, 10000), 2),
+             rng.randint(0, 500), _date(rng.randint(2000, 2024), rng.randint(0, 335)))
+            for i in range(1, filler_rows + 1)
+        ))
+    if filler_tables:
+        log(f"  Seeded {filler_tables} filler tables with {filler_rows:,} rows each.")
+
+    _insert(connection, "bench_meta", sorted(wanted.items()))
+    return True
+
@@ -11,4 +11,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from . import agent
\ No newline at end of file
+import importlib
+
+from dotenv import load_dotenv
+
+# Load environment variables from the .env file (once, for every module).
+load_dotenv()
+
+
+def __getattr__(name):
+    # The `agent` submodule (and with it google.adk) is imported on first access.
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -13,15 +13,9 @@
 # limitations under the License.
 
 import os
-from google.adk.agents import Agent
-from dotenv import load_dotenv
+import threading
 
-# Import the refactored tool and the enhanced prompt for MySQL
-from . import tools
-from .prompt import MYSQL_PROMPT
-
-# Load environment variables from the .env file
-load_dotenv()
+# Environment variables from the .env file are loaded once, by the package __init__.
 
 # --- Agent Definition ---
 
@@ -29,15 +23,61 @@ load_dotenv()
 # This should be a powerful model capable of reasoning and function calling.
 ROOT_AGENT_MODEL = os.environ.get("ROOT_AGENT_MODEL", "gemini-2.5-flash")
 
-# This is the main agent for interacting with the MySQL database.
-# Its instruction is the comprehensive prompt we've built, which contains all the
-# database context and reasoning logic. The agent's tool is the SQL query executor.
-root_agent = Agent(
-    name="mysql_agent",
-    model=ROOT_AGENT_MODEL,
-    description="An agent that understands questions about a database, generates SQL, executes it, and provides answers.",
-    instruction=MYSQL_PROMPT,
-    tools=[
-        tools.query_mysql,
-    ],
-)
+_root_agent = None
+_root_agent_lock = threading.Lock()
+
+
+def get_root_agent():
+    """
+    Builds the root agent on first use and returns the same instance afterwards.
+    google.adk, the tools and the prompt module are only imported here, and the
+    context file is only read when the first instruction is built.
+    """
+    global _root_agent
+    if _root_agent is None:
+        with _root_agent_lock:
+            if _root_agent is None:
+                from google.adk.agents import Agent
+
+                # Import the refactored tool and the enhanced prompt for MySQL
+                from . import tools
+                from .prompt import build_mysql_prompt
+
+                # With the question cache on, questions matching an earlier one run
+                # its SQL directly instead of having the model write it again.
+                from . import callbacks
+                cache_callbacks = {}
+                if callbacks.MYSQL_SQL_CACHE_ENABLED:
+                    cache_callbacks = dict(
+                        before_model_callback=callbacks.before_model_callback,
+                        after_tool_callback=callbacks.after_tool_callback,
+                        after_agent_callback=callbacks.after_agent_callback,
+                    )
+
+                # This is the main agent for interacting with the MySQL database.
+                # Its instruction is the comprehensive prompt we've built, with the database
+                # context narrowed to the tables relevant to each question (see prompt.py).
+                # The agent's tools are the SQL query executor, registered in its async form so
+                # slow queries don't stall other sessions, its batch variant for
+                # independent queries that can run concurrently, and the page reader for
+                # results kept behind a handle.
+                _root_agent = Agent(
+                    name="mysql_agent",
+                    model=ROOT_AGENT_MODEL,
+                    description="An agent that understands questions about a database, generates SQL, executes it, and provides answers.",
+                    instruction=build_mysql_prompt,
+                    tools=[
+                        tools.query_mysql_async,
+                        tools.query_mysql_batch,
+                        tools.fetch_result_page,
+                    ],
+                    **cache_callbacks,
+                )
+    return _root_agent
+
+
+def __getattr__(name):
+    # `root_agent` is what ADK and Agent Engine look up; it is built on access.
+    if name == "root_agent":
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
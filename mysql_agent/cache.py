@@ -0,0 +1,230 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# cache.py
+# Result cache for repeated read-only queries, keyed on normalized SQL text.
+import collections
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(normalized_sql: str, *variant) -> str:
+    """Builds a compact cache key from normalized SQL and output options."""
+    raw = json.dumps([normalized_sql, *variant], separators=(",", ":"))
+    return "mysql_agent:result:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# =======================================================================
+# CACHE BACKENDS
+# =======================================================================
+
+class InMemoryBackend:
+    """Process-local LRU store bounded by entry count and approximate bytes."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()  # key -> (payload, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str, ttl: float):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, size, time.monotonic() + ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class RedisBackend:
+    """
+    Shared store for several agent replicas, using any Redis-compatible server.
+    Size bounds and eviction are delegated to the server's `maxmemory` policy.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The 'redis' package is required for MYSQL_CACHE_BACKEND=redis.") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        payload = self._client.get(key)
+        return payload.decode("utf-8") if payload is not None else None
+
+    def set(self, key: str, payload: str, ttl: float):
+        self._client.set(key, payload, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def stats(self) -> dict:
+        return {}
+
+
+# =======================================================================
+# RESULT CACHE
+# =======================================================================
+
+class ResultCache:
+    """
+    TTL cache of tool responses. Each entry remembers the `UPDATE_TIME` of the
+    tables it read; a lookup with different table versions counts as stale and
+    drops the entry. A failing backend (e.g. Redis unreachable) never fails the
+    call: lookups count as misses and stores are skipped, with a warning.
+    """
+
+    def __init__(self, backend, ttl: float = 300):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stores = 0
+        self.errors = 0
+
+    def get(self, key: str, versions: dict):
+        """Returns the cached response for `key` if present and still current."""
+        try:
+            payload = self.backend.get(key)
+        except Exception as e:
+            self._backend_failed("read", e)
+            payload = None
+        if payload is None:
+            self._count("misses")
+            return None
+        entry = json.loads(payload)
+        if entry["versions"] != versions:
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                self._backend_failed("delete", e)
+            self._count("stale")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["response"]
+
+    def set(self, key: str, response: dict, versions: dict):
+        """Stores a JSON-serializable response together with the table versions it saw."""
+        payload = json.dumps({"versions": versions, "response": response}, separators=(",", ":"))
+        try:
+            self.backend.set(key, payload, self.ttl)
+        except Exception as e:
+            self._backend_failed("write", e)
+            return
+        self._count("stores")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "stores": self.stores,
+                "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+        counters.update(self.backend.stats())
+        return counters
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _backend_failed(self, action: str, error: Exception):
+        self._count("errors")
+        logger.warning("Result cache %s failed; continuing uncached: %s", action, error)
+
+
+class TableVersions:
+    """
+    Reads `information_schema.tables.UPDATE_TIME` for a set of tables, memoizing
+    each value for `check_interval` seconds so hot queries don't hit
+    information_schema on every call.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._memo = {}  # table -> (version, checked_at)
+        self._lock = threading.Lock()
+
+    def get(self, connection, tables: list) -> dict:
+        now = time.monotonic()
+        versions, missing = {}, []
+        with self._lock:
+            for table in tables:
+                memo = self._memo.get(table)
+                if memo and now - memo[1] < self.check_interval:
+                    versions[table] = memo[0]
+                else:
+                    missing.append(table)
+        if missing:
+            cursor = connection.cursor()
+            try:
+                placeholders = ", ".join(["%s"] * len(missing))
+                cursor.execute(
+                    "SELECT table_name, update_time FROM information_schema.tables "
+                    f"WHERE table_schema = DATABASE() AND table_name IN ({placeholders})",
+                    tuple(missing),
+                )
+                found = {name: str(update_time) if update_time else None for name, update_time in cursor.fetchall()}
+            finally:
+                cursor.close()
+            with self._lock:
+                for table in missing:
+                    # Tables not found (CTEs, views of other schemas) get a None version.
+                    versions[table] = found.get(table)
+                    self._memo[table] = (versions[table], now)
+        return versions
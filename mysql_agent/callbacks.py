@@ -0,0 +1,203 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# callbacks.py
+# ADK callbacks of the root agent that connect it to the question cache: a
+# question close enough to one answered before runs the cached SQL directly,
+# skipping the model call that would write it, and questions answered by a
+# single successful query are added to the cache.
+import asyncio
+import collections
+import os
+import threading
+
+from . import tools
+from .prompt import question_text
+from .question_cache import QuestionCache
+
+# --- Question Cache (optional, from .env) ---
+# Reuse the SQL of a previously answered question when a new question matches
+# it with a similarity of at least MYSQL_SQL_CACHE_THRESHOLD (0-1) and the same
+# numbers and names. Entries expire after MYSQL_SQL_CACHE_TTL_SECONDS (0 =
+# never), are dropped when the schema fingerprint changes, and are kept in
+# MYSQL_SQL_CACHE_FILE across restarts when it is set.
+MYSQL_SQL_CACHE_ENABLED = os.environ.get("MYSQL_SQL_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+MYSQL_SQL_CACHE_THRESHOLD = float(os.environ.get("MYSQL_SQL_CACHE_THRESHOLD", "0.8"))
+MYSQL_SQL_CACHE_MAX_ENTRIES = int(os.environ.get("MYSQL_SQL_CACHE_MAX_ENTRIES", "1000"))
+MYSQL_SQL_CACHE_TTL_SECONDS = float(os.environ.get("MYSQL_SQL_CACHE_TTL_SECONDS", "86400"))
+MYSQL_SQL_CACHE_FILE = os.environ.get("MYSQL_SQL_CACHE_FILE", "")
+
+# The tool a cache hit calls, the tools whose successful calls are recorded,
+# the other tools that read data (a turn using them wasn't answered by a
+# single query), and the arguments kept with the SQL.
+_HIT_TOOL = "query_mysql_async"
+_QUERY_TOOLS = ("query_mysql_async", "query_mysql")
+_DATA_TOOLS = _QUERY_TOOLS + ("query_mysql_batch", "fetch_result_page")
+_CACHED_ARGS = ("sql_query", "output_format", "token_budget", "page_size")
+_MAX_OPEN_TURNS = 1024
+
+
+class _Turn:
+    """What the callbacks learn about one invocation (one user question)."""
+
+    __slots__ = ("question", "standalone", "hit", "hit_score", "hit_pending", "queries", "other_reads")
+
+    def __init__(self):
+        self.question = ""
+        self.standalone = False  # The question was the first message of the session.
+        self.hit = None  # CachedQuestion whose SQL this turn reuses.
+        self.hit_score = 0.0
+        self.hit_pending = False  # The cached SQL's tool call hasn't returned yet.
+        self.queries = []  # Arguments of successful query calls written by the model.
+        self.other_reads = 0  # Batch queries and result pages read in the turn.
+
+
+_cache = None
+_turns = collections.OrderedDict()  # invocation id -> _Turn
+_lock = threading.Lock()
+
+
+def _get_cache() -> QuestionCache:
+    """
+    Returns the process-wide question cache, creating it on first use.
+    """
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = QuestionCache(
+                    threshold=MYSQL_SQL_CACHE_THRESHOLD,
+                    max_entries=MYSQL_SQL_CACHE_MAX_ENTRIES,
+                    ttl=MYSQL_SQL_CACHE_TTL_SECONDS,
+                    path=MYSQL_SQL_CACHE_FILE,
+                )
+    return _cache
+
+
+def get_sql_cache_stats() -> dict:
+    """
+    Returns entry count, hit/miss and invalidation counters of the question cache.
+    """
+    if _cache is None:
+        return {}
+    return _cache.stats()
+
+
+async def before_model_callback(callback_context, llm_request):
+    """
+    ADK before_model_callback: on the first model call of a turn, looks the
+    question up in the cache. On a hit, returns a model response that calls
+    the query tool with the cached SQL, so the model doesn't write it.
+
+    Args:
+        callback_context (CallbackContext): The context passed in by ADK.
+        llm_request (LlmRequest): The request about to be sent to the model.
+
+    Returns:
+        LlmResponse | None: The tool call on a cache hit, None to call the model.
+    """
+    with _lock:
+        if callback_context.invocation_id in _turns:
+            return None  # Later calls of the turn see tool results; the model handles them.
+        turn = _turns[callback_context.invocation_id] = _Turn()
+        while len(_turns) > _MAX_OPEN_TURNS:
+            _turns.popitem(last=False)
+
+    turn.question = question_text(callback_context).strip()
+    # Follow-ups ("and in 2020?") depend on the conversation, so only a
+    # question that opens a session is recorded; any question can hit.
+    user_messages = [
+        content for content in llm_request.contents
+        if content.role == "user" and any(getattr(part, "text", None) for part in content.parts or [])
+    ]
+    turn.standalone = len(user_messages) == 1
+    if not turn.question:
+        return None
+
+    fingerprint = await asyncio.to_thread(tools.get_schema_fingerprint)
+    if not fingerprint:
+        return None
+    match = _get_cache().lookup(turn.question, fingerprint)
+    if match is None:
+        return None
+    turn.hit, turn.hit_score = match
+    turn.hit_pending = True
+
+    from google.adk.models import LlmResponse
+    from google.genai import types
+
+    return LlmResponse(content=types.Content(role="model", parts=[
+        types.Part(function_call=types.FunctionCall(name=_HIT_TOOL, args=dict(turn.hit.args)))
+    ]))
+
+
+def after_tool_callback(tool, args: dict, tool_context, tool_response):
+    """
+    ADK after_tool_callback: records the data reads of the turn (successful
+    queries, batches and result pages), and checks the result of a cached SQL. Cached SQL that fails is dropped from
+    the cache, and the model is told to write a new query.
+
+    Returns:
+        dict | None: The annotated response of a cached SQL call, else None.
+    """
+    if tool.name not in _DATA_TOOLS:
+        return None
+    with _lock:
+        turn = _turns.get(tool_context.invocation_id)
+    if turn is None:
+        return None
+    if tool.name not in _QUERY_TOOLS:
+        turn.other_reads += 1
+        return None
+    if not isinstance(tool_response, dict):
+        return None
+
+    if turn.hit_pending:
+        turn.hit_pending = False
+        if "error" in tool_response:
+            _get_cache().invalidate(turn.hit.question)
+            turn.hit = None
+            return {
+                **tool_response,
+                "note": "This SQL was reused from a similar earlier question and failed; "
+                        "it was dropped from the cache. Write a new query for the question.",
+            }
+        metadata = dict(tool_response.get("metadata") or {})
+        metadata["sql_cache"] = {"hit": True, "similarity": turn.hit_score, "cached_question": turn.hit.question}
+        return {**tool_response, "metadata": metadata}
+
+    if "error" not in tool_response:
+        turn.queries.append({name: args[name] for name in _CACHED_ARGS if name in args})
+    return None
+
+
+async def after_agent_callback(callback_context):
+    """
+    ADK after_agent_callback: at the end of a turn, caches the question with
+    its SQL when the turn was answered by exactly one successful query
+    written by the model, and read no other data (batches, result pages).
+
+    Returns:
+        None: The agent's own output is kept.
+    """
+    with _lock:
+        turn = _turns.pop(callback_context.invocation_id, None)
+    if turn is None or turn.hit is not None or not turn.standalone:
+        return None
+    if len(turn.queries) != 1 or turn.other_reads:
+        return None
+    fingerprint = await asyncio.to_thread(tools.get_schema_fingerprint)
+    if fingerprint:
+        _get_cache().store(turn.question, turn.queries[0], fingerprint)
+    return None
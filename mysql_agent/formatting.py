@@ -0,0 +1,315 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# formatting.py
+# Single-pass formatting of tuple rows (as returned by a plain cursor) into the
+# text sent back to the model.
+import csv
+import io
+import json
+import math
+
+# MySQL protocol column type codes (same values as mysql.connector's FieldType).
+# Kept here so formatting does not require importing the driver.
+_DECIMAL_TYPES = {0, 246}                       # DECIMAL, NEWDECIMAL
+_INTEGER_TYPES = {1, 2, 3, 8, 9, 13}            # TINY, SHORT, LONG, LONGLONG, INT24, YEAR
+_FLOAT_TYPES = {4, 5}                           # FLOAT, DOUBLE
+_TEMPORAL_TYPES = {7, 10, 12, 14}               # TIMESTAMP, DATE, DATETIME, NEWDATE
+_TIME_TYPES = {11}                              # TIME (returned as timedelta)
+_BIT_TYPES = {16}                               # BIT (returned as int or bytes)
+
+NULL_TEXT = "NULL"
+
+# Formats accepted by `format_rows`, roughly from most to least token-dense.
+OUTPUT_FORMATS = ("tsv", "csv", "json", "markdown", "summary")
+
+# Rough characters-per-token ratio for Gemini tokenizers on tabular text.
+_CHARS_PER_TOKEN = 4
+
+# Rows shown at each end of the result in "summary" mode.
+SUMMARY_HEAD_ROWS = 5
+
+# Rows rendered to estimate the length of a format without rendering it all.
+_SAMPLE_ROWS = 50
+
+
+def _escape_markdown(text: str) -> str:
+    """Escapes characters that would break a Markdown table cell."""
+    if "|" in text:
+        text = text.replace("|", "\\|")
+    if "\n" in text or "\r" in text:
+        text = text.replace("\r\n", "<br>").replace("\n", "<br>").replace("\r", "<br>")
+    return text
+
+
+def _escape_tsv(text: str) -> str:
+    """Escapes tabs and newlines so every TSV row stays on one line."""
+    if "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def _convert_plain(value) -> str:
+    return str(value)
+
+
+def _convert_temporal(value) -> str:
+    # datetime/date values; zero-dates may come back as strings.
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _text_converter(escape):
+    """Builds the converter for string/binary columns with a format-specific escape."""
+    def convert(value) -> str:
+        if isinstance(value, (bytes, bytearray)):
+            try:
+                value = value.decode("utf-8")
+            except UnicodeDecodeError:
+                return "0x" + value.hex()
+        elif not isinstance(value, str):
+            value = str(value)
+        return escape(value) if escape else value
+    return convert
+
+
+def _any_converter(escape):
+    """Builds the fallback converter for columns whose Python type varies."""
+    convert_text = _text_converter(escape)
+    def convert(value) -> str:
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return convert_text(value)
+    return convert
+
+
+def column_converters(description, escape=_escape_markdown) -> list:
+    """
+    Picks one converter per column from `cursor.description`, so the per-cell
+    work is a single function call without any type dispatch.
+
+    Args:
+        description (list): The `cursor.description` of an executed statement.
+        escape (callable): Escape applied to text cells, or None for raw text.
+
+    Returns:
+        list: One callable per column turning a non-NULL value into cell text.
+    """
+    convert_text = _text_converter(escape)
+    convert_any = _any_converter(escape)
+    converters = []
+    for column in description:
+        type_code = column[1]
+        if type_code in _INTEGER_TYPES or type_code in _FLOAT_TYPES or type_code in _DECIMAL_TYPES:
+            converters.append(_convert_plain)
+        elif type_code in _TEMPORAL_TYPES:
+            converters.append(_convert_temporal)
+        elif type_code in _TIME_TYPES or type_code in _BIT_TYPES:
+            converters.append(convert_any)
+        else:
+            # Strings, BLOB/BINARY, JSON, ENUM/SET and anything unknown.
+            converters.append(convert_text)
+    return converters
+
+
+def format_markdown_table(description, rows) -> str:
+    """
+    Formats tuple rows into a Markdown table in a single pass.
+
+    Args:
+        description (list): The `cursor.description` of the executed statement.
+        rows (list): Result rows as tuples, in `description` column order.
+
+    Returns:
+        str: The Markdown table, or "No results found." for an empty result.
+    """
+    if not rows:
+        return "No results found."
+
+    converters = column_converters(description)
+    out = io.StringIO()
+    write = out.write
+    write("| " + " | ".join(_escape_markdown(str(column[0])) for column in description) + " |\n")
+    write("| " + " | ".join(["---"] * len(description)) + " |")
+    for row in rows:
+        write("\n| ")
+        write(" | ".join(
+            NULL_TEXT if value is None else convert(value)
+            for convert, value in zip(converters, row)
+        ))
+        write(" |")
+    return out.getvalue()
+
+
+def format_tsv(description, rows) -> str:
+    """Formats tuple rows as tab-separated values with a single header line."""
+    if not rows:
+        return "No results found."
+
+    converters = column_converters(description, escape=_escape_tsv)
+    out = io.StringIO()
+    write = out.write
+    write("\t".join(_escape_tsv(str(column[0])) for column in description))
+    for row in rows:
+        write("\n")
+        write("\t".join(
+            NULL_TEXT if value is None else convert(value)
+            for convert, value in zip(converters, row)
+        ))
+    return out.getvalue()
+
+
+def format_csv(description, rows) -> str:
+    """Formats tuple rows as RFC 4180 CSV with a single header line."""
+    if not rows:
+        return "No results found."
+
+    converters = column_converters(description, escape=None)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([column[0] for column in description])
+    writer.writerows(
+        [NULL_TEXT if value is None else convert(value) for convert, value in zip(converters, row)]
+        for row in rows
+    )
+    return out.getvalue().rstrip("\n")
+
+
+def format_columnar_json(description, rows) -> str:
+    """
+    Formats tuple rows as compact JSON: the column names once, then one array
+    per row. Numbers stay numbers and NULL becomes null.
+    """
+    converters = column_converters(description, escape=None)
+    numeric = [column[1] in _INTEGER_TYPES or column[1] in _FLOAT_TYPES for column in description]
+    data = [
+        [
+            value if value is None or is_number else convert(value)
+            for convert, is_number, value in zip(converters, numeric, row)
+        ]
+        for row in rows
+    ]
+    return json.dumps(
+        {"columns": [column[0] for column in description], "rows": data},
+        separators=(",", ":"), ensure_ascii=False,
+    )
+
+
+def format_summary(description, rows, head: int = SUMMARY_HEAD_ROWS) -> str:
+    """
+    Formats a short summary of the result: row count, per-column NULL counts
+    and numeric ranges, followed by the first and last rows as TSV.
+    """
+    if not rows:
+        return "No results found."
+
+    lines = [f"Rows: {len(rows)}", "Columns:"]
+    for index, column in enumerate(description):
+        values = [row[index] for row in rows if row[index] is not None]
+        line = f"- {column[0]}: {len(rows) - len(values)} NULL"
+        numeric = column[1] in _INTEGER_TYPES or column[1] in _FLOAT_TYPES or column[1] in _DECIMAL_TYPES
+        if numeric and values:
+            line += f", min={min(values)}, max={max(values)}"
+        lines.append(line)
+
+    if len(rows) <= 2 * head:
+        lines.append("All rows:")
+        lines.append(format_tsv(description, rows))
+    else:
+        lines.append(f"First {head} rows:")
+        lines.append(format_tsv(description, rows[:head]))
+        lines.append(f"Last {head} rows:")
+        lines.append(format_tsv(description, rows[-head:]))
+    return "\n".join(lines)
+
+
+_FORMATTERS = {
+    "markdown": format_markdown_table,
+    "tsv": format_tsv,
+    "csv": format_csv,
+    "json": format_columnar_json,
+    "summary": format_summary,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer call)."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def estimate_length(description, rows, output_format: str) -> int:
+    """
+    Estimates the length of `rows` formatted as `output_format` from an evenly
+    spaced sample of at most _SAMPLE_ROWS rows (exact for smaller results).
+    """
+    formatter = _FORMATTERS[output_format]
+    if len(rows) <= _SAMPLE_ROWS:
+        return len(formatter(description, rows))
+    step = len(rows) / _SAMPLE_ROWS
+    sample = [rows[int((i + 0.5) * step)] for i in range(_SAMPLE_ROWS)]
+    # One row gives the fixed part (header, JSON framing); the sample the per-row part.
+    single = len(formatter(description, sample[:1]))
+    per_row = (len(formatter(description, sample)) - single) / (_SAMPLE_ROWS - 1)
+    return round(single + per_row * (len(rows) - 1))
+
+
+def format_rows(description, rows, output_format: str = "markdown", token_budget: int = 0):
+    """
+    Formats tuple rows in the requested format, optionally fitting a token budget.
+
+    With output_format="auto" the densest format, by estimated length, is
+    chosen and only that one is rendered. When a token budget is given and the
+    output exceeds it, rows are dropped from the end until it fits (falling
+    back to "summary" if not even a single row fits).
+
+    Args:
+        description (list): The `cursor.description` of the executed statement.
+        rows (list): Result rows as tuples, in `description` column order.
+        output_format (str): One of OUTPUT_FORMATS, or "auto".
+        token_budget (int): Maximum estimated tokens for the output; 0 disables it.
+
+    Returns:
+        tuple: (text, info) where info is a dict with the format used, rows shown
+               and estimated tokens (and tokens saved versus an estimated
+               Markdown table).
+    """
+    if output_format == "auto":
+        output_format = min(("tsv", "csv", "json"), key=lambda name: estimate_length(description, rows, name))
+    if output_format in _FORMATTERS:
+        text = _FORMATTERS[output_format](description, rows)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}, auto.")
+
+    formatter = _FORMATTERS[output_format]
+    shown = len(rows)
+    tokens = estimate_tokens(text)
+    if token_budget and tokens > token_budget and output_format != "summary":
+        # Estimate how many rows fit from the average row size, then step down.
+        shown = min(len(rows) - 1, int(len(rows) * token_budget / tokens))
+        while shown > 0:
+            text = formatter(description, rows[:shown])
+            tokens = estimate_tokens(text)
+            if tokens <= token_budget:
+                break
+            shown = int(shown * token_budget / tokens) if shown > 1 else 0
+        if shown <= 0:
+            output_format = "summary"
+            shown = min(len(rows), 2 * SUMMARY_HEAD_ROWS)
+            text = format_summary(description, rows)
+            tokens = estimate_tokens(text)
+
+    info = {"format": output_format, "rows_shown": shown, "estimated_tokens": tokens}
+    if output_format != "markdown":
+        baseline = math.ceil(estimate_length(description, rows, "markdown") / _CHARS_PER_TOKEN)
+        info["estimated_tokens_saved"] = max(0, baseline - tokens)
+    return text, info
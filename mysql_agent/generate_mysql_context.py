@@ -12,14 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-# generate_mysql_prompt.py
+# generate_mysql_context.py
+import argparse
+import collections
+import hashlib
+import json
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
 import vertexai
 from vertexai.generative_models import GenerativeModel
 
+try:
+    from .metrics import MetricsRegistry
+except ImportError:  # Run as a script: python mysql_agent/generate_mysql_context.py
+    from metrics import MetricsRegistry
+
 # Load environment variables from your .env file
 load_dotenv()
 
@@ -35,8 +49,78 @@ GCP_PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 GCP_LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
 LLM_MODEL = os.environ.get("LLM_MODEL")
 
-# The output filename for the generated prompt context.
-OUTPUT_FILENAME = "mysql_context.txt"
+# The output filename for the generated prompt context. It is written next to
+# this script, where prompt.py reads it (MYSQL_CONTEXT_FILE is shared by both).
+OUTPUT_FILENAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.environ.get("MYSQL_CONTEXT_FILE", "mysql_context.txt")
+)
+
+# Parallel harvesting: number of worker connections and the time allowed per table.
+CONTEXT_WORKERS = int(os.environ.get("CONTEXT_WORKERS", "4"))
+CONTEXT_TABLE_TIMEOUT_SECONDS = float(os.environ.get("CONTEXT_TABLE_TIMEOUT_SECONDS", "300"))
+
+# Column profiling: tables above CONTEXT_PROFILE_SAMPLE_ROWS are profiled from a
+# random sample of that size; exact MIN/MAX/AVG are skipped above
+# CONTEXT_FULL_SCAN_MAX_ROWS. CONTEXT_ANALYZE_TABLES refreshes optimizer stats first.
+CONTEXT_PROFILE_SAMPLE_ROWS = int(os.environ.get("CONTEXT_PROFILE_SAMPLE_ROWS", "50000"))
+CONTEXT_FULL_SCAN_MAX_ROWS = int(os.environ.get("CONTEXT_FULL_SCAN_MAX_ROWS", "5000000"))
+CONTEXT_ANALYZE_TABLES = os.environ.get("CONTEXT_ANALYZE_TABLES", "false").lower() in ("1", "true", "yes")
+
+# Incremental regeneration: per-table results and the last Gemini output are kept
+# here, and only tables whose fingerprint changed are profiled again.
+CACHE_FILENAME = os.path.splitext(OUTPUT_FILENAME)[0] + "_cache.json"
+
+# Run metrics: phase timings, per-table timings and table/error counts are
+# written here in the Prometheus text format at the end of every run (e.g. for
+# node_exporter's textfile collector). A timing summary is always printed.
+CONTEXT_METRICS_FILE = os.environ.get("CONTEXT_METRICS_FILE", "")
+
+# =======================================================================
+# RUN METRICS
+# =======================================================================
+
+_metrics = MetricsRegistry(namespace="mysql_context")
+_run_phase_seconds = _metrics.histogram("run_phase_seconds", "Duration of each phase of a generator run.",
+                                        labelnames=("phase",))
+_table_phase_seconds = _metrics.histogram("table_phase_seconds", "Duration of each step of harvesting a table.",
+                                          labelnames=("phase",))
+_tables_total = _metrics.counter("tables_total", "Tables by harvest status.", ("status",))
+_errors_total = _metrics.counter("mysql_errors_total", "MySQL errors by errno.", ("errno",))
+_phase_totals = {}  # phase -> seconds in the current run (reset by main)
+
+
+@contextmanager
+def _timed_phase(phase: str):
+    """Times one phase of the run for the metrics and the final summary."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _run_phase_seconds.observe(elapsed, phase)
+        _phase_totals[phase] = _phase_totals.get(phase, 0.0) + elapsed
+
+
+def _count_error(e: Error):
+    _errors_total.inc(str(getattr(e, "errno", None) or "unknown"))
+
+
+def report_run_metrics(elapsed: float, table_durations: dict):
+    """
+    Prints a timing summary of the run and writes the metrics file, if configured.
+    """
+    print(f"\n--- Run Timings ({elapsed:.1f}s total) ---")
+    for phase, seconds in _phase_totals.items():
+        print(f"  {phase:<12} {seconds:>8.2f}s")
+    slowest = sorted(table_durations.items(), key=lambda item: item[1], reverse=True)[:5]
+    if slowest:
+        print("  Slowest tables: " + ", ".join(f"`{table}` {seconds:.1f}s" for table, seconds in slowest))
+    if CONTEXT_METRICS_FILE:
+        try:
+            _metrics.write_prometheus_file(CONTEXT_METRICS_FILE)
+            print(f"  Metrics written to: {CONTEXT_METRICS_FILE}")
+        except OSError as e:
+            print(f"❌ Warning: Could not write metrics file: {e}")
 
 # =======================================================================
 # HELPER FUNCTIONS TO FETCH MYSQL METADATA
@@ -54,19 +138,31 @@ def get_accessible_tables(cursor):
     """)
     return [row[0] for row in cursor.fetchall()]
 
-def get_table_schema(cursor, table_name: str):
+def describe_table(cursor, table_name: str):
+    """Runs DESCRIBE once; the result is shared by the schema and the analysis."""
+    # DESCRIBE is a safe way to get schema info. Use backticks for safety.
+    cursor.execute(f"DESCRIBE `{table_name}`;")
+    # Result of DESCRIBE: (Field, Type, Null, Key, Default, Extra)
+    return [
+        tuple(value.decode() if isinstance(value, (bytes, bytearray)) else value for value in col)
+        for col in cursor.fetchall()
+    ]
+
+def get_table_schema(cursor, table_name: str, columns=None):
     """Retrieves the schema (columns and data types) for a specific table."""
     try:
-        # DESCRIBE is a safe way to get schema info. Use backticks for safety.
-        cursor.execute(f"DESCRIBE `{table_name}`;")
-        # Result of DESCRIBE: (Field, Type, Null, Key, Default, Extra)
-        return [f"`{col[0]}`: **{col[1].upper()}**" for col in cursor.fetchall()]
+        if columns is None:
+            columns = describe_table(cursor, table_name)
+        return [f"`{col[0]}`: **{col[1].upper()}**" for col in columns]
     except Error as e:
         print(f"    ❌ Error getting schema for table `{table_name}`: {e}")
         return [f"Error retrieving schema: {e}"]
 
-def get_sample_rows(cursor, table_name: str, limit: int = 3):
-    """Gets a few sample rows from the table and formats them as a Markdown table."""
+def get_sample_rows(cursor, table_name: str, limit: int = 3, errors: list = None):
+    """
+    Gets a few sample rows from the table and formats them as a Markdown table.
+    A MySQL error is returned as text and, if given, appended to `errors`.
+    """
     try:
         # Use backticks and parameterized limit to prevent SQL injection.
         query = f"SELECT * FROM `{table_name}` LIMIT %s;"
@@ -86,52 +182,494 @@ def get_sample_rows(cursor, table_name: str, limit: int = 3):
         return f"{header}\n{separator}\n{body}"
     except Error as e:
         print(f"    ❌ Warning: Could not retrieve samples for table `{table_name}`. Error: {e}")
+        if errors is not None:
+            errors.append(e)
         return f"Could not retrieve samples for table `{table_name}`. Details: {e}"
 
-def get_column_data_analysis(cursor, table_name: str):
-    """Performs basic data analysis on table columns for MySQL."""
+# =======================================================================
+# COLUMN PROFILING
+# =======================================================================
+
+NUMERIC_TYPES = ['int', 'bigint', 'decimal', 'float', 'double', 'tinyint', 'smallint', 'mediumint']
+TEXT_TYPES = ['char', 'varchar', 'text', 'enum']
+
+
+def _base_type(column_type: str) -> str:
+    """'int unsigned' -> 'int', "enum('print','paint')" -> 'enum', 'decimal(10,2)' -> 'decimal'."""
+    base = column_type.split('(')[0].split()
+    return base[0].lower() if base else ""
+
+
+class HyperLogLog:
+    """Fixed-memory approximate distinct counter (2**precision registers)."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add(self, value):
+        digest = hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).digest()
+        x = int.from_bytes(digest, "big")
+        index = x >> (64 - self.precision)
+        rest = (x << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = 1
+        while rank <= 64 - self.precision and not rest & (1 << 63):
+            rank += 1
+            rest <<= 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size ** 2 / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Small-range correction (linear counting).
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+
+def get_table_statistics(cursor, table_name: str) -> dict:
+    """
+    Reads the optimizer's statistics for a table: estimated row count and the
+    index cardinality of columns that lead an index (a good distinct estimate).
+    With CONTEXT_ANALYZE_TABLES=true, ANALYZE TABLE refreshes them first.
+    """
+    if CONTEXT_ANALYZE_TABLES:
+        try:
+            cursor.execute(f"ANALYZE TABLE `{table_name}`;")
+            cursor.fetchall()
+        except Error as e:
+            print(f"    ❌ Warning: ANALYZE TABLE failed for `{table_name}`: {e}")
+
+    cursor.execute(
+        "SELECT table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s;",
+        (table_name,),
+    )
+    row = cursor.fetchone()
+    cursor.fetchall()
+    cursor.execute(
+        "SELECT column_name, MAX(cardinality) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND seq_in_index = 1 "
+        "GROUP BY column_name;",
+        (table_name,),
+    )
+    cardinality = {name: int(value) for name, value in cursor.fetchall() if value is not None}
+    return {"row_estimate": int(row[0]) if row and row[0] is not None else None, "cardinality": cardinality}
+
+
+def _stream_rows(cursor, query: str):
+    """Yields rows of a query in batches, without materializing the result."""
+    cursor.execute(query)
+    while True:
+        batch = cursor.fetchmany(1000)
+        if not batch:
+            return
+        yield from batch
+
+
+def get_column_data_analysis(cursor, table_name: str, columns=None, errors: list = None):
+    """
+    Profiles every numeric and text column of a table with at most two statements:
+
+    - Small tables (up to CONTEXT_PROFILE_SAMPLE_ROWS) are read once and every
+      statistic is exact.
+    - Larger tables get MIN/MAX/AVG for all numeric columns from a single
+      aggregate statement (skipped above CONTEXT_FULL_SCAN_MAX_ROWS), and
+      distinct counts and top values from a bounded random sample. Distinct
+      counts come from index statistics when available, otherwise from a
+      HyperLogLog sketch of the sample.
+    - Tables without a row estimate, or with more rows than theirs, are
+      profiled from their first rows instead, so memory stays bounded by the
+      sample size either way.
+
+    Each line says whether its statistics are exact or estimated. MySQL errors
+    degrade the analysis instead of raising; they are appended to `errors` if given.
+    """
+    errors = [] if errors is None else errors
     analysis_lines = []
     try:
-        cursor.execute(f"DESCRIBE `{table_name}`;")
-        columns = cursor.fetchall()
+        if columns is None:
+            columns = describe_table(cursor, table_name)
+        stats = get_table_statistics(cursor, table_name)
     except Error as e:
         print(f"    ❌ Could not describe table `{table_name}` for analysis. Error: {e}")
+        errors.append(e)
         return [f"Could not analyze table. Error: {e}"]
 
-    for col_name, data_type, _, _, _, _ in columns:
-        safe_col_name = f"`{col_name}`"
-        safe_table_name = f"`{table_name}`"
+    # Numeric types are matched on the base type name: a substring match would
+    # take enum('print') or point for integers.
+    numeric = [col[0] for col in columns if _base_type(col[1]) in NUMERIC_TYPES]
+    text = [col[0] for col in columns if any(ttype in _base_type(col[1]) for ttype in TEXT_TYPES)]
+    profiled = numeric + [col for col in text if col not in numeric]
+    if not profiled:
+        return ["No specific column analysis was possible."]
+
+    safe_table_name = f"`{table_name}`"
+    select_list = ", ".join(f"`{col}`" for col in profiled)
+    row_estimate = stats["row_estimate"]
+    # Without a row estimate the table may be large: sample it.
+    sampled = row_estimate is None or row_estimate > CONTEXT_PROFILE_SAMPLE_ROWS
+
+    # 1. Stream the whole (small) table or a bounded random sample, once.
+    if sampled and row_estimate:
+        fraction = min(1.0, 1.2 * CONTEXT_PROFILE_SAMPLE_ROWS / row_estimate)
+        query = (f"SELECT {select_list} FROM {safe_table_name} "
+                 f"WHERE RAND() < {fraction:.8f} LIMIT {CONTEXT_PROFILE_SAMPLE_ROWS};")
+    elif sampled:
+        query = f"SELECT {select_list} FROM {safe_table_name} LIMIT {CONTEXT_PROFILE_SAMPLE_ROWS};"
+    else:
+        # One row past the sample size catches stale statistics of a grown table,
+        # so the exact sets below never hold more than a sample's worth of values.
+        query = f"SELECT {select_list} FROM {safe_table_name} LIMIT {CONTEXT_PROFILE_SAMPLE_ROWS + 1};"
+
+    sketches = {col: HyperLogLog() for col in profiled}
+    exact_distinct = {col: set() for col in profiled} if not sampled else None
+    counters = {col: collections.Counter() for col in text}
+    totals = {col: [None, None, 0.0, 0] for col in numeric}  # min, max, sum, count
+    unprofiled = {}  # Numeric column -> why its values couldn't be aggregated
+    rows_read = 0
+    try:
+        for row in _stream_rows(cursor, query):
+            rows_read += 1
+            for col, value in zip(profiled, row):
+                if value is None:
+                    continue
+                if exact_distinct is not None:
+                    exact_distinct[col].add(value)
+                else:
+                    sketches[col].add(value)
+                if col in counters:
+                    counters[col][value] += 1
+                if col in totals:
+                    total = totals[col]
+                    try:
+                        total[2] += float(value)
+                        total[0] = value if total[0] is None or value < total[0] else total[0]
+                        total[1] = value if total[1] is None or value > total[1] else total[1]
+                    except (TypeError, ValueError) as e:
+                        # One bad column must not fail the table (or the run).
+                        unprofiled[col] = f"{type(e).__name__}: {e}"
+                        del totals[col]
+                        continue
+                    total[3] += 1
+    except Error as e:
+        print(f"    ❌ Warning: Could not profile table `{table_name}`. Error: {e}")
+        errors.append(e)
+        return [f"Could not analyze table. Error: {e}"]
+    if not sampled and rows_read > CONTEXT_PROFILE_SAMPLE_ROWS:
+        # The statistics undercounted the table: what was read is a sample.
+        sampled = True
+        for col, values in exact_distinct.items():
+            for value in values:
+                sketches[col].add(value)
+        exact_distinct = None
+
+    # 2. Exact numeric aggregates for all numeric columns in one statement.
+    exact_numeric = not sampled
+    if sampled and numeric and row_estimate is not None and row_estimate <= CONTEXT_FULL_SCAN_MAX_ROWS:
+        aggregates = ", ".join(f"MIN(`{col}`), MAX(`{col}`), AVG(`{col}`)" for col in numeric)
+        try:
+            cursor.execute(f"SELECT {aggregates} FROM {safe_table_name};")
+            values = cursor.fetchone()
+            cursor.fetchall()
+            for i, col in enumerate(numeric):
+                min_val, max_val, avg_val = values[3 * i:3 * i + 3]
+                # Stored as (min, max, sum, count) with count=1 so sum/count is the AVG.
+                totals[col] = [min_val, max_val, float(avg_val or 0), 1 if avg_val is not None else 0]
+            exact_numeric = True
+        except Error as e:
+            print(f"    ❌ Warning: Aggregates failed for `{table_name}`, using the sample. Error: {e}")
+            errors.append(e)
+
+    def distinct_for(col):
+        if exact_distinct is not None:
+            return len(exact_distinct[col]), "exact"
+        if col in stats["cardinality"]:
+            return stats["cardinality"][col], "estimated from index statistics"
+        estimate = sketches[col].count()
+        if rows_read and estimate >= 0.95 * rows_read:
+            # (Nearly) unique within the sample: assume unique in the table.
+            return max(row_estimate or 0, rows_read), "estimated, column looks unique"
+        return estimate, f"estimated from a {rows_read:,}-row sample"
+
+    sample_note = "exact" if not sampled else f"estimated from a {rows_read:,}-row sample"
+    for col in profiled:
+        distinct_count, distinct_note = distinct_for(col)
+        if col in unprofiled:
+            print(f"    ❌ Warning: Could not profile column `{table_name}`.`{col}`: {unprofiled[col]}")
+            analysis_lines.append(
+                f"- **{col}**: Numeric. Values could not be profiled. "
+                f"Distinct Values=`{distinct_count}` ({distinct_note})"
+            )
+        elif col in totals:
+            min_val, max_val, total, count = totals[col]
+            if count and min_val is not None:
+                avg_val = total / count
+                range_note = "exact" if exact_numeric else sample_note
+                analysis_lines.append(
+                    f"- **{col}**: Numeric. MIN=`{min_val}`, MAX=`{max_val}`, AVG=`{avg_val:.2f}` ({range_note}), "
+                    f"Distinct Values=`{distinct_count}` ({distinct_note})"
+                )
+        else:
+            if distinct_count:
+                top_values = ', '.join(f'`{value}`' for value, _ in counters[col].most_common(5))
+                analysis_lines.append(
+                    f"- **{col}**: Text. Distinct Values=`{distinct_count}` ({distinct_note}). "
+                    f"Top values ({sample_note}): {top_values}"
+                )
 
-        # Analysis for numeric types
-        numeric_types = ['int', 'bigint', 'decimal', 'float', 'double', 'tinyint', 'smallint']
-        if any(ntype in data_type.lower() for ntype in numeric_types):
-            try:
-                query = f"SELECT MIN({safe_col_name}), MAX({safe_col_name}), AVG({safe_col_name}), COUNT(DISTINCT {safe_col_name}) FROM {safe_table_name};"
-                cursor.execute(query)
-                min_val, max_val, avg_val, distinct_count = cursor.fetchone()
-                if all(v is not None for v in [min_val, max_val, avg_val]):
-                     analysis_lines.append(f"- **{col_name}**: Numeric. MIN=`{min_val}`, MAX=`{max_val}`, AVG=`{avg_val:.2f}`, Distinct Values=`{distinct_count}`")
-            except Error:
-                pass  # Ignore columns that can't be aggregated
+    return analysis_lines if analysis_lines else ["No specific column analysis was possible."]
 
-        # Analysis for text/char types
-        text_types = ['char', 'varchar', 'text', 'enum']
-        if any(ttype in data_type.lower() for ttype in text_types):
+
+# =======================================================================
+# PARALLEL TABLE HARVESTING
+# =======================================================================
+
+class TableHarvester:
+    """
+    Processes tables on a bounded pool of worker threads, each with its own
+    MySQL connection. A table running longer than the per-table timeout has its
+    worker connection killed (the worker reconnects for its next table) and is
+    reported as timed out.
+    """
+
+    def __init__(self, db_params: dict, workers: int = CONTEXT_WORKERS,
+                 table_timeout: float = CONTEXT_TABLE_TIMEOUT_SECONDS):
+        self.db_params = db_params
+        self.workers = max(1, workers)
+        self.table_timeout = table_timeout
+        self._local = threading.local()
+        self._connections = []
+        self._running = {}  # table -> (connection_id, started_at)
+        self._timed_out = set()
+        self._lock = threading.Lock()
+        self.failed = set()  # Tables whose results should not be cached.
+        self.durations = {}  # table -> seconds spent harvesting it
+
+    def _cursor(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or not connection.is_connected():
+            connection = mysql.connector.connect(**self.db_params)
+            disable_statistics_cache(connection)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection.cursor()
+
+    def process_table(self, table: str):
+        """Collects schema, samples and analysis for one table (runs on a worker)."""
+        started = time.monotonic()
+        cursor = self._cursor()
+        with self._lock:
+            self._running[table] = (self._local.connection.connection_id, started)
+        errors = []  # MySQL errors the steps turned into text in the context.
+        try:
+            step = time.perf_counter()
+            try:
+                columns = describe_table(cursor, table)
+                schema = get_table_schema(cursor, table, columns)
+            except Error as e:
+                print(f"    ❌ Error getting schema for table `{table}`: {e}")
+                errors.append(e)
+                columns, schema = None, [f"Error retrieving schema: {e}"]
+            step = self._lap("schema", step)
+            examples = get_sample_rows(cursor, table, errors=errors)
+            step = self._lap("samples", step)
+            if columns is None:
+                analysis = ["Could not analyze table."]
+            else:
+                analysis = get_column_data_analysis(cursor, table, columns, errors=errors)
+            self._lap("analysis", step)
+        finally:
             try:
-                cursor.execute(f"SELECT COUNT(DISTINCT {safe_col_name}) FROM {safe_table_name} WHERE {safe_col_name} IS NOT NULL;")
-                distinct_count = cursor.fetchone()[0]
-
-                cursor.execute(f"""
-                    SELECT {safe_col_name} FROM {safe_table_name} WHERE {safe_col_name} IS NOT NULL
-                    GROUP BY {safe_col_name} ORDER BY COUNT(*) DESC LIMIT 5;
-                """)
-                top_values = ', '.join([f'`{row[0]}`' for row in cursor.fetchall()])
-                if distinct_count > 0:
-                    analysis_lines.append(f"- **{col_name}**: Text. Distinct Values=`{distinct_count}`. Top values: {top_values}")
+                cursor.close()
             except Error:
-                pass # Ignore errors on complex text fields
+                pass  # The connection was killed by the timeout.
+            with self._lock:
+                self._running.pop(table, None)
+                self.durations[table] = time.monotonic() - started
+        for e in errors:
+            _count_error(e)
+        if table in self._timed_out:
+            self.failed.add(table)
+            _tables_total.inc("timed_out")
+            return (
+                schema,
+                f"Samples skipped: table `{table}` exceeded the {self.table_timeout:.0f}s timeout.",
+                [f"Analysis skipped: table `{table}` exceeded the {self.table_timeout:.0f}s timeout."],
+            )
+        if errors:
+            # Degraded output is used for this run but not cached as current.
+            self.failed.add(table)
+            _tables_total.inc("degraded")
+        else:
+            _tables_total.inc("processed")
+        return schema, examples, analysis
+
+    @staticmethod
+    def _lap(phase: str, since: float) -> float:
+        now = time.perf_counter()
+        _table_phase_seconds.observe(now - since, phase)
+        return now
+
+    def _enforce_timeouts(self, kill_cursor):
+        now = time.monotonic()
+        with self._lock:
+            overdue = [
+                (table, running) for table, running in self._running.items()
+                if table not in self._timed_out and now - running[1] > self.table_timeout
+            ]
+        for table, running in overdue:
+            # The lock is held from the re-check through the KILL: a worker that
+            # finished the table in the meantime may already be running its next
+            # table on the same connection, which must not be killed.
+            with self._lock:
+                if self._running.get(table) != running:
+                    continue
+                self._timed_out.add(table)
+                print(f"    ⏱️  Table `{table}` exceeded {self.table_timeout:.0f}s; cancelling it.")
+                try:
+                    # Killing the whole connection (not just the query) makes the
+                    # remaining per-column queries of this table fail fast.
+                    kill_cursor.execute(f"KILL {int(running[0])}")
+                except Error as e:
+                    print(f"    ❌ Could not cancel query for table `{table}`: {e}")
+
+    def run(self, tables: list, kill_cursor) -> dict:
+        """
+        Processes every table and returns {table: (schema, examples, analysis)}
+        in the same order as `tables`, regardless of completion order.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="harvest") as executor:
+            futures = {executor.submit(self.process_table, table): table for table in tables}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = futures[future]
+                    try:
+                        results[table] = future.result()
+                    except Exception as e:
+                        # Not only MySQL errors: a bug in profiling one table must
+                        # not lose the work done on every other table.
+                        print(f"    ❌ Error processing table `{table}`: {e}")
+                        _count_error(e)
+                        _tables_total.inc("failed")
+                        self.failed.add(table)
+                        results[table] = (
+                            [f"Error retrieving schema: {e}"],
+                            f"Could not retrieve samples for table `{table}`. Details: {e}",
+                            [f"Could not analyze table. Error: {e}"],
+                        )
+                    print(f"  ({len(results)}/{len(tables)}) Processed table: `{table}`")
+                if self.table_timeout > 0:
+                    self._enforce_timeouts(kill_cursor)
+        for connection in self._connections:
+            if connection.is_connected():
+                connection.close()
+        return {table: results[table] for table in tables}
 
-    return analysis_lines if analysis_lines else ["No specific column analysis was possible."]
+
+# =======================================================================
+# INCREMENTAL REGENERATION (FINGERPRINTS AND CACHE)
+# =======================================================================
+
+def disable_statistics_cache(connection):
+    """
+    Makes information_schema.tables report current TABLE_ROWS and UPDATE_TIME:
+    MySQL 8 otherwise serves them from a cache refreshed every 24 hours
+    (information_schema_stats_expiry), which would hide changes from the
+    fingerprints and row estimates.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION information_schema_stats_expiry = 0;")
+    except Error:
+        pass  # MySQL 5.7 and MariaDB don't cache these statistics.
+    finally:
+        cursor.close()
+
+def _round_estimate(value):
+    """Keeps two significant digits of a row estimate, which InnoDB re-samples constantly."""
+    if not value:
+        return 0
+    value = int(value)
+    magnitude = 10 ** max(0, len(str(value)) - 2)
+    return value // magnitude * magnitude
+
+def get_table_fingerprints(cursor) -> dict:
+    """
+    Computes a fingerprint per table from its column definitions, rounded row
+    estimate and UPDATE_TIME, with two information_schema queries in total.
+    """
+    cursor.execute("""
+        SELECT table_name, column_name, column_type, is_nullable, column_key,
+               column_default, extra
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+        ORDER BY table_name, ordinal_position;
+    """)
+    definitions = collections.defaultdict(list)
+    for row in cursor.fetchall():
+        definitions[row[0]].append([str(value) for value in row[1:]])
+
+    cursor.execute("""
+        SELECT table_name, table_rows, update_time
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_type = 'BASE TABLE';
+    """)
+    fingerprints = {}
+    for table, table_rows, update_time in cursor.fetchall():
+        material = json.dumps(
+            [definitions.get(table, []), _round_estimate(table_rows), str(update_time)],
+            separators=(",", ":"),
+        )
+        fingerprints[table] = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    return fingerprints
+
+def cached_table(cache: dict, table: str):
+    """Returns the cached output of a table, or None if the cache has no complete entry for it."""
+    entry = cache["tables"].get(table)
+    if isinstance(entry, dict) and all(key in entry for key in ("schema", "examples", "analysis")):
+        return entry
+    return None
+
+def tables_to_process(tables: list, cache: dict, fingerprints: dict, selected_tables=()) -> list:
+    """
+    Returns the tables to harvest: selected ones, changed ones and any without
+    a complete cache entry (a cache written before the table existed, or by
+    another run), in the order of `tables`.
+    """
+    stale = []
+    for table in tables:
+        entry = cached_table(cache, table)
+        if table in selected_tables or entry is None or entry.get("fingerprint") != fingerprints.get(table):
+            stale.append(table)
+    return stale
+
+def load_context_cache(path: str = CACHE_FILENAME) -> dict:
+    """Loads the per-table cache of a previous run (empty if missing or unreadable)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        cache.setdefault("tables", {})
+        return cache
+    except (IOError, ValueError):
+        return {"tables": {}}
+
+def save_context_cache(cache: dict, path: str = CACHE_FILENAME):
+    """Writes the cache atomically so an interrupted run never corrupts it."""
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+    except IOError as e:
+        print(f"❌ Warning: Could not save context cache: {e}")
 
 
 # =======================================================================
@@ -182,11 +720,30 @@ CRITICAL INSTRUCTIONS:
 # =======================================================================
 # MAIN ORCHESTRATION FUNCTION
 # =======================================================================
-def main():
+def main(force: bool = False, selected_tables=None):
     """
     Connects to MySQL, analyzes its metadata, uses Gemini to build a final prompt,
     and writes it to a text file.
+
+    Only tables whose fingerprint changed since the previous run are profiled,
+    and Gemini is skipped when the assembled database context is unchanged.
+    Timings of the run are printed at the end (and exported, see CONTEXT_METRICS_FILE).
+
+    Args:
+        force (bool): Re-profile every table and always call Gemini.
+        selected_tables (list): Tables to re-profile regardless of their fingerprint.
     """
+    started = time.perf_counter()
+    table_durations = {}
+    _phase_totals.clear()  # The summary covers this run only, even when main is called again.
+    try:
+        _generate(force, selected_tables, table_durations)
+    finally:
+        report_run_metrics(time.perf_counter() - started, table_durations)
+
+
+def _generate(force: bool, selected_tables, table_durations: dict):
+    """The body of `main`; harvest times per table are added to `table_durations`."""
     db_params = {
         'host': MYSQL_HOST, 'database': MYSQL_DATABASE,
         'user': MYSQL_USER, 'password': MYSQL_PASSWORD
@@ -197,25 +754,63 @@ def main():
 
     print("--- Starting MySQL Database Analysis ---")
     db_context = {"schema": {}, "examples": {}, "analysis": {}}
+    cache = {"tables": {}} if force else load_context_cache()
+    selected_tables = set(selected_tables or [])
     connection = None
     try:
-        connection = mysql.connector.connect(**db_params)
-        cursor = connection.cursor()
+        with _timed_phase("connect"):
+            connection = mysql.connector.connect(**db_params)
+            disable_statistics_cache(connection)
+            cursor = connection.cursor()
         print(f"✅ Successfully connected to MySQL database '{MYSQL_DATABASE}'.")
         
-        tables = get_accessible_tables(cursor)
+        with _timed_phase("list_tables"):
+            tables = get_accessible_tables(cursor)
         if not tables:
             print("❌ No tables specified or found. Exiting.")
             return
-
-        for i, table in enumerate(tables):
-            print(f"  ({i+1}/{len(tables)}) Processing table: `{table}`")
-            db_context["schema"][table] = get_table_schema(cursor, table)
-            db_context["examples"][table] = get_sample_rows(cursor, table)
-            db_context["analysis"][table] = get_column_data_analysis(cursor, table)
+        unknown = selected_tables.difference(tables)
+        if unknown:
+            print(f"❌ Warning: Ignoring unknown tables: {', '.join(sorted(unknown))}")
+
+        with _timed_phase("fingerprints"):
+            fingerprints = get_table_fingerprints(cursor)
+        stale = tables_to_process(tables, cache, fingerprints, selected_tables)
+        print(f"  {len(tables) - len(stale)} tables unchanged since the last run; {len(stale)} to process.")
+        _tables_total.inc("cached", amount=len(tables) - len(stale))
+
+        harvester = TableHarvester(db_params)
+        if stale:
+            print(f"  Processing {len(stale)} tables with {min(CONTEXT_WORKERS, len(stale))} workers...")
+            started = time.monotonic()
+            with _timed_phase("harvest"):
+                harvested = harvester.run(stale, cursor)
+            table_durations.update(harvester.durations)
+            print(f"  Harvested {len(stale)} tables in {time.monotonic() - started:.1f}s.")
+        else:
+            harvested = {}
+
+        tables_cache = {}
+        for table in tables:
+            if table in harvested:
+                schema, examples, analysis = harvested[table]
+                tables_cache[table] = {
+                    # Failed, timed-out or degraded tables get no fingerprint, so
+                    # the next run retries them.
+                    "fingerprint": None if table in harvester.failed else fingerprints.get(table),
+                    "schema": schema, "examples": examples, "analysis": analysis,
+                }
+            else:
+                tables_cache[table] = cached_table(cache, table)
+            db_context["schema"][table] = tables_cache[table]["schema"]
+            db_context["examples"][table] = tables_cache[table]["examples"]
+            db_context["analysis"][table] = tables_cache[table]["analysis"]
+        cache["tables"] = tables_cache
+        save_context_cache(cache)
 
     except Error as e:
         print(f"\n❌ Database Error: {e}")
+        _count_error(e)
         return
     finally:
         if connection and connection.is_connected():
@@ -242,8 +837,21 @@ def main():
     
     database_context_for_gemini = "\n".join(info_lines)
 
-    # Use Gemini to generate the final prompt content
-    final_prompt_content = generate_enhanced_prompt_with_gemini(database_context_for_gemini)
+    # Reuse the previous Gemini output when nothing it was built from changed.
+    context_hash = hashlib.sha256(
+        f"{LLM_MODEL}\n{database_context_for_gemini}".encode("utf-8")
+    ).hexdigest()
+    if not force and cache.get("context_hash") == context_hash and cache.get("output"):
+        print("\n✅ Database context unchanged; reusing the previous Gemini output.")
+        final_prompt_content = cache["output"]
+    else:
+        # Use Gemini to generate the final prompt content
+        with _timed_phase("gemini"):
+            final_prompt_content = generate_enhanced_prompt_with_gemini(database_context_for_gemini)
+        if final_prompt_content:
+            cache["context_hash"] = context_hash
+            cache["output"] = final_prompt_content
+            save_context_cache(cache)
 
     if not final_prompt_content:
         print("\n❌ Prompt generation failed. No file will be written.")
@@ -251,11 +859,17 @@ def main():
 
     # Write the result to the output file
     try:
-        with open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
+        with _timed_phase("write"), open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
             f.write(final_prompt_content)
         print(f"\n✅ Success! Prompt saved to: **{OUTPUT_FILENAME}**")
     except IOError as e:
         print(f"\n❌ Error saving file: {e}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the MySQL context file used by the agent prompt.")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-profile every table and call Gemini even if nothing changed.")
+    parser.add_argument("--tables", default="",
+                        help="Comma-separated tables to re-profile regardless of their fingerprint.")
+    args = parser.parse_args()
+    main(force=args.force, selected_tables=[t.strip() for t in args.tables.split(",") if t.strip()])
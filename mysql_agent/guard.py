@@ -0,0 +1,153 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# guard.py
+# Pre-flight cost check of model-generated SQL using EXPLAIN FORMAT=JSON.
+import json
+
+
+def explain_plan(connection, sql: str) -> dict:
+    """
+    Runs `EXPLAIN FORMAT=JSON` for a statement and summarizes the plan.
+
+    Args:
+        connection: An open MySQL connection.
+        sql (str): The statement that is about to be executed.
+
+    Returns:
+        dict: 'estimated_rows_examined', 'estimated_cost' (None if the server
+              doesn't report it) and 'tables', a list of per-table access info.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN FORMAT=JSON {sql}")
+        plan = json.loads(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+    tables = []
+    examined = _walk(plan, tables)
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    return {
+        "estimated_rows_examined": int(examined),
+        "estimated_cost": float(cost) if cost is not None else None,
+        "tables": tables,
+    }
+
+
+def _table_entry(table: dict, prefix: float, tables: list):
+    """Records one plan table and returns (rows examined, rows produced)."""
+    # MySQL reports rows_examined_per_scan / rows_produced_per_join (cumulative);
+    # MariaDB reports rows / filtered.
+    per_scan = float(table.get("rows_examined_per_scan", table.get("rows", 0)) or 0)
+    produced = table.get("rows_produced_per_join")
+    if produced is None:
+        produced = prefix * per_scan * float(table.get("filtered", 100) or 100) / 100
+    tables.append({
+        "table": table.get("table_name"),
+        "access_type": table.get("access_type"),
+        "key": table.get("key"),
+        "rows_per_scan": int(per_scan),
+        "join_buffer": bool(table.get("using_join_buffer") or "block-nl-join" in table),
+    })
+    return prefix * per_scan, float(produced)
+
+
+def _walk(node, tables: list) -> float:
+    """Sums the estimated rows examined by every table access under `node`."""
+    examined = 0.0
+    if isinstance(node, list):
+        for item in node:
+            examined += _walk(item, tables)
+        return examined
+    if not isinstance(node, dict):
+        return examined
+
+    for key, value in node.items():
+        if key == "nested_loop" and isinstance(value, list):
+            prefix = 1.0
+            for item in value:
+                table = item.get("table") if isinstance(item, dict) else None
+                if table is None:
+                    examined += _walk(item, tables)
+                    continue
+                rows, prefix = _table_entry(table, prefix, tables)
+                examined += rows + _walk(table, tables)
+        elif key == "table" and isinstance(value, dict):
+            rows, _ = _table_entry(value, 1.0, tables)
+            examined += rows + _walk(value, tables)
+        elif isinstance(value, (dict, list)):
+            examined += _walk(value, tables)
+    return examined
+
+
+def check_plan(connection, summary: dict, max_rows_examined: int, max_cost: float):
+    """
+    Compares a plan summary against the configured thresholds.
+
+    Returns:
+        dict or None: A structured rejection (reason plus concrete suggestions the
+                      model can act on), or None if the query may run.
+    """
+    reasons = []
+    if max_rows_examined and summary["estimated_rows_examined"] > max_rows_examined:
+        reasons.append(
+            f"estimated rows examined {summary['estimated_rows_examined']:,} exceeds the limit of {max_rows_examined:,}"
+        )
+    if max_cost and summary["estimated_cost"] is not None and summary["estimated_cost"] > max_cost:
+        reasons.append(f"estimated cost {summary['estimated_cost']:,.0f} exceeds the limit of {max_cost:,.0f}")
+    if not reasons:
+        return None
+
+    suggestions = []
+    for table in summary["tables"]:
+        name = table["table"]
+        if not name or name.startswith("<"):
+            continue  # Derived tables / temporary results.
+        if table["join_buffer"]:
+            suggestions.append(
+                f"`{name}` is joined through a join buffer (no index is used for the join); "
+                f"join `{name}` to the other tables with an ON condition on its key columns."
+            )
+        if table["access_type"] == "ALL" and table["rows_per_scan"] > 1000:
+            columns = _indexed_columns(connection, name)
+            hint = f" such as {', '.join(f'`{column}`' for column in columns[:3])}" if columns else ""
+            suggestions.append(
+                f"`{name}` is fully scanned (~{table['rows_per_scan']:,} rows); "
+                f"add a WHERE condition on an indexed column{hint}."
+            )
+    suggestions.append("Aggregate (GROUP BY) or filter to a narrower range (e.g. a single season or race) to reduce the rows examined.")
+
+    return {
+        "error": "Query rejected by the cost guard: " + "; ".join(reasons) + ".",
+        "estimated_rows_examined": summary["estimated_rows_examined"],
+        "estimated_cost": summary["estimated_cost"],
+        "suggestions": suggestions,
+    }
+
+
+def _indexed_columns(connection, table_name: str) -> list:
+    """Returns the leading columns of the table's indexes (best effort)."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT DISTINCT column_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND seq_in_index = 1",
+            (table_name,),
+        )
+        return [row[0] for row in cursor.fetchall()]
+    except Exception:
+        return []
+    finally:
+        cursor.close()
@@ -0,0 +1,396 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# metrics.py
+# Dependency-free counters and histograms with Prometheus text export (file or
+# HTTP endpoint), optional OpenTelemetry spans/metrics, and a slow-query log.
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+# Latency buckets in seconds, and size buckets for rows / bytes.
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000, 1_000_000)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+slow_query_logger = logging.getLogger("mysql_agent.slow_query")
+
+
+# =======================================================================
+# METRIC TYPES
+# =======================================================================
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, as in Prometheus."""
+
+    def __init__(self, name: str, documentation: str, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        out = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                out.append((self.name + "_bucket", labels + (("le", _format_number(bound)),), cumulative))
+            out.append((self.name + "_bucket", labels + (("le", "+Inf"),), series[-1]))
+            out.append((self.name + "_sum", labels, series[-2]))
+            out.append((self.name + "_count", labels, series[-1]))
+        return out
+
+    def quantile(self, q: float, *labels) -> float:
+        """Upper bucket bound containing the q-quantile (for quick summaries)."""
+        with self._lock:
+            series = self._series.get(labels)
+            if not series or not series[-1]:
+                return 0.0
+            target, cumulative = q * series[-1], 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+        return float("inf")
+
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# =======================================================================
+# REGISTRY AND EXPORT
+# =======================================================================
+
+class MetricsRegistry:
+    """Holds metrics and collectors, and renders them in Prometheus text format."""
+
+    def __init__(self, namespace: str = "mysql_agent"):
+        self.namespace = namespace
+        self._metrics = []
+        self._collectors = []  # callables returning [(name, help, type, [(labels dict, value)])]
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(f"{self.namespace}_{name}", documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets=SECONDS_BUCKETS, labelnames=()) -> Histogram:
+        metric = Histogram(f"{self.namespace}_{name}", documentation, buckets, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """Adds a callable producing gauge values at export time (e.g. pool stats)."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render_prometheus(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        for metric in metrics:
+            kind = "histogram" if isinstance(metric, Histogram) else "counter"
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for name, labels, value in metric.samples():
+                pairs = list(zip(metric.labelnames, labels[:len(metric.labelnames)])) + list(labels[len(metric.labelnames):])
+                lines.append(f"{name}{_render_labels(pairs)} {_format_number(value)}")
+        for collect in collectors:
+            try:
+                families = collect()
+            except Exception:
+                continue  # A broken collector must not break the endpoint.
+            for name, documentation, kind, samples in families:
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {documentation}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_render_labels(sorted(labels.items()))} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str):
+        """Writes the metrics to `path` atomically (e.g. for node_exporter's textfile collector)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_file_writer(self, path: str, interval: float = 15.0):
+        """Rewrites the metrics file every `interval` seconds from a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_prometheus_file(path)
+                except OSError as e:
+                    logging.getLogger(__name__).warning("Could not write metrics file %s: %s", path, e)
+        threading.Thread(target=loop, name="metrics_file", daemon=True).start()
+
+    def start_http_server(self, port: int, host: str = "0.0.0.0"):
+        """Serves the metrics at http://host:port/metrics from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics_http", daemon=True).start()
+        return server
+
+
+def _render_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+
+# =======================================================================
+# PER-CALL RECORDING
+# =======================================================================
+
+class CallRecorder:
+    """
+    Times the phases of one tool call. `lap(phase)` attributes the time since
+    the previous lap to `phase`; `finish(response)` records everything at once.
+    """
+
+    __slots__ = ("instruments", "tool", "sql", "start", "_last", "phases", "outcome", "errno", "_wall_start")
+
+    def __init__(self, instruments, tool: str, sql: str):
+        self.instruments = instruments
+        self.tool = tool
+        self.sql = sql
+        self.start = self._last = time.perf_counter()
+        self._wall_start = time.time_ns()
+        self.phases = {}
+        self.outcome = None  # Set for outcomes the response can't tell apart ("rejected", "timeout", ...).
+        self.errno = None
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self, response: dict):
+        self.instruments.record(self, response, time.perf_counter() - self.start)
+
+
+class _NullRecorder:
+    """Stand-in used when instrumentation is disabled: every method is a no-op."""
+
+    __slots__ = ()
+
+    def lap(self, phase: str):
+        pass
+
+    def finish(self, response: dict):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_RECORDER = _NullRecorder()
+
+
+class ToolInstruments:
+    """
+    The metrics of the SQL tools, plus the optional OpenTelemetry and slow-query
+    outputs. `recorder()` returns NULL_RECORDER when all of them are disabled,
+    so the hot path then costs a single attribute check per phase.
+    """
+
+    def __init__(self, registry: MetricsRegistry = None, slow_query_seconds: float = 0,
+                 slow_query_log: str = "", otel: bool = False):
+        self.registry = registry
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_query_log = slow_query_log
+        self._slow_lock = threading.Lock()
+        self._tracer = self._otel_histogram = None
+        if otel:
+            self._setup_otel()
+        self.enabled = bool(registry or slow_query_seconds > 0 or self._tracer)
+
+        if registry is not None:
+            self.calls = registry.counter("tool_calls_total", "Tool calls by outcome.", ("tool", "outcome"))
+            self.duration = registry.histogram("tool_duration_seconds", "End-to-end tool call latency.",
+                                               labelnames=("tool",))
+            self.phase_duration = registry.histogram("tool_phase_seconds", "Latency of each tool call phase.",
+                                                     labelnames=("tool", "phase"))
+            self.rows = registry.histogram("result_rows", "Rows read per call.", ROWS_BUCKETS, ("tool",))
+            self.bytes = registry.histogram("result_bytes", "Characters of result text returned per call.",
+                                            BYTES_BUCKETS, ("tool",))
+            self.rows_total = registry.counter("result_rows_total", "Rows read from MySQL.", ("tool",))
+            self.bytes_total = registry.counter("result_bytes_total", "Characters of result text returned.", ("tool",))
+            self.errors = registry.counter("mysql_errors_total", "MySQL errors by errno.", ("tool", "errno"))
+
+    def _setup_otel(self):
+        try:
+            from opentelemetry import metrics as otel_metrics
+            from opentelemetry import trace
+        except ImportError:
+            logging.getLogger(__name__).warning(
+                "MYSQL_METRICS_OTEL is set but the 'opentelemetry-api' package is not installed."
+            )
+            return
+        self._tracer = trace.get_tracer("mysql_agent")
+        self._otel_histogram = otel_metrics.get_meter("mysql_agent").create_histogram(
+            "mysql_agent.tool.phase.duration", unit="s", description="Latency of each tool call phase."
+        )
+
+    def recorder(self, tool: str, sql: str):
+        return CallRecorder(self, tool, sql) if self.enabled else NULL_RECORDER
+
+    def record(self, recorder: CallRecorder, response: dict, elapsed: float):
+        metadata = response.get("metadata") or {}
+        if "error" in response:
+            outcome = recorder.outcome or "error"
+        else:
+            outcome = "cache_hit" if metadata.get("cache") == "hit" else "ok"
+        rows = metadata.get("rows_read", 0)
+        text = response.get("results_markdown", response.get("results"))
+        size = len(text) if isinstance(text, str) else 0
+        tool = recorder.tool
+
+        if self.registry is not None:
+            self.calls.inc(tool, outcome)
+            self.duration.observe(elapsed, tool)
+            for phase, seconds in recorder.phases.items():
+                self.phase_duration.observe(seconds, tool, phase)
+            if outcome in ("ok", "cache_hit"):
+                self.rows.observe(rows, tool)
+                self.bytes.observe(size, tool)
+                self.rows_total.inc(tool, amount=rows)
+                self.bytes_total.inc(tool, amount=size)
+            if recorder.errno is not None:
+                self.errors.inc(tool, str(recorder.errno))
+
+        if self._tracer is not None:
+            self._export_span(recorder, outcome, rows, elapsed)
+
+        if self.slow_query_seconds > 0 and elapsed >= self.slow_query_seconds:
+            self._log_slow_query(recorder, response, outcome, rows, elapsed)
+
+    def _export_span(self, recorder: CallRecorder, outcome: str, rows: int, elapsed: float):
+        # Spans are created after the fact from the recorded timings, so the
+        # hot path never touches the OpenTelemetry API.
+        start_ns = recorder._wall_start
+        span = self._tracer.start_span(recorder.tool, start_time=start_ns, attributes={
+            "db.system": "mysql", "db.statement": recorder.sql, "mysql_agent.outcome": outcome,
+            "mysql_agent.rows_read": rows,
+        })
+        offset = start_ns
+        for phase, seconds in recorder.phases.items():
+            duration_ns = int(seconds * 1e9)
+            child = self._tracer.start_span(f"{recorder.tool}.{phase}", start_time=offset,
+                                            context=_span_context(span))
+            child.end(end_time=offset + duration_ns)
+            offset += duration_ns
+            self._otel_histogram.record(seconds, {"tool": recorder.tool, "phase": phase})
+        span.end(end_time=start_ns + int(elapsed * 1e9))
+
+    def _log_slow_query(self, recorder: CallRecorder, response: dict, outcome: str, rows: int, elapsed: float):
+        metadata = response.get("metadata") or {}
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+            "tool": recorder.tool,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "outcome": outcome,
+            "errno": recorder.errno,
+            "sql": recorder.sql,
+            "sql_executed": metadata.get("sql_executed"),
+            "rows_read": rows,
+            "plan": {
+                key: metadata.get(key, response.get(key))
+                for key in ("estimated_rows_examined", "estimated_cost")
+                if metadata.get(key, response.get(key)) is not None
+            },
+            "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in recorder.phases.items()},
+        }
+        line = json.dumps(entry, default=str)
+        if self.slow_query_log:
+            with self._slow_lock:
+                try:
+                    with open(self.slow_query_log, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                    return
+                except OSError:
+                    pass  # Fall back to the logger below.
+        slow_query_logger.warning(line)
+
+
+def _span_context(span):
+    from opentelemetry import trace
+    return trace.set_span_in_context(span)
@@ -0,0 +1,214 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pool.py
+# A small, thread-safe connection pool shared by every tool call in the process.
+import collections
+import contextlib
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be borrowed within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    A lazily filled pool of MySQL connections.
+
+    Up to `pool_size` connections are kept open between calls. When they are all
+    in use, up to `max_overflow` extra connections may be opened and are closed
+    again as soon as they are returned. Idle connections older than
+    `recycle_seconds` are replaced, and every borrowed connection is pinged (with
+    reconnect) so that connections dropped by a server restart are healed
+    transparently.
+    """
+
+    def __init__(self, connect, pool_size: int = 5, max_overflow: int = 5,
+                 recycle_seconds: float = 1800, pool_timeout: float = 30):
+        """
+        Args:
+            connect (callable): Zero-argument factory returning a new connection.
+            pool_size (int): Number of connections kept open while idle.
+            max_overflow (int): Extra connections allowed above `pool_size` under load.
+            recycle_seconds (float): Idle connections older than this are reopened.
+            pool_timeout (float): Seconds to wait for a free connection before failing.
+        """
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.recycle_seconds = recycle_seconds
+        self.pool_timeout = pool_timeout
+
+        self._idle = collections.deque()  # (connection, created_at)
+        self._created_at = {}
+        self._open = 0
+        self._cond = threading.Condition()
+
+        # Counters exposed through stats() to help sizing the pool.
+        self._borrows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._reconnects = 0
+
+    # --- Borrow / return ---
+
+    def acquire(self):
+        """
+        Borrows a healthy connection from the pool.
+
+        Returns:
+            tuple: (connection, wait_seconds) where wait_seconds is the time spent
+                   waiting for a free slot in the pool.
+        """
+        start = time.monotonic()
+        deadline = start + self.pool_timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, created_at = self._idle.pop()
+                    break
+                if self._open < self.pool_size + self.max_overflow:
+                    connection, created_at = None, None
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.pool_timeout}s waiting for a MySQL connection "
+                        f"({self._open} connections in use)."
+                    )
+                self._cond.wait(remaining)
+            wait = time.monotonic() - start
+            self._borrows += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+        try:
+            if connection is not None and time.monotonic() - created_at > self.recycle_seconds:
+                self._close_quietly(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+                self._created_at[id(connection)] = time.monotonic()
+            else:
+                self._ping(connection)
+        except Exception:
+            if connection is not None:
+                self._close_quietly(connection)
+            self._forget()
+            raise
+        return connection, wait
+
+    def release(self, connection, discard: bool = False):
+        """
+        Returns a borrowed connection to the pool.
+
+        Args:
+            connection: A connection obtained from `acquire`.
+            discard (bool): Close the connection instead of keeping it, e.g. after
+                            a connection-level error left it in an unknown state.
+        """
+        if not discard:
+            try:
+                # End any implicit transaction so the next borrower starts clean.
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if not discard and len(self._idle) < self.pool_size:
+                created_at = self._created_at.get(id(connection), time.monotonic())
+                self._idle.append((connection, created_at))
+                self._cond.notify()
+                return
+        self._close_quietly(connection)
+        self._forget()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Context manager around acquire/release. Yields (connection, wait_seconds).
+        The connection is discarded if the block raises a connection-level error.
+        """
+        connection, wait = self.acquire()
+        discard = False
+        try:
+            yield connection, wait
+        except Exception as e:
+            discard = is_connection_error(e)
+            raise
+        finally:
+            self.release(connection, discard=discard)
+
+    def close(self):
+        """Closes every idle connection. Borrowed connections are closed on release."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+            self._forget()
+
+    def stats(self) -> dict:
+        """Returns counters describing pool usage and wait time."""
+        with self._cond:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "borrows": self._borrows,
+                "reconnects": self._reconnects,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / self._borrows, 3) if self._borrows else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    # --- Internal helpers ---
+
+    def _ping(self, connection):
+        """Health check on borrow; reconnects if the server dropped the session."""
+        try:
+            connection.ping(reconnect=False)
+        except Exception:
+            connection.ping(reconnect=True, attempts=2, delay=0)
+            with self._cond:
+                self._reconnects += 1
+
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _close_quietly(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+# Driver errno values meaning the session itself is gone (server restart, network drop).
+_CONNECTION_LOST_ERRNOS = {2006, 2013, 2055}
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Returns True if the error means the connection can no longer be reused."""
+    if getattr(error, "errno", None) in _CONNECTION_LOST_ERRNOS:
+        return True
+    # InterfaceError / OperationalError from mysql.connector without a query errno.
+    name = type(error).__name__
+    return name in ("InterfaceError", "OperationalError") and getattr(error, "errno", None) in (None, -1)
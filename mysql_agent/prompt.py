@@ -12,16 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-# This file builds the master prompt for the root MySQL agent, 
-# including the context generated by the generate_mysql_prompt.py file.
+# This file builds the master prompt for the root MySQL agent,
+# including the context generated by the generate_mysql_context.py file.
+# Nothing is read at import time: the context file is loaded, and the prompt
+# built, once on first use.
 
+import logging
 import os
 
-def _load_mysql_context(filename: str = "enhanced_mysql_prompt.txt") -> str:
+logger = logging.getLogger(__name__)
+
+# Context file written by generate_mysql_context.py (relative paths are
+# resolved against this package directory).
+MYSQL_CONTEXT_FILE = os.environ.get("MYSQL_CONTEXT_FILE", "mysql_context.txt")
+
+
+def _load_mysql_context(filename: str = MYSQL_CONTEXT_FILE) -> str:
     """
     Loads the detailed MySQL database context from a file.
-    This content is generated by the `generate_mysql_prompt.py` script.
-    
+    This content is generated by the `generate_mysql_context.py` script.
+
     Args:
         filename (str): The name of the context file to read.
 
@@ -29,44 +39,120 @@ def _load_mysql_context(filename: str = "enhanced_mysql_prompt.txt") -> str:
         str: The content of the file, or a warning/error message if it fails.
     """
     try:
-        # Assumes the context file is in the same directory as this script.
-        # Adjust the path if your project structure is different.
-        base_path = os.path.dirname(__file__)
-        context_file_path = os.path.join(base_path, filename)
-
+        context_file_path = os.path.join(os.path.dirname(__file__), filename)
         with open(context_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        print(f"MySQL context loaded successfully from '{filename}'")
-        return content
+            return f.read()
 
     except FileNotFoundError:
-        error_message = (f"WARNING: The context file '{filename}' was not found.\n"
-                         "Please run the 'generate_mysql_prompt.py' script to create it.")
-        print(error_message)
-        return "## WARNING: MySQL context is not available.\n## Run the 'generate_mysql_prompt.py' script to populate this section."
+        logger.warning("The context file '%s' was not found. Run the 'generate_mysql_context.py' "
+                       "script to create it.", filename)
+        return "## WARNING: MySQL context is not available.\n## Run the 'generate_mysql_context.py' script to populate this section."
     except Exception as e:
-        error_message = f"An error occurred while loading the prompt context: {e}"
-        print(error_message)
+        logger.warning("An error occurred while loading the prompt context: %s", e)
         return f"## ERROR: Could not load MySQL context.\n## Details: {e}"
 
-# 1. Load the dynamic context from the file.
-MYSQL_PROMPT_CONTEXT = _load_mysql_context()
 
-# 2. Define the main prompt for the agent.
-MYSQL_PROMPT = f"""
+# 1. The dynamic context, loaded from the file on first use.
+_mysql_context = None
+_mysql_prompt = None
+
+
+def get_mysql_context() -> str:
+    """Returns the database context, reading the file on first use."""
+    global _mysql_context
+    if _mysql_context is None:
+        _mysql_context = _load_mysql_context()
+    return _mysql_context
+
+
+# 2. Define the main prompt for the agent (role and flow; the context follows it).
+MYSQL_PROMPT_HEADER = """
 # ROLE AND GOAL
-You are an expert MySQL database developer and a helpful assistant. Your primary goal is to understand a user's question, formulate the correct SQL query based on the detailed database context provided below, execute it using the available `query_mysql` tool, and then present the results to the user in a clear, concise, and friendly manner.
+You are an expert MySQL database developer and a helpful assistant. Your primary goal is to understand a user's question, formulate the correct SQL query based on the detailed database context provided below, execute it using the available `query_mysql_async` tool, and then present the results to the user in a clear, concise, and friendly manner.
 
 **Execution Flow:**
 1.  **Analyze the user's request** to understand their intent.
 2.  **Construct a single, valid MySQL query** based on the user's request and the extensive database context below. The query must be on a single line.
-3.  **Call the `query_mysql` tool** with the generated SQL string as the argument.
-4.  **Receive the JSON response** from the tool. The response will be a dictionary with a 'data' key containing a list of rows, or an 'error' key.
-5.  **Analyze the result.** If there's data, summarize it into a user-friendly, natural language answer. Do not just dump the raw JSON. Format lists or tables nicely. If there's an error, explain it clearly to the user.
+3.  **Call the `query_mysql_async` tool** with the generated SQL string as the argument. When the question needs several queries that don't depend on each other's results (e.g. the standings, the number of races and the fastest laps of a season), send them together in one call to `query_mysql_batch` with a list of SQL strings: they run concurrently and all results come back in a single response, each with its `query_index`. Use separate calls only when a query needs values returned by a previous one.
+4.  **Receive the JSON response** from the tool. The response will be a dictionary with a 'results_markdown' key (or 'results' when a compact `output_format` is used) containing the rows, or an 'error' key. For wide or long results, pass `output_format="auto"` and a `token_budget` to receive a compact encoding. When a listing is long and the user may want to browse it, pass a `page_size` (e.g. 20): you get the first page and a `result_handle` in the metadata. For "show me the next ones", or to re-sort or filter those rows, call `fetch_result_page` with that handle and a `page` (and optionally `sort_by`/`descending` or a `where` such as "wins >= 10") instead of re-running the query with a new OFFSET.
+5.  **Analyze the result.** If there's data, summarize it into a user-friendly, natural language answer. Do not just dump the raw JSON. Format lists or tables nicely. If there's an error, explain it clearly to the user. If the query was rejected by the cost guard or by local validation, follow its 'suggestions' (e.g. add a WHERE on an indexed column or a join condition, or use the suggested table/column name) and try again. Only read-only SELECT statements are executed.
 
 # DATABASE CONTEXT AND EXAMPLES
 
-{MYSQL_PROMPT_CONTEXT}
+"""
+
+
+def get_mysql_prompt() -> str:
+    """Returns the full prompt, with the context of every table (built once)."""
+    global _mysql_prompt
+    if _mysql_prompt is None:
+        _mysql_prompt = f"""{MYSQL_PROMPT_HEADER}{get_mysql_context()}
+
+"""
+    return _mysql_prompt
+
+
+def __getattr__(name):
+    # `MYSQL_PROMPT` and `MYSQL_PROMPT_CONTEXT` used to be module constants.
+    if name == "MYSQL_PROMPT":
+        return get_mysql_prompt()
+    if name == "MYSQL_PROMPT_CONTEXT":
+        return get_mysql_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 3. Per-question prompt: only the tables and examples relevant to the question.
+# "retrieval" (default) or "full" to always send the whole context.
+MYSQL_PROMPT_MODE = os.environ.get("MYSQL_PROMPT_MODE", "retrieval").lower()
+MYSQL_RETRIEVAL_TOP_TABLES = int(os.environ.get("MYSQL_RETRIEVAL_TOP_TABLES", "4"))
+MYSQL_RETRIEVAL_TOP_EXAMPLES = int(os.environ.get("MYSQL_RETRIEVAL_TOP_EXAMPLES", "3"))
+MYSQL_RETRIEVAL_MAX_NEIGHBOURS = int(os.environ.get("MYSQL_RETRIEVAL_MAX_NEIGHBOURS", "4"))
+
+_retriever = None
+
+
+def _get_retriever():
+    """Builds the schema index over the loaded context on first use."""
+    global _retriever
+    if _retriever is None:
+        from .retrieval import SchemaRetriever
+        _retriever = SchemaRetriever(
+            get_mysql_context(),
+            top_tables=MYSQL_RETRIEVAL_TOP_TABLES,
+            top_examples=MYSQL_RETRIEVAL_TOP_EXAMPLES,
+            max_neighbours=MYSQL_RETRIEVAL_MAX_NEIGHBOURS,
+        )
+    return _retriever
+
+
+def question_text(context) -> str:
+    """Text of the user message that started the current invocation, if any."""
+    content = getattr(context, "user_content", None)
+    parts = getattr(content, "parts", None) or []
+    return " ".join(part.text for part in parts if getattr(part, "text", None))
+
+
+def build_mysql_prompt(context) -> str:
+    """
+    ADK instruction provider: returns the agent instruction for the current turn.
+
+    In "retrieval" mode the context section only holds the tables relevant to
+    the user's question, their join neighbours and the matching examples. The
+    full prompt is used in "full" mode, when there is no question text, or when
+    the context could not be split into tables.
+
+    Args:
+        context (ReadonlyContext): The invocation context passed in by ADK.
+
+    Returns:
+        str: The instruction for this model call.
+    """
+    question = question_text(context)
+    if MYSQL_PROMPT_MODE != "retrieval" or not question:
+        return get_mysql_prompt()
+    retriever = _get_retriever()
+    if not retriever.table_names:
+        return get_mysql_prompt()
+    return f"""{MYSQL_PROMPT_HEADER}{retriever.render(question)}
 
 """
@@ -0,0 +1,270 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# question_cache.py
+# Cache of question -> SQL pairs that answered a question successfully, so a
+# paraphrase of a known question can reuse its SQL instead of asking the model
+# to write it again. Matching is lexical: normalized terms compared with the
+# Dice coefficient, with numbers and named entities required to match exactly.
+import collections
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from .retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+# =======================================================================
+# QUESTION NORMALIZATION
+# =======================================================================
+
+_NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "fifteen": "15",
+    "twenty": "20", "thirty": "30", "fifty": "50", "hundred": "100", "first": "1", "single": "1",
+}
+# Words that mean the same thing in a question about data, mapped to one term.
+_SYNONYMS = {
+    "most": "top", "highest": "top", "best": "top", "greatest": "top", "largest": "top",
+    "biggest": "top", "maximum": "top", "max": "top", "leading": "top",
+    "least": "bottom", "fewest": "bottom", "lowest": "bottom", "worst": "bottom",
+    "smallest": "bottom", "minimum": "bottom", "min": "bottom",
+    "number": "count", "many": "count", "amount": "count",
+    "average": "avg", "mean": "avg", "total": "sum",
+    "won": "win", "victory": "win",
+}
+# Question phrasing that doesn't change what is asked (on top of retrieval's stopwords).
+_FILLER = {
+    "has", "have", "had", "did", "can", "could", "would", "please", "tell", "get", "i",
+    "you", "we", "my", "our", "ever", "name",
+}
+_QUOTED_RE = re.compile(r"[\"']([^\"']+)[\"']")
+_CAPITALIZED_RE = re.compile(r"(?<![.?!]\s)(?<!^)\b[A-Z][a-zA-Z]+\b")
+
+
+def question_terms(question: str) -> frozenset:
+    """Normalized content terms of a question (stemmed, synonyms and numbers unified)."""
+    terms = set()
+    for term in tokenize(question):
+        term = _NUMBER_WORDS.get(term, term)
+        term = _SYNONYMS.get(term, term)
+        if term not in _FILLER:
+            terms.add(term)
+    return frozenset(terms)
+
+
+def question_anchors(question: str) -> frozenset:
+    """
+    Terms that must be identical for two questions to share SQL: numbers,
+    quoted values and capitalized words after the first one (names such as
+    drivers, circuits or countries).
+    """
+    anchors = {term for term in question_terms(question) if term.isdigit()}
+    for quoted in _QUOTED_RE.findall(question):
+        anchors.update(tokenize(quoted))
+    for word in _CAPITALIZED_RE.findall(question.strip()):
+        anchors.update(term for term in tokenize(word) if not term.isdigit())
+    return frozenset(anchors)
+
+
+def similarity(terms_a: frozenset, terms_b: frozenset) -> float:
+    """Dice coefficient of two term sets (1.0 = same terms)."""
+    if not terms_a or not terms_b:
+        return 0.0
+    return 2 * len(terms_a & terms_b) / (len(terms_a) + len(terms_b))
+
+
+# =======================================================================
+# CACHE
+# =======================================================================
+
+class CachedQuestion:
+    """A question that was answered by one successful query, and that query's tool arguments."""
+
+    __slots__ = ("question", "terms", "anchors", "args", "fingerprint", "created_at", "last_used", "hits")
+
+    def __init__(self, question: str, args: dict, fingerprint: str, created_at: float = None, hits: int = 0):
+        self.question = question
+        self.terms = question_terms(question)
+        self.anchors = question_anchors(question)
+        self.args = args
+        self.fingerprint = fingerprint
+        self.created_at = time.time() if created_at is None else created_at
+        self.last_used = time.monotonic()
+        self.hits = hits
+
+
+class QuestionCache:
+    """
+    LRU cache of question -> SQL arguments.
+
+    - `lookup` returns the most similar cached question when its similarity
+      reaches `threshold` and its anchors (numbers, names) are the same.
+    - Entries recorded against another schema fingerprint are dropped as soon
+      as a lookup or store sees a new fingerprint.
+    - Entries expire `ttl` seconds after they were stored (0 = never) and the
+      least recently used ones are evicted beyond `max_entries`.
+    - With a `path`, entries are kept in a JSON file across restarts.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 1000, ttl: float = 86400, path: str = ""):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = collections.OrderedDict()  # normalized question -> CachedQuestion
+        self._index = collections.defaultdict(set)  # term -> normalized questions
+        self._lock = threading.Lock()
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if path:
+            self._load()
+
+    def lookup(self, question: str, fingerprint: str):
+        """
+        Returns (CachedQuestion, similarity) for the best match of `question`,
+        or None when nothing is similar enough.
+        """
+        terms = question_terms(question)
+        anchors = question_anchors(question)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            best, best_score = None, 0.0
+            candidates = set().union(*(self._index.get(term, ()) for term in terms)) if terms else set()
+            for key in candidates:
+                entry = self._entries[key]
+                if self._expired(entry):
+                    self._remove(key)
+                    continue
+                if entry.anchors != anchors:
+                    continue
+                score = similarity(terms, entry.terms)
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            best.hits += 1
+            best.last_used = time.monotonic()
+            self._entries.move_to_end(self._key(best.terms))
+            self.hits += 1
+            return best, round(best_score, 3)
+
+    def store(self, question: str, args: dict, fingerprint: str):
+        """Records that `args` (the query tool's arguments) answered `question`."""
+        entry = CachedQuestion(question, args, fingerprint)
+        if not entry.terms:
+            return
+        key = self._key(entry.terms)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if key in self._entries:
+                self._remove(key)
+            self._add(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self.stores += 1
+        self._save()
+
+    def invalidate(self, question: str):
+        """Drops the entry of a question, e.g. when its cached SQL failed."""
+        key = self._key(question_terms(question))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+        self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # --- Internal helpers ---
+
+    @staticmethod
+    def _key(terms: frozenset) -> str:
+        return " ".join(sorted(terms))
+
+    def _expired(self, entry: CachedQuestion) -> bool:
+        return bool(self.ttl) and time.time() - entry.created_at > self.ttl
+
+    def _check_fingerprint(self, fingerprint: str):
+        # A schema change can break any cached SQL, so every older entry goes.
+        if fingerprint == self.fingerprint:
+            return
+        self.fingerprint = fingerprint
+        for key in [key for key, entry in self._entries.items() if entry.fingerprint != fingerprint]:
+            self._remove(key)
+            self.invalidations += 1
+
+    def _add(self, key: str, entry: CachedQuestion):
+        self._entries[key] = entry
+        for term in entry.terms:
+            self._index[term].add(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for term in entry.terms:
+            keys = self._index.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[term]
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for item in saved.get("entries", []):
+            entry = CachedQuestion(item["question"], item["args"], item["fingerprint"],
+                                   item.get("created_at"), item.get("hits", 0))
+            if entry.terms and not self._expired(entry):
+                self._add(self._key(entry.terms), entry)
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            saved = {"entries": [
+                {"question": e.question, "args": e.args, "fingerprint": e.fingerprint,
+                 "created_at": e.created_at, "hits": e.hits}
+                for e in self._entries.values()
+            ]}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(saved, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write the question cache to '%s': %s", self.path, e)
@@ -0,0 +1,422 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# results.py
+# Per-session store of query results behind opaque handles, so follow-up pages
+# (and sorted/filtered views of them) are served without re-running the query.
+# Large results are spilled to disk in blocks of rows.
+import atexit
+import collections
+import heapq
+import os
+import pickle
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+
+SPILL_BLOCK_ROWS = 1000
+
+# "column op value", e.g. "wins >= 10", "nationality = British", "name contains ham".
+_FILTER_PATTERN = re.compile(
+    r"^\s*[`\"']?(?P<column>[^`\"'<>=!]+?)[`\"']?\s*(?P<op><=|>=|!=|<>|=|<|>|\bcontains\b)\s*(?P<value>.*?)\s*$",
+    re.IGNORECASE,
+)
+
+
+def estimate_size(rows) -> int:
+    """Approximate data bytes of tuple rows, measured like the fetch budget."""
+    return sum(sum(len(str(value)) for value in row) + len(row) for row in rows)
+
+
+# =======================================================================
+# VIEWS (SORT / FILTER)
+# =======================================================================
+
+def _column_index(description, name: str) -> int:
+    names = [str(column[0]) for column in description]
+    for index, column in enumerate(names):
+        if column == name:
+            return index
+    for index, column in enumerate(names):
+        if column.lower() == name.lower():
+            return index
+    raise ValueError(f"Unknown column '{name}'. Columns: {', '.join(names)}.")
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_filter(description, expression: str):
+    """
+    Turns "column op value" into a row predicate. Operators: =, !=, <, <=, >,
+    >= and contains (case-insensitive substring). Values compare numerically
+    when both sides are numbers, as case-insensitive text otherwise; "NULL"
+    matches NULL with = and !=.
+
+    Raises:
+        ValueError: The expression or the column is not valid.
+    """
+    match = _FILTER_PATTERN.match(expression)
+    if match is None:
+        raise ValueError(f"Invalid filter '{expression}'. Use 'column op value' with op one of "
+                         "=, !=, <, <=, >, >=, contains.")
+    index = _column_index(description, match["column"].strip())
+    op = match["op"].lower()
+    op = "!=" if op == "<>" else op
+    raw = match["value"]
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "'\"":
+        raw = raw[1:-1]
+    if raw.upper() == "NULL" and op in ("=", "!="):
+        return lambda row: (row[index] is None) == (op == "=")
+    number = _as_number(raw)
+    text = raw.lower()
+
+    def predicate(row) -> bool:
+        cell = row[index]
+        if cell is None:
+            return op == "!="
+        if op == "contains":
+            return text in str(cell).lower()
+        left, right = _as_number(cell), number
+        if left is None or right is None:
+            left, right = str(cell).lower(), text
+        if op == "=":
+            return left == right
+        if op == "!=":
+            return left != right
+        if op == "<":
+            return left < right
+        if op == "<=":
+            return left <= right
+        if op == ">":
+            return left > right
+        return left >= right
+
+    return predicate
+
+
+def _sort_key(index: int, descending: bool, as_text: bool):
+    """
+    Sort key on one column for heapq.nsmallest (ascending) or nlargest
+    (descending): NULLs rank last either way.
+    """
+    null_rank = 0 if descending else 1
+
+    def key(row):
+        value = row[index]
+        if value is None:
+            return null_rank, 0
+        return 1 - null_rank, str(value) if as_text else value
+
+    return key
+
+
+# =======================================================================
+# RESULT STORE
+# =======================================================================
+
+class StoredResult:
+    """The rows of one query, kept in memory or in a spill file."""
+
+    def __init__(self, handle: str, session_id: str, sql: str, description, complete: bool, page_size: int):
+        self.handle = handle
+        self.session_id = session_id
+        self.sql = sql
+        self.description = description
+        self.complete = complete  # False if the query returned more rows than were kept.
+        self.page_size = page_size
+        self.row_count = 0
+        self.size = 0
+        self.rows = None  # In memory, or None when spilled.
+        self.path = None
+        self.block_offsets = []  # File offset of every SPILL_BLOCK_ROWS rows.
+        self.last_used = time.monotonic()
+
+    def iter_rows(self):
+        """Yields every row in order, holding at most one spill block in memory."""
+        if self.rows is not None:
+            yield from self.rows
+            return
+        with open(self.path, "rb") as file:
+            for _ in self.block_offsets:
+                yield from pickle.load(file)
+
+    def view(self, start: int, count: int, where: str = "", sort_by: str = "", descending: bool = False):
+        """
+        Returns (rows, total_rows): `count` rows from `start` of the rows
+        matching `where`, sorted on `sort_by` (NULLs last) or in query order.
+        The stored rows are streamed: besides one spill block, at most
+        start + count rows are held, never the whole result.
+
+        Raises:
+            ValueError: The filter or the sort column is not valid.
+        """
+        predicate = build_filter(self.description, where) if where else None
+        index = _column_index(self.description, sort_by) if sort_by else None
+        total = 0
+
+        def matching():
+            nonlocal total
+            total = 0
+            for row in self.iter_rows():
+                if predicate is None or predicate(row):
+                    total += 1
+                    yield row
+
+        if index is None:
+            page = [row for position, row in enumerate(matching()) if start <= position < start + count]
+            return page, total
+        select = heapq.nlargest if descending else heapq.nsmallest
+        try:
+            top = select(start + count, matching(), key=_sort_key(index, descending, False))
+        except TypeError:  # Mixed types in one column: compare as text.
+            top = select(start + count, matching(), key=_sort_key(index, descending, True))
+        return top[start:], total
+
+    def read(self, start: int = 0, stop: int = None) -> list:
+        """Returns rows[start:stop], reading only the spill blocks they span."""
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+        if self.rows is not None:
+            return self.rows[start:stop]
+        if start >= stop:
+            return []
+        first, last = start // SPILL_BLOCK_ROWS, (stop - 1) // SPILL_BLOCK_ROWS
+        rows = []
+        with open(self.path, "rb") as file:
+            file.seek(self.block_offsets[first])
+            for _ in range(first, last + 1):
+                rows.extend(pickle.load(file))
+        offset = first * SPILL_BLOCK_ROWS
+        return rows[start - offset:stop - offset]
+
+
+class ResultWriter:
+    """
+    Builds a StoredResult from rows arriving in batches. Rows stay in memory
+    while they fit the store's in-memory bounds; from then on they are written
+    to the spill file as blocks fill, so at most one block is held.
+    """
+
+    def __init__(self, store: "ResultStore", entry: StoredResult):
+        self.entry = entry
+        self._store = store
+        self._pending = []
+        self._file = None
+        self._done = False
+
+    def append(self, rows: list):
+        """Adds the next rows of the result."""
+        self.entry.row_count += len(rows)
+        self.entry.size += estimate_size(rows)
+        self._pending.extend(rows)
+        if self._file is None and self._store._should_spill(self.entry.size):
+            self._file = self._store._open_spill(self.entry)
+        if self._file is not None:
+            self._write_blocks(final=False)
+
+    def commit(self, complete: bool = True) -> str:
+        """
+        Stores the result and returns its handle.
+
+        Args:
+            complete (bool): False if the query had more rows than were appended.
+        """
+        self.entry.complete = complete
+        if self._file is not None:
+            self._write_blocks(final=True)
+            self._file.close()
+        else:
+            self.entry.rows = self._pending
+        self._pending = []
+        self._done = True
+        self._store._add(self.entry)
+        return self.entry.handle
+
+    def abort(self):
+        """Drops the rows appended so far; a no-op after `commit`."""
+        if self._done:
+            return
+        self._done = True
+        self._pending = []
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.remove(self.entry.path)
+            except OSError:
+                pass
+
+    def _write_blocks(self, final: bool):
+        # Blocks hold exactly SPILL_BLOCK_ROWS rows (except the last one), as
+        # StoredResult.read expects.
+        while len(self._pending) >= SPILL_BLOCK_ROWS or (final and self._pending):
+            block, self._pending = self._pending[:SPILL_BLOCK_ROWS], self._pending[SPILL_BLOCK_ROWS:]
+            self.entry.block_offsets.append(self._file.tell())
+            pickle.dump(block, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class ResultStore:
+    """
+    Keeps query results per session behind random handles.
+
+    - Handles expire after `ttl` seconds without use.
+    - A session keeps at most `max_handles` results and `session_bytes` of
+      data; its least recently used results are dropped to make room.
+    - Results larger than `spill_bytes`, or arriving while the in-memory
+      results already hold `memory_bytes`, are written to a file in `spill_dir`
+      (a private temporary directory by default). Spill files total at most
+      `disk_bytes`; the least recently used ones are deleted first.
+    """
+
+    def __init__(self, ttl: float = 1800, max_handles: int = 16, session_bytes: int = 64 * 1024 * 1024,
+                 memory_bytes: int = 128 * 1024 * 1024, spill_bytes: int = 1024 * 1024,
+                 disk_bytes: int = 1024 * 1024 * 1024, spill_dir: str = ""):
+        self.ttl = ttl
+        self.max_handles = max_handles
+        self.session_bytes = session_bytes
+        self.memory_bytes = memory_bytes
+        self.spill_bytes = spill_bytes
+        self.disk_bytes = disk_bytes
+        self.spill_dir = spill_dir
+        self._entries = collections.OrderedDict()  # handle -> StoredResult, least recently used first
+        self._lock = threading.Lock()
+        self._memory_used = 0
+        self._disk_used = 0
+        self.stores = 0
+        self.spills = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.page_reads = 0
+
+    def put(self, session_id: str, sql: str, description, rows: list, complete: bool = True,
+            page_size: int = 100) -> str:
+        """
+        Stores the rows of a query and returns their handle.
+
+        Args:
+            session_id (str): Session the handle belongs to; other sessions can't read it.
+            sql (str): The statement that produced the rows (reported back with pages).
+            description (list): `cursor.description` of the statement.
+            rows (list): Result rows as tuples.
+            complete (bool): False if the query had more rows than `rows`.
+            page_size (int): Default rows per page for follow-up fetches.
+        """
+        writer = self.writer(session_id, sql, description, page_size)
+        writer.append(rows)
+        return writer.commit(complete)
+
+    def writer(self, session_id: str, sql: str, description, page_size: int = 100) -> "ResultWriter":
+        """
+        Starts a result whose rows arrive in batches (see `put` for the
+        arguments). Nothing is stored until `ResultWriter.commit`.
+        """
+        handle = "res_" + secrets.token_urlsafe(9)
+        # Only the column names and type codes are needed to format pages later.
+        entry = StoredResult(handle, session_id, sql, [tuple(column[:2]) for column in description],
+                             True, page_size)
+        return ResultWriter(self, entry)
+
+    def get(self, session_id: str, handle: str):
+        """Returns the StoredResult for a handle of this session, or None if unknown or expired."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(handle)
+            if entry is None or entry.session_id != session_id:
+                return None
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(handle)
+            self.page_reads += 1
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "handles": len(self._entries),
+                "sessions": len({entry.session_id for entry in self._entries.values()}),
+                "memory_bytes": self._memory_used,
+                "disk_bytes": self._disk_used,
+                "stores": self.stores,
+                "spills": self.spills,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "page_reads": self.page_reads,
+            }
+
+    # --- Internal helpers ---
+
+    def _should_spill(self, size: int) -> bool:
+        with self._lock:
+            self._expire()
+            return size > self.spill_bytes or self._memory_used + size > self.memory_bytes
+
+    def _open_spill(self, entry: StoredResult):
+        if not self.spill_dir:
+            with self._lock:
+                if not self.spill_dir:
+                    self.spill_dir = tempfile.mkdtemp(prefix="mysql_agent_results_")
+                    atexit.register(shutil.rmtree, self.spill_dir, True)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        entry.path = os.path.join(self.spill_dir, f"{entry.handle}.pickle")
+        return open(entry.path, "wb")
+
+    def _add(self, entry: StoredResult):
+        with self._lock:
+            session = [e for e in self._entries.values() if e.session_id == entry.session_id]
+            while session and (len(session) >= self.max_handles
+                               or sum(e.size for e in session) + entry.size > self.session_bytes):
+                self._remove(session.pop(0).handle)
+                self.evictions += 1
+            if entry.path is not None:
+                while self._disk_used + entry.size > self.disk_bytes:
+                    victim = next((e for e in self._entries.values() if e.path is not None), None)
+                    if victim is None:
+                        break
+                    self._remove(victim.handle)
+                    self.evictions += 1
+                self._disk_used += entry.size
+                self.spills += 1
+            else:
+                self._memory_used += entry.size
+            self._entries[entry.handle] = entry
+            self.stores += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if now - entry.last_used < self.ttl:
+                break
+            self._remove(entry.handle)
+            self.expirations += 1
+
+    def _remove(self, handle: str):
+        entry = self._entries.pop(handle)
+        if entry.path is not None:
+            self._disk_used -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        else:
+            self._memory_used -= entry.size
@@ -0,0 +1,321 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# retrieval.py
+# Per-question retrieval over the generated MySQL context: the context file is
+# split per table and per example, indexed with BM25, and only the relevant
+# parts (plus the tables they join to) are put into the model instruction.
+import collections
+import math
+import re
+
+# =======================================================================
+# PARSING THE GENERATED CONTEXT
+# =======================================================================
+
+_TABLE_HEADER_RE = re.compile(r"^#+\s*Table:\s*`([^`]+)`", re.IGNORECASE)
+_SAMPLES_HEADER_RE = re.compile(r"^#+\s*Samples for table\s*`([^`]+)`", re.IGNORECASE)
+_ANALYSIS_HEADER_RE = re.compile(r"^#+\s*Analysis of Table\s*`([^`]+)`", re.IGNORECASE)
+_SECTION_RE = re.compile(r"^#{1,3}\s*([A-Za-z][^`]*?):?\s*$")
+_COLUMN_RE = re.compile(r"^-\s*`([^`]+)`")
+_QUESTION_RE = re.compile(r"^\*\*Question:\*\*\s*(.*)$")
+# `FROM t AS a` / `JOIN t a` in example SQL, and `a.col = b.col` join conditions.
+_FROM_RE = re.compile(
+    r"(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(?!ON\b|WHERE\b|JOIN\b|GROUP\b|ORDER\b|LIMIT\b)(\w+)`?)?",
+    re.IGNORECASE,
+)
+_JOIN_ON_RE = re.compile(r"`?(\w+)`?\.`?\w+`?\s*=\s*`?(\w+)`?\.`?\w+`?")
+
+
+class ContextDocument:
+    """The generated context split into its reusable parts."""
+
+    def __init__(self):
+        self.overview = []
+        self.notes = []
+        self.other = []
+        self.tables = collections.OrderedDict()  # name -> {"schema", "samples", "analysis"}
+        self.columns = collections.OrderedDict()  # name -> [column names]
+        self.examples = []  # [(question line, full example text)]
+
+    def table(self, name: str) -> dict:
+        if name not in self.tables:
+            self.tables[name] = {"schema": [], "samples": [], "analysis": []}
+            self.columns[name] = []
+        return self.tables[name]
+
+
+def parse_context(text: str) -> ContextDocument:
+    """
+    Splits the context produced by `generate_mysql_context.py` into overview,
+    notes, per-table schema/samples/analysis and individual examples.
+    Unrecognized sections are kept in `other` and always included.
+    """
+    document = ContextDocument()
+    target = document.other
+    table = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = (_TABLE_HEADER_RE.match(stripped) or _SAMPLES_HEADER_RE.match(stripped)
+                 or _ANALYSIS_HEADER_RE.match(stripped))
+        if match:
+            table = match.group(1)
+            part = ("schema" if match.re is _TABLE_HEADER_RE
+                    else "samples" if match.re is _SAMPLES_HEADER_RE else "analysis")
+            target = document.table(table)[part]
+            target.append(line)
+            continue
+
+        section = _SECTION_RE.match(stripped)
+        if section:
+            title = section.group(1).upper()
+            table = None
+            if "OVERVIEW" in title:
+                target = document.overview
+                target.append(line)
+            elif "NOTE" in title:
+                target = document.notes
+                target.append(line)
+            elif "EXAMPLE" in title:
+                target = None  # Examples are collected one by one below.
+            elif any(word in title for word in ("DATABASE", "SCHEMA", "SAMPLE", "ANALYSIS")):
+                target = []  # Headings of per-table parts; dropped, re-added on output.
+            else:
+                target = document.other
+                target.append(line)
+            continue
+
+        if target is None:
+            question = _QUESTION_RE.match(stripped)
+            if question:
+                document.examples.append([question.group(1), line])
+            elif document.examples and stripped:
+                document.examples[-1][1] += "\n" + line
+            continue
+
+        if stripped == "---" and table is None:
+            continue
+        target.append(line)
+        if table is not None and target is document.tables[table]["schema"]:
+            column = _COLUMN_RE.match(stripped)
+            if column:
+                document.columns[table].append(column.group(1))
+
+    document.examples = [tuple(example) for example in document.examples]
+    return document
+
+
+# =======================================================================
+# BM25 INDEX
+# =======================================================================
+
+_WORD_RE = re.compile(r"[A-Za-z]+|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "do", "does", "for", "from", "how", "in",
+    "is", "it", "me", "of", "on", "or", "show", "the", "their", "them", "there", "to",
+    "was", "were", "what", "which", "who", "with", "list", "give", "find", "all",
+}
+
+
+def _stem(word: str) -> str:
+    """Very small plural stemmer, enough to match `races`/`race`, `wins`/`win`."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased terms; camelCase and snake_case identifiers are split too."""
+    terms = []
+    for word in _WORD_RE.findall(text):
+        parts = _CAMEL_RE.findall(word)
+        candidates = [word] + (parts if len(parts) > 1 else [])
+        for candidate in candidates:
+            term = _stem(candidate.lower())
+            if term not in _STOPWORDS:
+                terms.append(term)
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 over small documents, with an inverted index for scoring."""
+
+    def __init__(self, documents: list, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        self.lengths = [len(terms) for terms in documents]
+        self.average_length = (sum(self.lengths) / self.size) if self.size else 0.0
+        self.postings = collections.defaultdict(list)  # term -> [(doc, tf)]
+        for doc, terms in enumerate(documents):
+            for term, tf in collections.Counter(terms).items():
+                self.postings[term].append((doc, tf))
+        self.idf = {
+            term: math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, terms: list, top_k: int) -> list:
+        """Returns up to `top_k` (doc, score) pairs with a positive score, best first."""
+        scores = collections.defaultdict(float)
+        for term in set(terms):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.average_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+
+# =======================================================================
+# SCHEMA RETRIEVER
+# =======================================================================
+
+class SchemaRetriever:
+    """
+    Selects the tables and examples relevant to a question and renders a
+    context section containing only those, plus the tables they join to.
+    """
+
+    def __init__(self, context_text: str, top_tables: int = 4, top_examples: int = 3,
+                 max_neighbours: int = 4):
+        self.context_text = context_text
+        self.document = parse_context(context_text)
+        self.top_tables = top_tables
+        self.top_examples = top_examples
+        self.max_neighbours = max_neighbours
+
+        self.table_names = list(self.document.tables)
+        table_docs = []
+        for name in self.table_names:
+            parts = self.document.tables[name]
+            # Table and column names weigh more than sample values.
+            terms = tokenize(name) * 3 + tokenize(" ".join(self.document.columns[name])) * 2
+            terms += tokenize("\n".join(parts["analysis"] + parts["samples"]))
+            table_docs.append(terms)
+        self.table_index = BM25Index(table_docs)
+        self.example_index = BM25Index([tokenize(text) for _, text in self.document.examples])
+        self.join_graph = self._build_join_graph()
+
+    def _build_join_graph(self) -> dict:
+        """
+        Infers foreign keys from column names: a column named like the first
+        (key) column of another table, e.g. `results.raceId` -> `races.raceId`.
+        Join conditions used in the example queries are added as edges too.
+        """
+        graph = collections.defaultdict(set)
+        keys = {}
+        first_columns = collections.Counter(
+            columns[0].lower() for columns in self.document.columns.values() if columns
+        )
+        for name, columns in self.document.columns.items():
+            if not columns or not columns[0].lower().endswith("id"):
+                continue
+            key = columns[0].lower()
+            # `races.raceId` owns raceId; `lapTimes.raceId` (first, but not its
+            # own key) doesn't. Ambiguous first columns are ignored.
+            if key in (name.lower() + "id", _stem(name.lower()) + "id"):
+                keys[key] = name
+            elif first_columns[key] == 1:
+                keys.setdefault(key, name)
+        for name, columns in self.document.columns.items():
+            for column in columns:
+                owner = keys.get(column.lower())
+                if owner and owner != name:
+                    graph[name].add(owner)
+                    graph[owner].add(name)
+        known = {name.lower(): name for name in self.table_names}
+        for _, text in self.document.examples:
+            aliases = {}
+            for table, alias in _FROM_RE.findall(text):
+                if table.lower() in known:
+                    aliases[table.lower()] = aliases[(alias or table).lower()] = known[table.lower()]
+            for left, right in _JOIN_ON_RE.findall(text):
+                left, right = aliases.get(left.lower()), aliases.get(right.lower())
+                if left and right and left != right:
+                    graph[left].add(right)
+                    graph[right].add(left)
+        return graph
+
+    def select(self, question: str) -> dict:
+        """
+        Returns {'tables': [...], 'neighbours': [...], 'examples': [...]} for a
+        question: the best-matching tables, the tables they join to, and the
+        indexes of the best-matching examples.
+        """
+        terms = tokenize(question)
+        ranked = self.table_index.search(terms, len(self.table_names))
+        scores = {self.table_names[doc]: score for doc, score in ranked}
+        hits = [self.table_names[doc] for doc, _ in ranked[:self.top_tables]]
+        examples = [doc for doc, _ in self.example_index.search(terms, self.top_examples)]
+
+        # Join neighbours of the hits, preferring those relevant to the question.
+        neighbours = {
+            neighbour for table in hits for neighbour in self.join_graph.get(table, ())
+            if neighbour not in hits
+        }
+        neighbours = sorted(neighbours, key=lambda name: (-scores.get(name, 0.0), self.table_names.index(name)))
+        return {
+            "tables": hits,
+            "neighbours": neighbours[:self.max_neighbours],
+            "examples": examples,
+        }
+
+    def render(self, question: str) -> str:
+        """
+        Renders the context section for a question (same layout as the full file).
+        When no table matches (a greeting, or a follow-up such as "and in 2021?")
+        the full context is returned unchanged.
+        """
+        selection = self.select(question)
+        chosen = selection["tables"] + selection["neighbours"]
+        if not chosen:
+            return self.context_text
+        document = self.document
+
+        lines = list(document.overview) + list(document.other)
+        lines.append("\n## DATABASE INFORMATION (tables relevant to the current question)")
+        others = [name for name in self.table_names if name not in chosen]
+        if others:
+            lines.append(
+                "Other tables exist but are not detailed here: "
+                + ", ".join(f"`{name}`" for name in others)
+                + "."
+            )
+            paths = [
+                f"`{name}` -> " + ", ".join(f"`{other}`" for other in sorted(self.join_graph[name]) if other in others)
+                for name in chosen if any(other in others for other in self.join_graph.get(name, ()))
+            ]
+            if paths:
+                lines.append("Joins to those tables: " + "; ".join(paths) + ".")
+        lines.append("\n### Database Schema:")
+        for name in chosen:
+            lines.extend(document.tables[name]["schema"])
+        lines.append("\n### Table Data Samples:")
+        for name in chosen:
+            lines.extend(document.tables[name]["samples"])
+        lines.append("\n### Column Data Analysis:")
+        for name in chosen:
+            lines.extend(document.tables[name]["analysis"])
+        if document.notes:
+            lines.append("")
+            lines.extend(document.notes)
+        if selection["examples"]:
+            lines.append("\n## EXAMPLES:")
+            lines.extend(document.examples[doc][1] for doc in selection["examples"])
+        return "\n".join(lines)
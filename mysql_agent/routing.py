@@ -0,0 +1,299 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# routing.py
+# Weighted routing of read-only queries across MySQL endpoints (replicas and,
+# when allowed, the primary) with health checks, replica-lag awareness and
+# failover. Each endpoint has its own connection pool.
+import math
+import random
+import threading
+import time
+
+from .pool import PoolTimeoutError
+
+PRIMARY_READS_MODES = ("never", "fallback", "always")
+
+
+class NoEndpointError(Exception):
+    """Raised when no endpoint is configured or allowed for reads."""
+
+
+def parse_endpoints(spec: str) -> list:
+    """
+    Parses "host[:port][=weight], ..." into [(host, port or None, weight)].
+
+    Example: "replica-1:3306=3, replica-2=1" sends ~3/4 of the reads to replica-1.
+    """
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        address, _, weight = item.partition("=")
+        host, _, port = address.strip().rpartition(":") if ":" in address else (address.strip(), "", "")
+        weight = float(weight) if weight.strip() else 1.0
+        if weight <= 0:
+            raise ValueError(f"Endpoint weight must be positive: '{item}'")
+        endpoints.append((host, int(port) if port else None, weight))
+    return endpoints
+
+
+def read_replica_lag(connection):
+    """
+    Returns the replication delay of a server in seconds: 0.0 if it is not a
+    replica, inf if replication is stopped, None if it can't be read (e.g. the
+    user lacks the REPLICATION CLIENT privilege).
+    """
+    # SHOW REPLICA STATUS needs MySQL 8.0.22+; MariaDB and older servers use SLAVE.
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(statement)
+            rows = cursor.fetchall()
+        except Exception:
+            continue
+        finally:
+            cursor.close()
+        if not rows:
+            return 0.0
+        value = rows[0].get(column)
+        return math.inf if value is None else float(value)
+    return None
+
+
+class Endpoint:
+    """One MySQL server that can serve reads, with its pool and health state."""
+
+    def __init__(self, host: str, port: int = None, weight: float = 1.0, role: str = "replica"):
+        self.host = host
+        self.port = port
+        self.weight = weight
+        self.role = role
+        self.name = f"{host}:{port}" if port else host
+        self.pool = None
+        self.lag = None
+        self.lag_checked_at = None
+        self.down_until = 0.0
+        self.failures = 0  # Consecutive connection failures.
+        self.last_error = None
+        self.routed = 0
+
+    @property
+    def connect_params(self) -> dict:
+        params = {"host": self.host}
+        if self.port:
+            params["port"] = self.port
+        return params
+
+
+class Route:
+    """A borrowed connection and how it was chosen."""
+
+    __slots__ = ("endpoint", "connection", "wait", "skipped", "lag_exceeded")
+
+    def __init__(self, endpoint: Endpoint, connection, wait: float, skipped: list, lag_exceeded: bool = False):
+        self.endpoint = endpoint
+        self.connection = connection
+        self.wait = wait
+        self.skipped = skipped
+        self.lag_exceeded = lag_exceeded
+
+    def metadata(self) -> dict:
+        """The routing decision, as reported in tool metadata."""
+        info = {"endpoint": self.endpoint.name, "role": self.endpoint.role}
+        if self.endpoint.lag is not None and math.isfinite(self.endpoint.lag):
+            info["lag_seconds"] = self.endpoint.lag
+        if self.skipped:
+            info["skipped"] = [{"endpoint": name, "reason": reason} for name, reason in self.skipped]
+        if self.lag_exceeded:
+            info["lag_exceeded"] = True
+        return info
+
+
+class EndpointRouter:
+    """
+    Picks an endpoint per call, weighted-randomly among the healthy ones, and
+    borrows a connection from its pool.
+
+    - Replicas are checked for lag on a borrowed connection at most every
+      `check_interval` seconds; those behind by more than `max_lag` seconds are
+      skipped. If every candidate lags, the least-lagged one is used and the
+      route is flagged.
+    - An endpoint that can't be reached is skipped for `retry_seconds`
+      (doubling on repeated failures) and the next one is tried.
+    - `primary_reads` decides if the primary serves reads: "never", as a
+      "fallback" when no replica is usable, or "always" (weighted with them).
+      Without replicas, every read goes to the primary.
+    """
+
+    def __init__(self, pool_factory, primary: Endpoint, replicas: list = (), primary_reads: str = "never",
+                 max_lag: float = 30, check_interval: float = 5, retry_seconds: float = 10):
+        """
+        Args:
+            pool_factory (callable): Returns a ConnectionPool for an Endpoint.
+            primary (Endpoint): The primary (MYSQL_HOST).
+            replicas (list): Read endpoints.
+            primary_reads (str): One of PRIMARY_READS_MODES.
+            max_lag (float): Replica lag in seconds above which a replica is skipped (0 = no check).
+            check_interval (float): Seconds between lag checks of a replica.
+            retry_seconds (float): Initial time an unreachable endpoint is skipped.
+        """
+        if primary_reads not in PRIMARY_READS_MODES:
+            raise ValueError(f"primary_reads must be one of {', '.join(PRIMARY_READS_MODES)}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.primary_reads = primary_reads
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+        if not self.replicas:
+            self._tiers = [[primary]]
+        elif primary_reads == "always":
+            self._tiers = [self.replicas + [primary]]
+        elif primary_reads == "fallback":
+            self._tiers = [self.replicas, [primary]]
+        else:
+            self._tiers = [self.replicas]
+        self.endpoints = list({id(e): e for tier in self._tiers for e in tier}.values())
+        for endpoint in self.endpoints:
+            endpoint.pool = pool_factory(endpoint)
+
+    def acquire(self) -> Route:
+        """
+        Borrows a connection from the best available endpoint.
+
+        Raises:
+            PoolTimeoutError: Every usable endpoint's pool is exhausted.
+            NoEndpointError: No endpoint is allowed for reads.
+            Exception: The last connection error when every endpoint is down.
+        """
+        skipped, tried, lagging = [], set(), []
+        last_error = None
+        for tier in self._tiers + [self.endpoints]:
+            # The extra last tier retries endpoints marked down: better a slow
+            # failure than refusing while one of them may have recovered.
+            ignore_down = tier is self.endpoints
+            while True:
+                now = time.monotonic()
+                choices = [e for e in tier if id(e) not in tried and (ignore_down or e.down_until <= now)]
+                if not choices:
+                    break
+                endpoint = random.choices(choices, weights=[e.weight for e in choices])[0]
+                tried.add(id(endpoint))
+                try:
+                    connection, wait = endpoint.pool.acquire()
+                except PoolTimeoutError as e:
+                    skipped.append((endpoint.name, "pool exhausted"))
+                    last_error = e
+                    continue
+                except Exception as e:
+                    self._mark_down(endpoint, e)
+                    skipped.append((endpoint.name, "unreachable"))
+                    last_error = e
+                    continue
+                lag = self._check_lag(endpoint, connection)
+                if self.max_lag and lag is not None and lag > self.max_lag:
+                    endpoint.pool.release(connection)
+                    reason = "replication stopped" if math.isinf(lag) else f"lag {lag:.0f}s > {self.max_lag:.0f}s"
+                    skipped.append((endpoint.name, reason))
+                    lagging.append(endpoint)
+                    continue
+                return self._routed(Route(endpoint, connection, wait, skipped))
+
+        for endpoint in sorted(lagging, key=lambda e: e.lag):
+            try:
+                connection, wait = endpoint.pool.acquire()
+            except Exception as e:
+                last_error = e
+                continue
+            skipped = [entry for entry in skipped if entry[0] != endpoint.name]
+            return self._routed(Route(endpoint, connection, wait, skipped, lag_exceeded=True))
+        if last_error is not None:
+            raise last_error
+        raise NoEndpointError("No MySQL endpoint is configured for reads.")
+
+    def release(self, route: Route, discard: bool = False, failed: bool = False):
+        """
+        Returns the connection of a route. `failed` marks its endpoint down
+        (a connection-level error), so the next calls fail over.
+        """
+        route.endpoint.pool.release(route.connection, discard=discard or failed)
+        if failed:
+            self._mark_down(route.endpoint, None)
+
+    def stats(self) -> dict:
+        """Returns the state and pool counters of every endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint.name: {
+                    "role": endpoint.role,
+                    "weight": endpoint.weight,
+                    "healthy": endpoint.down_until <= now,
+                    "lag_seconds": endpoint.lag if endpoint.lag is None or math.isfinite(endpoint.lag) else -1,
+                    "routed": endpoint.routed,
+                    "failures": endpoint.failures,
+                    "last_error": endpoint.last_error,
+                    **endpoint.pool.stats(),
+                }
+                for endpoint in self.endpoints
+            }
+
+    def pool_stats(self) -> dict:
+        """Returns the pool counters summed over every endpoint."""
+        per_pool = [endpoint.pool.stats() for endpoint in self.endpoints]
+        totals = {key: sum(stats[key] for stats in per_pool)
+                  for key in ("pool_size", "max_overflow", "open", "idle", "borrows", "reconnects", "wait_total_ms")}
+        totals["wait_avg_ms"] = round(totals["wait_total_ms"] / totals["borrows"], 3) if totals["borrows"] else 0.0
+        totals["wait_max_ms"] = max(stats["wait_max_ms"] for stats in per_pool)
+        totals["endpoints"] = len(per_pool)
+        totals["failovers"] = self.failovers
+        return totals
+
+    # --- Internal helpers ---
+
+    def _routed(self, route: Route) -> Route:
+        with self._lock:
+            route.endpoint.failures = 0
+            route.endpoint.down_until = 0.0
+            route.endpoint.routed += 1
+            if route.skipped:
+                self.failovers += 1
+        return route
+
+    def _mark_down(self, endpoint: Endpoint, error):
+        with self._lock:
+            endpoint.failures += 1
+            backoff = self.retry_seconds * 2 ** min(endpoint.failures - 1, 4)
+            endpoint.down_until = time.monotonic() + backoff
+            if error is not None:
+                endpoint.last_error = str(error)
+
+    def _check_lag(self, endpoint: Endpoint, connection):
+        """Returns the endpoint's last known lag, re-reading it when the check is due."""
+        if endpoint.role == "primary" or not self.max_lag:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            due = endpoint.lag_checked_at is None or now - endpoint.lag_checked_at >= self.check_interval
+            if due:
+                endpoint.lag_checked_at = now  # Claimed: concurrent calls use the previous value.
+        if due:
+            endpoint.lag = read_replica_lag(connection)
+        return endpoint.lag
@@ -0,0 +1,228 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# sqltext.py
+# Lightweight, dependency-free helpers for inspecting and rewriting SQL text.
+import re
+
+# Quoted strings and identifiers are kept verbatim; everything else is split
+# into words, numbers, whitespace and single punctuation characters.
+_TOKEN_RE = re.compile(
+    r"""(?P<quoted>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)"""
+    r"""|(?P<comment>--[^\n]*|#[^\n]*|/\*.*?\*/)"""
+    r"""|(?P<space>\s+)"""
+    r"""|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"""
+    r"""|(?P<other>.)""",
+    re.DOTALL,
+)
+
+_KEYWORDS = {
+    "ALL", "AND", "AS", "ASC", "AVG", "BETWEEN", "BY", "CASE", "CAST", "COUNT", "CROSS",
+    "DESC", "DISTINCT", "ELSE", "END", "EXISTS", "FROM", "FULL", "GROUP", "HAVING", "IN",
+    "INNER", "IS", "JOIN", "LEFT", "LIKE", "LIMIT", "MAX", "MIN", "NOT", "NULL", "OFFSET",
+    "ON", "OR", "ORDER", "OUTER", "OVER", "PARTITION", "RECURSIVE", "RIGHT", "ROUND",
+    "SELECT", "SUM", "THEN", "UNION", "USING", "WHEN", "WHERE", "WITH",
+}
+
+# Statements containing these are never cached (side effects or volatile output).
+# The words are volatile on their own (CURRENT_DATE needs no parentheses); the
+# functions only when called, so a `user` or `now` column doesn't count.
+_UNCACHEABLE_WORDS = {
+    "INTO", "UPDATE", "SHARE", "LOCK", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP",
+    "LOCALTIME", "LOCALTIMESTAMP", "UTC_DATE", "UTC_TIME", "UTC_TIMESTAMP", "CURRENT_USER",
+}
+_UNCACHEABLE_FUNCTIONS = {
+    "NOW", "SYSDATE", "CURDATE", "CURTIME", "UNIX_TIMESTAMP", "RAND", "UUID", "UUID_SHORT",
+    "CONNECTION_ID", "LAST_INSERT_ID", "FOUND_ROWS", "SLEEP", "GET_LOCK", "USER",
+    "SESSION_USER", "SYSTEM_USER",
+}
+
+# Words that can follow a table name and are not its alias.
+_NOT_ALIAS = (
+    r"(?!(?:JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL|STRAIGHT_JOIN|FULL|OUTER|ON|USING|WHERE|GROUP|"
+    r"HAVING|ORDER|LIMIT|UNION|WINDOW|FOR|LOCK|INTO|PARTITION|USE|IGNORE|FORCE)\b)"
+)
+_TABLE_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+((?:`[^`]+`|\w+)(?:\.(?:`[^`]+`|\w+))?"
+    r"(?:\s+(?:AS\s+)?" + _NOT_ALIAS + r"\w+)?(?:\s*,\s*(?:`[^`]+`|\w+)(?:\.(?:`[^`]+`|\w+))?"
+    r"(?:\s+(?:AS\s+)?" + _NOT_ALIAS + r"\w+)?)*)",
+    re.IGNORECASE,
+)
+
+
+def tokenize_sql(sql: str):
+    """Yields (kind, text) tokens; kind is quoted, comment, space, word or other."""
+    for match in _TOKEN_RE.finditer(sql):
+        yield match.lastgroup, match.group()
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalizes SQL text so trivially different spellings share a cache entry:
+    comments are dropped, whitespace is collapsed, keywords are upper-cased and
+    trailing semicolons removed. Quoted literals and identifiers are untouched.
+    """
+    parts = []
+    pending_space = False
+    for kind, text in tokenize_sql(sql):
+        if kind in ("space", "comment"):
+            pending_space = bool(parts)
+            continue
+        if kind == "word" and text.upper() in _KEYWORDS:
+            text = text.upper()
+        if pending_space:
+            parts.append(" ")
+            pending_space = False
+        parts.append(text)
+    normalized = "".join(parts)
+    while normalized.endswith(";"):
+        normalized = normalized[:-1].rstrip()
+    return normalized
+
+
+def is_cacheable(normalized_sql: str) -> bool:
+    """Returns True for a single, deterministic SELECT (or WITH ... SELECT) statement."""
+    tokens = [(kind, text) for kind, text in tokenize_sql(normalized_sql) if kind not in ("space", "comment")]
+    words = [text.upper() for kind, text in tokens if kind == "word"]
+    if not words or words[0] not in ("SELECT", "WITH"):
+        return False
+    if ("other", ";") in tokens:
+        return False  # Multiple statements.
+    calls = {
+        text.upper() for (kind, text), following in zip(tokens, tokens[1:] + [("", "")])
+        if kind == "word" and following == ("other", "(")
+    }
+    return not (_UNCACHEABLE_WORDS.intersection(words) or _UNCACHEABLE_FUNCTIONS.intersection(calls))
+
+
+def referenced_tables(normalized_sql: str) -> list:
+    """
+    Extracts the table names following FROM/JOIN (including comma joins).
+    Best effort: CTE names are returned too and simply never match a real table.
+    """
+    tables = set()
+    for match in _TABLE_RE.finditer(_table_scope_text(normalized_sql)):
+        for item in match.group(1).split(","):
+            name = item.strip().split()[0].split(".")[-1].strip("`")
+            if name.upper() not in ("SELECT", "LATERAL", "DUAL") and not name.isdigit():
+                tables.add(name)
+    return sorted(tables)
+
+
+def _table_scope_text(sql: str) -> str:
+    """
+    Returns the statement with string literals blanked and the FROM/JOIN words
+    that don't introduce tables masked: those inside function arguments such
+    as EXTRACT(YEAR FROM d), SUBSTRING(s FROM 1 FOR 3) or TRIM(x FROM s). A
+    parenthesis opens a table scope when it starts a (sub)query or follows
+    FROM/JOIN; at depth 0 the statement itself is the scope.
+    """
+    parts = []
+    scopes = [True]  # One entry per open parenthesis: do FROM/JOIN name tables there?
+    previous = ""
+    opened = False  # The previous significant token was "(".
+    for kind, value in tokenize_sql(sql):
+        if kind in ("space", "comment"):
+            parts.append(value)
+            continue
+        word = value.upper() if kind == "word" else ""
+        if opened and word in ("SELECT", "WITH"):
+            scopes[-1] = True
+        if value == "(" and kind == "other":
+            scopes.append(previous in ("FROM", "JOIN"))
+        elif value == ")" and kind == "other" and len(scopes) > 1:
+            scopes.pop()
+        elif word in ("FROM", "JOIN") and not scopes[-1]:
+            value, word = "''", ""
+        elif kind == "quoted" and value[0] in "'\"":
+            value = "''"
+        opened = value == "(" and kind == "other"
+        previous = word or value
+        parts.append(value)
+    return "".join(parts)
+
+
+def statement_verb(sql: str) -> str:
+    """
+    Returns the upper-cased keyword of the main statement: its first word, or
+    for WITH ... the first word after the common table expressions ("" if
+    there is none), e.g. DELETE for "WITH x AS (SELECT 1) DELETE FROM t".
+    """
+    tokens = [(kind, text) for kind, text in tokenize_sql(sql) if kind not in ("space", "comment")]
+    first = next((text.upper() for kind, text in tokens if kind == "word"), "")
+    if first != "WITH":
+        return first
+    # WITH [RECURSIVE] name [(columns)] AS (...) [, name AS (...)] statement:
+    # the statement starts at the first token after a closing parenthesis at
+    # depth 0 that is neither AS nor a comma.
+    depth = 0
+    closed = False
+    for index, (kind, text) in enumerate(tokens):
+        if closed and text != "," and text.upper() != "AS":
+            # A parenthesized statement ("(SELECT ...)") is named by its first word.
+            return next((word.upper() for kind, word in tokens[index:] if kind == "word"), "")
+        if kind == "other":
+            depth += (text == "(") - (text == ")")
+        closed = depth == 0 and text == ")"
+    return ""
+
+
+def is_select(sql: str) -> bool:
+    """Returns True if the statement is a query (SELECT or WITH ... SELECT)."""
+    return statement_verb(sql) == "SELECT"
+
+
+def add_execution_limits(sql: str, max_execution_ms: int = 0, row_limit: int = 0) -> str:
+    """
+    Rewrites a SELECT so the server enforces limits on it: a MAX_EXECUTION_TIME
+    optimizer hint on the top-level SELECT, and an outer LIMIT when the
+    statement has none at the top level.
+
+    Args:
+        sql (str): A single SELECT or WITH ... SELECT statement.
+        max_execution_ms (int): Value for the MAX_EXECUTION_TIME hint; 0 skips it.
+        row_limit (int): LIMIT appended when missing; 0 skips it.
+
+    Returns:
+        str: The rewritten statement (without a trailing semicolon).
+    """
+    tokens = list(tokenize_sql(sql.strip()))
+    while tokens and (tokens[-1][0] in ("space", "comment") or tokens[-1][1] == ";"):
+        tokens.pop()
+
+    depth = 0
+    main_select = None
+    top_level_words = set()
+    has_hint = False
+    for index, (kind, text) in enumerate(tokens):
+        if kind == "other":
+            depth += text == "("
+            depth -= text == ")"
+        elif kind == "word" and depth == 0:
+            word = text.upper()
+            top_level_words.add(word)
+            if word == "SELECT" and main_select is None:
+                main_select = index
+        elif kind == "comment" and "MAX_EXECUTION_TIME" in text.upper():
+            has_hint = True
+
+    parts = [text for _, text in tokens]
+    if max_execution_ms and main_select is not None and not has_hint:
+        parts[main_select] += f" /*+ MAX_EXECUTION_TIME({int(max_execution_ms)}) */"
+    # Without a top-level SELECT (WITH ... DELETE) there is no query to limit.
+    if row_limit and main_select is not None and not top_level_words.intersection(
+        ("LIMIT", "INTO", "FOR", "LOCK", "PROCEDURE")
+    ):
+        parts.append(f" LIMIT {int(row_limit)}")
+    return "".join(parts)
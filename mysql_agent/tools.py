@@ -14,13 +14,25 @@
 
 # tools.py
 import os
-import mysql.connector
-from mysql.connector import Error
-from dotenv import load_dotenv
-import datetime # Import required for handling date/time objects
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Load environment variables from the .env file
-load_dotenv()
+from .cache import InMemoryBackend, RedisBackend, ResultCache, TableVersions, cache_key
+from .formatting import OUTPUT_FORMATS, format_rows
+from .results import ResultStore
+from .pool import ConnectionPool, PoolTimeoutError, is_connection_error
+from .routing import Endpoint, EndpointRouter, NoEndpointError, parse_endpoints
+from .guard import check_plan, explain_plan
+from .metrics import MetricsRegistry, ToolInstruments
+from .sqltext import add_execution_limits, is_cacheable, is_select, normalize_sql, referenced_tables
+from .validation import SchemaSnapshot, SQLValidator, check_identifiers, check_statement
+
+# Environment variables from the .env file are loaded by the package __init__.
+
+logger = logging.getLogger(__name__)
 
 # --- MySQL Connection Details (from .env) ---
 MYSQL_HOST = os.environ.get("MYSQL_HOST")
@@ -28,89 +40,1034 @@ MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE")
 MYSQL_USER = os.environ.get("MYSQL_USER")
 MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD")
 
+# --- Connection Pool Settings (optional, from .env) ---
+MYSQL_POOL_SIZE = int(os.environ.get("MYSQL_POOL_SIZE", "5"))
+MYSQL_POOL_MAX_OVERFLOW = int(os.environ.get("MYSQL_POOL_MAX_OVERFLOW", "5"))
+MYSQL_POOL_RECYCLE_SECONDS = float(os.environ.get("MYSQL_POOL_RECYCLE_SECONDS", "1800"))
+MYSQL_POOL_TIMEOUT_SECONDS = float(os.environ.get("MYSQL_POOL_TIMEOUT_SECONDS", "30"))
+
+# --- Read Routing (optional, from .env) ---
+# Comma-separated read endpoints as host[:port][=weight], e.g.
+# "replica-1=3,replica-2:3307=1". Each gets its own pool of MYSQL_POOL_SIZE
+# connections and shares the credentials/database above. When empty, every
+# query goes to MYSQL_HOST. MYSQL_PRIMARY_READS controls whether MYSQL_HOST
+# also serves reads: "never", "fallback" (only when no replica is usable) or
+# "always" (weighted by MYSQL_PRIMARY_WEIGHT). Replicas behind by more than
+# MYSQL_REPLICA_MAX_LAG_SECONDS (checked every MYSQL_HEALTH_CHECK_SECONDS) are
+# skipped; unreachable endpoints are skipped for MYSQL_ENDPOINT_RETRY_SECONDS.
+MYSQL_READ_ENDPOINTS = os.environ.get("MYSQL_READ_ENDPOINTS", "")
+MYSQL_PRIMARY_READS = os.environ.get("MYSQL_PRIMARY_READS", "never").lower()
+MYSQL_PRIMARY_WEIGHT = float(os.environ.get("MYSQL_PRIMARY_WEIGHT", "1"))
+MYSQL_REPLICA_MAX_LAG_SECONDS = float(os.environ.get("MYSQL_REPLICA_MAX_LAG_SECONDS", "30"))
+MYSQL_HEALTH_CHECK_SECONDS = float(os.environ.get("MYSQL_HEALTH_CHECK_SECONDS", "5"))
+MYSQL_ENDPOINT_RETRY_SECONDS = float(os.environ.get("MYSQL_ENDPOINT_RETRY_SECONDS", "10"))
+
+# --- Result Size Limits (optional, from .env) ---
+# A tool call never reads more than this many rows / approximate bytes of data.
+MYSQL_MAX_RESULT_ROWS = int(os.environ.get("MYSQL_MAX_RESULT_ROWS", "1000"))
+MYSQL_MAX_RESULT_BYTES = int(os.environ.get("MYSQL_MAX_RESULT_BYTES", str(1024 * 1024)))
+MYSQL_FETCH_BATCH_SIZE = int(os.environ.get("MYSQL_FETCH_BATCH_SIZE", "500"))
+
+# --- Result Format (optional, from .env) ---
+# Default encoding of results sent to the model ("markdown", "tsv", "csv",
+# "json", "summary" or "auto") and the default token budget (0 = no budget).
+MYSQL_RESULT_FORMAT = os.environ.get("MYSQL_RESULT_FORMAT", "markdown")
+MYSQL_RESULT_TOKEN_BUDGET = int(os.environ.get("MYSQL_RESULT_TOKEN_BUDGET", "0"))
+
+# --- Result Cache (optional, from .env) ---
+# Repeated SELECTs are answered from cache until the TTL expires or the
+# UPDATE_TIME of a referenced table moves. Set MYSQL_CACHE_BACKEND=redis and
+# MYSQL_CACHE_REDIS_URL to share the cache between replicas.
+MYSQL_CACHE_ENABLED = os.environ.get("MYSQL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MYSQL_CACHE_BACKEND = os.environ.get("MYSQL_CACHE_BACKEND", "memory")
+MYSQL_CACHE_REDIS_URL = os.environ.get("MYSQL_CACHE_REDIS_URL", "redis://localhost:6379/0")
+MYSQL_CACHE_TTL_SECONDS = float(os.environ.get("MYSQL_CACHE_TTL_SECONDS", "300"))
+MYSQL_CACHE_MAX_ENTRIES = int(os.environ.get("MYSQL_CACHE_MAX_ENTRIES", "256"))
+MYSQL_CACHE_MAX_BYTES = int(os.environ.get("MYSQL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+MYSQL_CACHE_VERSION_CHECK_SECONDS = float(os.environ.get("MYSQL_CACHE_VERSION_CHECK_SECONDS", "1"))
+
+# --- Query Guard (optional, from .env) ---
+# Every SELECT gets a MAX_EXECUTION_TIME hint and, when it has none, an outer
+# LIMIT. Before running, EXPLAIN FORMAT=JSON estimates its cost and queries
+# above the thresholds are rejected with suggestions (0 disables a threshold).
+MYSQL_GUARD_ENABLED = os.environ.get("MYSQL_GUARD_ENABLED", "true").lower() in ("1", "true", "yes")
+MYSQL_GUARD_MAX_ROWS_EXAMINED = int(os.environ.get("MYSQL_GUARD_MAX_ROWS_EXAMINED", "10000000"))
+MYSQL_GUARD_MAX_COST = float(os.environ.get("MYSQL_GUARD_MAX_COST", "0"))
+MYSQL_MAX_EXECUTION_TIME_MS = int(os.environ.get("MYSQL_MAX_EXECUTION_TIME_MS", "30000"))
+# One row past the result budget, so truncation is still detected and a
+# truncated read leaves nothing unread on the connection, which is reused.
+MYSQL_AUTO_LIMIT = int(os.environ.get("MYSQL_AUTO_LIMIT", str(MYSQL_MAX_RESULT_ROWS + 1)))
+
+# --- Local Validation (optional, from .env) ---
+# Statements are parsed in-process (with sqlglot) and their
+# table/column names resolved against a snapshot of information_schema, so
+# non-SELECT statements, syntax errors and unknown names are rejected without
+# reaching MySQL. The snapshot is refreshed after MYSQL_SCHEMA_TTL_SECONDS.
+MYSQL_VALIDATION_ENABLED = os.environ.get("MYSQL_VALIDATION_ENABLED", "true").lower() in ("1", "true", "yes")
+MYSQL_SCHEMA_TTL_SECONDS = float(os.environ.get("MYSQL_SCHEMA_TTL_SECONDS", "300"))
+MYSQL_PARSE_CACHE_SIZE = int(os.environ.get("MYSQL_PARSE_CACHE_SIZE", "512"))
+
+# --- Query Timeout (optional, from .env) ---
+# Per-call deadline in seconds (0 = none). When it expires, the running
+# statement is cancelled with KILL QUERY from a side connection.
+MYSQL_QUERY_TIMEOUT_SECONDS = float(os.environ.get("MYSQL_QUERY_TIMEOUT_SECONDS", "60"))
+
+# Upper bound on queries running at once in this process (async tool only).
+MYSQL_MAX_CONCURRENT_QUERIES = int(
+    os.environ.get("MYSQL_MAX_CONCURRENT_QUERIES", str(MYSQL_POOL_SIZE + MYSQL_POOL_MAX_OVERFLOW))
+)
+
+# --- Batch Tool (optional, from .env) ---
+# Statements accepted per query_mysql_batch call, how many of them run at once,
+# and the deadline for the whole batch in seconds (0 = none).
+MYSQL_BATCH_MAX_QUERIES = int(os.environ.get("MYSQL_BATCH_MAX_QUERIES", "8"))
+MYSQL_BATCH_CONCURRENCY = int(os.environ.get("MYSQL_BATCH_CONCURRENCY", "4"))
+MYSQL_BATCH_TIMEOUT_SECONDS = float(
+    os.environ.get("MYSQL_BATCH_TIMEOUT_SECONDS", str(MYSQL_QUERY_TIMEOUT_SECONDS))
+)
+
+# --- Result Handles (optional, from .env) ---
+# query_mysql(page_size=N) keeps up to MYSQL_RESULT_STORE_MAX_ROWS rows of a
+# large result behind a handle, so fetch_result_page serves the next pages
+# (or sorted/filtered views) without querying MySQL again. Handles belong to
+# one session and expire after MYSQL_RESULT_HANDLE_TTL_SECONDS unused.
+# Results above MYSQL_RESULT_SPILL_BYTES are kept in files under
+# MYSQL_RESULT_SPILL_DIR (a temporary directory by default).
+MYSQL_RESULT_STORE_MAX_ROWS = int(os.environ.get("MYSQL_RESULT_STORE_MAX_ROWS", "100000"))
+MYSQL_RESULT_HANDLE_TTL_SECONDS = float(os.environ.get("MYSQL_RESULT_HANDLE_TTL_SECONDS", "1800"))
+MYSQL_RESULT_HANDLES_PER_SESSION = int(os.environ.get("MYSQL_RESULT_HANDLES_PER_SESSION", "16"))
+MYSQL_RESULT_SESSION_BYTES = int(os.environ.get("MYSQL_RESULT_SESSION_BYTES", str(64 * 1024 * 1024)))
+MYSQL_RESULT_MEMORY_BYTES = int(os.environ.get("MYSQL_RESULT_MEMORY_BYTES", str(128 * 1024 * 1024)))
+MYSQL_RESULT_SPILL_BYTES = int(os.environ.get("MYSQL_RESULT_SPILL_BYTES", str(1024 * 1024)))
+MYSQL_RESULT_SPILL_DIR = os.environ.get("MYSQL_RESULT_SPILL_DIR", "")
+MYSQL_RESULT_DISK_BYTES = int(os.environ.get("MYSQL_RESULT_DISK_BYTES", str(1024 * 1024 * 1024)))
 
-def _serialize_rows(rows: list) -> list:
+# --- Metrics (optional, from .env) ---
+# Phase timings, outcomes and result sizes of every tool call, exported in the
+# Prometheus text format to a file (rewritten every MYSQL_METRICS_FILE_INTERVAL
+# seconds) and/or at http://<host>:MYSQL_METRICS_PORT/metrics, and optionally
+# as OpenTelemetry spans. Calls slower than MYSQL_SLOW_QUERY_SECONDS are logged
+# as JSON lines to MYSQL_SLOW_QUERY_LOG (or the "mysql_agent.slow_query" logger).
+MYSQL_METRICS_ENABLED = os.environ.get("MYSQL_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+MYSQL_METRICS_FILE = os.environ.get("MYSQL_METRICS_FILE", "")
+MYSQL_METRICS_FILE_INTERVAL = float(os.environ.get("MYSQL_METRICS_FILE_INTERVAL", "15"))
+MYSQL_METRICS_PORT = int(os.environ.get("MYSQL_METRICS_PORT", "0"))
+MYSQL_METRICS_OTEL = os.environ.get("MYSQL_METRICS_OTEL", "false").lower() in ("1", "true", "yes")
+MYSQL_SLOW_QUERY_SECONDS = float(os.environ.get("MYSQL_SLOW_QUERY_SECONDS", "0"))
+MYSQL_SLOW_QUERY_LOG = os.environ.get("MYSQL_SLOW_QUERY_LOG", "")
+
+# The MySQL driver is imported on the first connection rather than with the
+# package, which keeps it out of the agent's cold start. `Error` is rebound to
+# mysql.connector.Error at that point; no driver error can be raised before it.
+class Error(Exception):
+    """Placeholder for mysql.connector.Error until the driver is imported."""
+
+
+_mysql_connector = None
+
+
+def _driver():
     """
-    Internal helper to iterate through rows and convert non-serializable
-    types (like date/datetime) to strings in ISO format.
+    Returns the `mysql.connector` module, importing it on first use.
     """
-    serialized_rows = []
-    for row in rows:
-        serialized_row = {}
-        for key, value in row.items():
-            if isinstance(value, (datetime.datetime, datetime.date)):
-                serialized_row[key] = value.isoformat()
-            else:
-                serialized_row[key] = value
-        serialized_rows.append(serialized_row)
-    return serialized_rows
+    global _mysql_connector, Error
+    if _mysql_connector is None:
+        import mysql.connector
+        Error = mysql.connector.Error
+        _mysql_connector = mysql.connector
+    return _mysql_connector
+
+
+_router = None
+_pool_lock = threading.Lock()
+_executor = None
+_cache = None
+_table_versions = TableVersions(MYSQL_CACHE_VERSION_CHECK_SECONDS)
+_validator = SQLValidator(MYSQL_PARSE_CACHE_SIZE)
+_schema = SchemaSnapshot(MYSQL_SCHEMA_TTL_SECONDS)
+_results = ResultStore(
+    ttl=MYSQL_RESULT_HANDLE_TTL_SECONDS, max_handles=MYSQL_RESULT_HANDLES_PER_SESSION,
+    session_bytes=MYSQL_RESULT_SESSION_BYTES, memory_bytes=MYSQL_RESULT_MEMORY_BYTES,
+    spill_bytes=MYSQL_RESULT_SPILL_BYTES, disk_bytes=MYSQL_RESULT_DISK_BYTES, spill_dir=MYSQL_RESULT_SPILL_DIR,
+)
+_metrics = MetricsRegistry() if MYSQL_METRICS_ENABLED else None
+_instruments = ToolInstruments(
+    _metrics, slow_query_seconds=MYSQL_SLOW_QUERY_SECONDS, slow_query_log=MYSQL_SLOW_QUERY_LOG,
+    otel=MYSQL_METRICS_OTEL,
+)
+
+
+def _connect(**endpoint):
+    """
+    Opens a new MySQL connection for a pool.
+
+    Args:
+        **endpoint: host (default MYSQL_HOST) and optionally port of the server.
+    """
+    endpoint.setdefault("host", MYSQL_HOST)
+    connection = _driver().connect(
+        **endpoint, database=MYSQL_DATABASE, user=MYSQL_USER, password=MYSQL_PASSWORD
+    )
+    try:
+        # MySQL 8 caches information_schema statistics (UPDATE_TIME included) for
+        # a day by default; the result cache needs live values. Older servers
+        # and MariaDB don't have the variable, which is fine.
+        cursor = connection.cursor()
+        cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        cursor.close()
+    except Error:
+        pass
+    return connection
+
+
+def _endpoint_pool(endpoint: Endpoint) -> ConnectionPool:
+    """
+    Creates the connection pool of one read endpoint.
+    """
+    return ConnectionPool(
+        lambda: _connect(**endpoint.connect_params),
+        pool_size=MYSQL_POOL_SIZE,
+        max_overflow=MYSQL_POOL_MAX_OVERFLOW,
+        recycle_seconds=MYSQL_POOL_RECYCLE_SECONDS,
+        pool_timeout=MYSQL_POOL_TIMEOUT_SECONDS,
+    )
+
+
+def _get_router() -> EndpointRouter:
+    """
+    Returns the process-wide router over the read endpoints (and their
+    connection pools), creating it on first use.
+    """
+    global _router
+    if _router is None:
+        with _pool_lock:
+            if _router is None:
+                replicas = [Endpoint(host, port, weight)
+                            for host, port, weight in parse_endpoints(MYSQL_READ_ENDPOINTS)]
+                _router = EndpointRouter(
+                    _endpoint_pool,
+                    Endpoint(MYSQL_HOST, weight=MYSQL_PRIMARY_WEIGHT, role="primary"),
+                    replicas,
+                    primary_reads=MYSQL_PRIMARY_READS,
+                    max_lag=MYSQL_REPLICA_MAX_LAG_SECONDS,
+                    check_interval=MYSQL_HEALTH_CHECK_SECONDS,
+                    retry_seconds=MYSQL_ENDPOINT_RETRY_SECONDS,
+                )
+                _start_metrics_export()
+    return _router
+
+
+def _get_cache():
+    """
+    Returns the process-wide result cache, or None when caching is disabled.
+    """
+    global _cache
+    if _cache is None and MYSQL_CACHE_ENABLED:
+        with _pool_lock:
+            if _cache is None:
+                backend = None
+                if MYSQL_CACHE_BACKEND == "redis":
+                    try:
+                        backend = RedisBackend(MYSQL_CACHE_REDIS_URL)
+                    except Exception as e:
+                        logger.warning("Could not create the Redis result cache; using the in-process one: %s", e)
+                if backend is None:
+                    backend = InMemoryBackend(MYSQL_CACHE_MAX_ENTRIES, MYSQL_CACHE_MAX_BYTES)
+                _cache = ResultCache(backend, ttl=MYSQL_CACHE_TTL_SECONDS)
+    return _cache
+
+
+def _kill_query(connection_id: int, endpoint: Endpoint = None):
+    """
+    Cancels the statement running on `connection_id` from a separate connection
+    to the same server (`endpoint`, default MYSQL_HOST).
+    """
+    side = None
+    try:
+        side = _driver().connect(
+            **(endpoint.connect_params if endpoint else {"host": MYSQL_HOST}),
+            database=MYSQL_DATABASE, user=MYSQL_USER, password=MYSQL_PASSWORD,
+            connection_timeout=10,
+        )
+        cursor = side.cursor()
+        cursor.execute(f"KILL QUERY {int(connection_id)}")
+        cursor.close()
+    except Error as e:
+        logger.warning("Could not cancel query on connection %s: %s", connection_id, e)
+    finally:
+        if side is not None:
+            side.close()
+
+
+class _QueryDeadline:
+    """
+    Cancels the statement running on a connection when a per-call deadline
+    expires. Works the same for buffered and streaming reads: the blocked
+    execute/fetch call fails once the server interrupts the statement.
+
+    The deadline counts from its creation, but the cancellation timer only
+    starts with `arm()`, right before the statement is sent: a KILL QUERY
+    fired earlier would hit a helper statement (EXPLAIN, version lookups) and
+    leave the statement itself without a deadline.
+    """
+
+    def __init__(self, connection, timeout: float, endpoint: Endpoint = None):
+        self.connection_id = getattr(connection, "connection_id", None)
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.expired = False
+        self.started = time.monotonic()
+        self._done = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def arm(self) -> bool:
+        """
+        Starts the cancellation timer for the time left of the deadline.
+
+        Returns:
+            bool: False (and `expired` set) if no time is left to run the statement.
+        """
+        if not self.timeout or self.timeout <= 0 or self.connection_id is None:
+            return True
+        remaining = self.timeout - self.elapsed
+        if remaining <= 0:
+            self.expired = True
+            return False
+        self._timer = threading.Timer(remaining, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+        return True
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def finish(self):
+        """Marks the statement as done; a pending cancellation no longer fires."""
+        with self._lock:
+            self._done = True
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def _expire(self):
+        # The lock keeps the kill from racing with finish(): once the statement
+        # is done, the connection may be reused and must not be killed.
+        with self._lock:
+            if self._done:
+                return
+            self.expired = True
+            _kill_query(self.connection_id, self.endpoint)
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns hit/miss/stale counters and size of the result cache.
+    """
+    if _cache is None:
+        return {}
+    return _cache.stats()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the bounded executor used to run blocking queries off the event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MYSQL_MAX_CONCURRENT_QUERIES, thread_name_prefix="mysql_query"
+                )
+    return _executor
+
+
+def get_pool_stats() -> dict:
+    """
+    Returns usage counters (borrows, reconnects, wait times) of the connection
+    pools, summed over the read endpoints.
+    """
+    if _router is None:
+        return {}
+    return _router.pool_stats()
+
+
+def get_routing_stats() -> dict:
+    """
+    Returns per-endpoint health, lag, routed calls and pool counters.
+    """
+    if _router is None:
+        return {}
+    return _router.stats()
+
+
+def get_schema_fingerprint() -> str:
+    """
+    Returns a hash of the table and column names of the database, from the
+    schema snapshot also used by validation (reloaded once it is older than
+    MYSQL_SCHEMA_TTL_SECONDS). Returns "" if the schema can't be read.
+    """
+    if _schema.age < _schema.ttl:
+        return _schema.fingerprint
+    if not all([MYSQL_HOST, MYSQL_DATABASE, MYSQL_USER, MYSQL_PASSWORD]):
+        return ""
+    router = _get_router()
+    try:
+        route = router.acquire()
+    except (PoolTimeoutError, NoEndpointError, Error):
+        return ""
+    failed = False
+    try:
+        return _schema.get(route.connection).fingerprint
+    except Error as e:
+        failed = is_connection_error(e)
+        return ""
+    finally:
+        router.release(route, failed=failed)
+
+
+def get_result_store_stats() -> dict:
+    """
+    Returns handle counts, memory/disk usage and eviction counters of the result store.
+    """
+    return _results.stats()
+
+
+def get_validation_stats() -> dict:
+    """
+    Returns parser and parse-cache counters of the local SQL validation.
+    """
+    stats = _validator.stats()
+    stats["schema_tables"] = len(_schema.tables)
+    return stats
+
+
+def _collect_gauges():
+    """
+    Internal helper exposing the pool, routing, cache, validation and result
+    store counters as gauges in the metrics export.
+    """
+    families = []
+    for prefix, stats in (("pool", get_pool_stats()), ("cache", get_cache_stats()),
+                          ("validation", get_validation_stats()), ("results", get_result_store_stats())):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                families.append((f"{prefix}_{key}", f"{prefix} stat '{key}'.", "gauge", [({}, value)]))
+    endpoints = get_routing_stats()
+    for key in ("healthy", "lag_seconds", "routed", "failures", "open", "borrows"):
+        samples = [({"endpoint": name, "role": stats["role"]}, float(stats[key]))
+                   for name, stats in endpoints.items() if stats[key] is not None]
+        if samples:
+            families.append((f"endpoint_{key}", f"Read endpoint stat '{key}'.", "gauge", samples))
+    return families
+
+
+def _start_metrics_export():
+    """
+    Starts the metrics file writer and HTTP endpoint, if configured. Called once,
+    when the connection pool is created, so importing the package starts nothing.
+    """
+    if _metrics is None:
+        return
+    _metrics.register_collector(_collect_gauges)
+    if MYSQL_METRICS_FILE:
+        _metrics.start_file_writer(MYSQL_METRICS_FILE, MYSQL_METRICS_FILE_INTERVAL)
+    if MYSQL_METRICS_PORT:
+        try:
+            _metrics.start_http_server(MYSQL_METRICS_PORT)
+        except OSError as e:
+            logger.warning("Could not serve metrics on port %s: %s", MYSQL_METRICS_PORT, e)
+
+
+def get_metrics_text() -> str:
+    """
+    Returns the tool metrics in the Prometheus text format ("" when disabled).
+    """
+    if _metrics is None:
+        return ""
+    return _metrics.render_prometheus()
 
 
-def _json_to_markdown_table(data_list: list) -> str:
+def _check_identifiers(connection, parsed):
     """
-    Internal helper to convert a list of dictionaries into a Markdown formatted table.
+    Internal helper that resolves table/column names against the cached schema
+    snapshot. A rejection based on a snapshot older than a few seconds is
+    re-checked against a fresh one, so newly created tables/columns still pass.
     """
-    if not data_list:
-        return "No results found."
+    try:
+        rejection = check_identifiers(parsed, _schema.get(connection))
+        if rejection is not None and _schema.age > 5:
+            rejection = check_identifiers(parsed, _schema.get(connection, refresh=True))
+    except Error:
+        return None  # No snapshot available; the server reports any problem itself.
+    return rejection
+
 
-    # Use the keys from the first dictionary as headers
-    headers = data_list[0].keys()
-    header_row = "| " + " | ".join(map(str, headers)) + " |"
-    separator_row = "| " + " | ".join(["---"] * len(headers)) + " |"
-    
-    # Create data rows
-    data_rows = []
-    for row_dict in data_list:
-        # Ensure values are retrieved in the same order as headers
-        row_values = [str(row_dict.get(header, '')) for header in headers]
-        data_rows.append("| " + " | ".join(row_values) + " |")
-        
-    return "\n".join([header_row, separator_row] + data_rows)
+def _session_id(tool_context) -> str:
+    """
+    Internal helper returning the ADK session id of a tool call, which scopes
+    result handles ("default" outside ADK).
+    """
+    invocation = getattr(tool_context, "_invocation_context", None)
+    session = getattr(tool_context, "session", None) or getattr(invocation, "session", None)
+    return getattr(session, "id", None) or "default"
 
 
-def query_mysql(sql_query: str) -> dict:
+def _fetch_bounded(cursor, max_rows: int, max_bytes: int, sink=None, keep: int = 0):
     """
-    Executes a raw SQL query against the MySQL database and formats the entire
-    result set into a single Markdown table.
+    Internal helper that reads an unbuffered cursor in `fetchmany` batches and
+    stops as soon as the row or byte budget is reached.
+
+    Args:
+        sink (callable): When given, receives the rows batch by batch (e.g. a
+            ResultWriter's `append`) and only the first `keep` rows are
+            returned, so memory stays bounded by one batch plus those rows.
+
+    Returns:
+        tuple: (rows, count, truncated, more_rows) where `count` is the number
+               of rows read, `truncated` is True if a budget stopped the read
+               and `more_rows` is True if unread rows remain on the server.
+    """
+    rows = []
+    count = 0
+    size = 0
+    while True:
+        # Ask for one row past the budget so we know whether more rows exist.
+        batch = cursor.fetchmany(min(MYSQL_FETCH_BATCH_SIZE, max_rows + 1 - count))
+        if not batch:
+            return rows, count, False, False
+        stop = None
+        for i, row in enumerate(batch):
+            if count >= max_rows:
+                batch, stop = batch[:i], True
+                break
+            size += sum(len(str(value)) for value in row) + len(row)
+            count += 1
+            if size >= max_bytes:
+                stop = i + 1 < len(batch) or bool(cursor.fetchmany(1))
+                batch = batch[:i + 1]
+                break
+        if sink is None:
+            rows.extend(batch)
+        else:
+            if len(rows) < keep:
+                rows.extend(batch[:keep - len(rows)])
+            sink(batch)
+        if stop is not None:
+            return rows, count, stop, stop
+
+
+def _drain(cursor, remaining: int) -> bool:
+    """
+    Reads off the last `remaining` rows of an unbuffered result and its
+    end-of-result packet, so the connection can be reused.
+
+    Returns:
+        bool: False if the result had more rows than `remaining`.
+    """
+    return len(cursor.fetchmany(remaining + 1)) <= remaining
+
+
+def query_mysql(sql_query: str, output_format: str = MYSQL_RESULT_FORMAT,
+                token_budget: int = MYSQL_RESULT_TOKEN_BUDGET,
+                timeout_seconds: float = MYSQL_QUERY_TIMEOUT_SECONDS,
+                page_size: int = 0, tool_context=None) -> dict:
+    """
+    Executes a raw SQL query against the MySQL database and formats the result
+    set as a single table. Connections are borrowed from a process-wide pool
+    instead of being opened for every call, and rows are streamed up to
+    MYSQL_MAX_RESULT_ROWS / MYSQL_MAX_RESULT_BYTES. Only single read-only
+    statements are run; invalid SQL and unknown names are rejected locally.
 
     Args:
         sql_query (str): The complete and valid SQL query string to execute.
+        output_format (str): "markdown" (default), the compact "tsv", "csv" or
+            "json" (columnar), "summary" (stats plus first/last rows), or "auto"
+            to pick the densest format.
+        token_budget (int): Maximum estimated tokens for the result text; rows
+            are dropped from the end to fit. 0 means no budget.
+        timeout_seconds (float): Deadline for the query; it is cancelled on the
+            server when exceeded. 0 means no deadline.
+        page_size (int): When > 0 and the result has more rows than this, only
+            the first page is returned, with a 'result_handle' in the metadata
+            to read the next pages via fetch_result_page. 0 means no paging.
+        tool_context: Set by ADK; scopes result handles to the session.
 
     Returns:
         dict: A dictionary containing a 'results_markdown' key with the data
-              as a Markdown table string on success, or an 'error' key on failure.
+              as a Markdown table string (or a 'results' key for other formats)
+              on success, or an 'error' key on failure. Successful responses
+              also carry a 'metadata' dict (pool wait time, rows read/shown,
+              truncation, format used, estimated tokens saved, the endpoint
+              that served the query and, when paged, the result handle).
+    """
+    recorder = _instruments.recorder("query_mysql", sql_query)
+    response = _run_query(sql_query, output_format, token_budget, timeout_seconds, recorder,
+                          page_size, tool_context)
+    recorder.finish(response)
+    return response
+
+
+def _run_query(sql_query: str, output_format: str, token_budget: int,
+               timeout_seconds: float, recorder, page_size: int = 0, tool_context=None) -> dict:
+    """
+    Internal body of `query_mysql`. `recorder` times each phase (validate,
+    acquire, cache_lookup, guard, execute, fetch, format, ...) of the call.
     """
     if not all([MYSQL_HOST, MYSQL_DATABASE, MYSQL_USER, MYSQL_PASSWORD]):
         return {"error": "MySQL connection details are not fully configured in the environment."}
+    if output_format not in OUTPUT_FORMATS and output_format != "auto":
+        return {"error": f"Unknown output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}, auto."}
+    if page_size < 0:
+        return {"error": "page_size must be 0 (no paging) or a positive number of rows."}
+
+    # Statements that can't be valid (not a single read-only SELECT, or broken
+    # syntax) are rejected before a connection is even borrowed.
+    parsed = None
+    if MYSQL_VALIDATION_ENABLED:
+        parsed = _validator.parse(sql_query)
+        rejection = check_statement(parsed)
+        recorder.lap("validate")
+        if rejection is not None:
+            recorder.outcome = "rejected"
+            rejection["sql_sent"] = sql_query
+            return rejection
+
+    # Read-only statements are spread over the read endpoints; an unreachable
+    # or lagging replica is skipped and the next one tried.
+    router = _get_router()
+    try:
+        route = router.acquire()
+        connection, pool_wait = route.connection, route.wait
+        recorder.lap("acquire")
+    except PoolTimeoutError as e:
+        recorder.outcome = "pool_timeout"
+        return {"error": "No MySQL connection available.", "details": str(e), "sql_sent": sql_query}
+    except NoEndpointError as e:
+        return {"error": "No MySQL connection available.", "details": str(e), "sql_sent": sql_query}
+    except Error as e:
+        recorder.errno = getattr(e, "errno", None)
+        return {
+            "error": "Failed to execute SQL query in MySQL.",
+            "details": f"MySQL Error: {e}", "sql_sent": sql_query
+        }
 
-    connection = None
     cursor = None
+    writer = None
+    discard = False
+    failed = False
+    deadline = _QueryDeadline(connection, timeout_seconds, route.endpoint)
     try:
-        connection = mysql.connector.connect(
-            host=MYSQL_HOST, database=MYSQL_DATABASE, user=MYSQL_USER, password=MYSQL_PASSWORD
-        )
+        # Only deterministic SELECTs are cached. The versions of the tables they
+        # read are looked up before executing, so a write racing with the query
+        # leaves an entry that is already stale.
+        # Paged results are not cached: their handles belong to one session.
+        cache = _get_cache() if not page_size else None
+        cached_key = None
+        if cache is not None:
+            normalized = normalize_sql(sql_query)
+            if is_cacheable(normalized):
+                try:
+                    versions = _table_versions.get(connection, referenced_tables(normalized))
+                    cached_key = cache_key(normalized, output_format, token_budget)
+                except Error:
+                    pass  # No version information, so run the query uncached.
+            if cached_key is not None:
+                cached = cache.get(cached_key, versions)
+                recorder.lap("cache_lookup")
+                if cached is not None:
+                    cached["metadata"].update(
+                        cache="hit", pool_wait_ms=round(pool_wait * 1000, 3), route=route.metadata()
+                    )
+                    return cached
+
+        # Unknown tables and columns are reported with the nearest names instead
+        # of a MySQL error, saving the round-trip.
+        if parsed is not None:
+            rejection = _check_identifiers(connection, parsed)
+            recorder.lap("validate")
+            if rejection is not None:
+                recorder.outcome = "rejected"
+                rejection["sql_sent"] = sql_query
+                return rejection
+
+        # Let the server enforce time and row limits, and refuse plans that
+        # would tie up the database (full scans, Cartesian joins).
+        sql_to_run = sql_query
+        plan = None
+        auto_limit = 0
+        if is_select(sql_query):
+            max_execution_ms = MYSQL_MAX_EXECUTION_TIME_MS
+            if timeout_seconds and timeout_seconds > 0:
+                max_execution_ms = min(max_execution_ms or 2**31, int(timeout_seconds * 1000))
+            row_limit = MYSQL_AUTO_LIMIT
+            if page_size and row_limit:
+                row_limit = max(row_limit, MYSQL_RESULT_STORE_MAX_ROWS + 1)
+            sql_to_run = add_execution_limits(sql_query, max_execution_ms, row_limit)
+            if row_limit and sql_to_run.endswith(f" LIMIT {int(row_limit)}"):
+                auto_limit = row_limit
+            if MYSQL_GUARD_ENABLED:
+                try:
+                    plan = explain_plan(connection, sql_to_run)
+                except (Error, ValueError, TypeError):
+                    plan = None  # Execution below reports any real problem with the SQL.
+                if plan is not None:
+                    rejection = check_plan(
+                        connection, plan, MYSQL_GUARD_MAX_ROWS_EXAMINED, MYSQL_GUARD_MAX_COST
+                    )
+                    recorder.lap("guard")
+                    if rejection is not None:
+                        recorder.outcome = "rejected"
+                        rejection["sql_sent"] = sql_query
+                        return rejection
+
+        # The steps above count against the timeout, but only the statement
+        # itself is cancelled: the timer starts now, with the time that is left.
+        if not deadline.arm():
+            raise Error("Query execution was interrupted by the timeout.")
+
+        # Unbuffered cursor: rows are streamed from the server as we read them,
+        # so memory per call is bounded by the row/byte budget, not the result size.
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(sql_to_run)
+        recorder.lap("execute")
+        # A paged call reads up to the result store's bounds instead of the
+        # per-response budget, streaming the rows into the store as they
+        # arrive; only the first page is kept here and formatted below.
+        if page_size:
+            max_rows, max_bytes = MYSQL_RESULT_STORE_MAX_ROWS, MYSQL_RESULT_SESSION_BYTES
+            writer = _results.writer(_session_id(tool_context), sql_query, cursor.description, page_size)
+            result, row_count, truncated, more_rows = _fetch_bounded(
+                cursor, max_rows, max_bytes, sink=writer.append, keep=page_size,
+            )
+        else:
+            max_rows, max_bytes = MYSQL_MAX_RESULT_ROWS, MYSQL_MAX_RESULT_BYTES
+            result, row_count, truncated, more_rows = _fetch_bounded(cursor, max_rows, max_bytes)
+        if more_rows:
+            # Under the auto LIMIT a read stopped by the row budget has few rows
+            # left past the one it peeked at (none by default): read them off so
+            # the connection goes back to the pool. Any other remainder is
+            # unbounded, so the result set is abandoned and the connection
+            # closed instead of reused.
+            remaining = auto_limit - row_count - 1 if auto_limit and row_count >= max_rows else -1
+            if not (0 <= remaining <= MYSQL_FETCH_BATCH_SIZE and _drain(cursor, remaining)):
+                discard = True
+        recorder.lap("fetch")
+        deadline.finish()
+        if deadline.expired:
+            raise Error("Query execution was interrupted by the timeout.")
+
+        handle = None
+        if writer is not None:
+            if row_count > page_size:
+                handle = writer.commit(complete=not more_rows)
+                recorder.lap("store")
+            else:
+                writer.abort()  # A single page: nothing to keep.
+
+        # Convert the tuple rows into a single string in one pass, with
+        # per-column converters picked from the cursor description.
+        output, format_info = format_rows(cursor.description, result, output_format, token_budget)
+        if format_info["rows_shown"] < len(result):
+            truncated = True
+        recorder.lap("format")
 
-        if connection.is_connected():
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(sql_query)
-            result = cursor.fetchall()
-            
-            # First, serialize the data to handle dates/datetimes correctly.
-            serialized_result = _serialize_rows(result)
-            
-            # Then, convert the entire result set into a single Markdown table string.
-            markdown_output = _json_to_markdown_table(serialized_result)
-            
-            # Return the final formatted string in the response dictionary.
-            return {"results_markdown": markdown_output}
+        # Return the final formatted string in the response dictionary.
+        results_key = "results_markdown" if format_info["format"] == "markdown" else "results"
+        response = {
+            results_key: output,
+            "metadata": {
+                "pool_wait_ms": round(pool_wait * 1000, 3),
+                "rows_read": row_count,
+                "truncated": truncated,
+                "more_rows_available": more_rows,
+                **format_info,
+                "route": route.metadata(),
+            },
+        }
+        if sql_to_run != sql_query:
+            response["metadata"]["sql_executed"] = sql_to_run
+        if plan is not None:
+            response["metadata"]["estimated_rows_examined"] = plan["estimated_rows_examined"]
+            response["metadata"]["estimated_cost"] = plan["estimated_cost"]
+        if cached_key is not None:
+            response["metadata"]["cache"] = "miss"
+        if handle is not None:
+            total_pages = -(-row_count // page_size)
+            response["metadata"].update(
+                result_handle=handle, page=1, page_size=page_size, total_pages=total_pages,
+                rows_stored=row_count,
+            )
+            response["note"] = (
+                f"Showing page 1 of {total_pages} ({page_size} rows per page, {row_count} rows stored"
+                f"{'; the query returned more rows than were kept' if more_rows else ''}). "
+                f"Call fetch_result_page with result_handle '{handle}' and page=2 for the next rows, "
+                "or with sort_by/where for a sorted or filtered view, instead of re-running the query."
+            )
+        elif truncated:
+            response["note"] = (
+                f"Result truncated: showing {format_info['rows_shown']} of {row_count} rows read"
+                f"{' (more rows exist)' if more_rows else ''}. "
+                "Refine the query (WHERE, GROUP BY, LIMIT) if the full result is needed."
+            )
+        if cached_key is not None:
+            cache.set(cached_key, response, versions)
+            recorder.lap("cache_store")
+        return response
 
     except Error as e:
+        deadline.finish()
+        recorder.errno = getattr(e, "errno", None)
+        # 3024: the MAX_EXECUTION_TIME hint derived from the same deadline fired first.
+        if deadline.expired or getattr(e, "errno", None) == 3024:
+            recorder.outcome = "timeout"
+            discard = True
+            return {
+                "error": "Query timed out and was cancelled.",
+                "details": f"Cancelled after {deadline.elapsed:.1f}s (timeout {timeout_seconds}s). "
+                           "Narrow the query (WHERE on indexed columns, aggregation) so it runs faster.",
+                "elapsed_seconds": round(deadline.elapsed, 3),
+                "sql_sent": sql_query,
+            }
+        # A lost connection marks the endpoint down, so the next call fails over.
+        failed = is_connection_error(e)
         return {
             "error": "Failed to execute SQL query in MySQL.",
-            "details": f"MySQL Error: {e}", "sql_sent": sql_query
+            "details": f"MySQL Error: {e}", "sql_sent": sql_query,
+            "endpoint": route.endpoint.name,
         }
     finally:
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
\ No newline at end of file
+        deadline.finish()
+        if writer is not None:
+            writer.abort()  # Rows of a failed call (no-op once committed).
+        if deadline.expired:
+            # The connection may still hold part of an interrupted result set.
+            discard = True
+        if cursor and not (discard or failed):
+            try:
+                cursor.close()
+            except Error:
+                discard = True
+        router.release(route, discard=discard, failed=failed)
+        recorder.lap("release")
+
+
+async def query_mysql_async(sql_query: str, output_format: str = MYSQL_RESULT_FORMAT,
+                            token_budget: int = MYSQL_RESULT_TOKEN_BUDGET,
+                            timeout_seconds: float = MYSQL_QUERY_TIMEOUT_SECONDS,
+                            page_size: int = 0, tool_context=None) -> dict:
+    """
+    Executes a raw SQL query against the MySQL database and formats the result
+    set as a single table, without blocking the event loop.
+
+    Args:
+        sql_query (str): The complete and valid SQL query string to execute.
+        output_format (str): "markdown" (default), the compact "tsv", "csv" or
+            "json" (columnar), "summary" (stats plus first/last rows), or "auto"
+            to pick the densest format.
+        token_budget (int): Maximum estimated tokens for the result text; rows
+            are dropped from the end to fit. 0 means no budget.
+        timeout_seconds (float): Deadline for the query; it is cancelled on the
+            server when exceeded. 0 means no deadline.
+        page_size (int): When > 0 and the result has more rows than this, only
+            the first page is returned, with a 'result_handle' in the metadata
+            for fetch_result_page. Use it when the user will likely browse
+            further ("show me the next ones"). 0 means no paging.
+        tool_context: Set by ADK; scopes result handles to the session.
+
+    Returns:
+        dict: A dictionary containing a 'results_markdown' key with the data
+              as a Markdown table string (or a 'results' key for other formats)
+              on success, or an 'error' key on failure.
+    """
+    # The blocking driver call runs on a bounded executor, so at most
+    # MYSQL_MAX_CONCURRENT_QUERIES queries are in flight per process while other
+    # sessions on the same worker keep being served.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), query_mysql, sql_query, output_format, token_budget, timeout_seconds,
+        page_size, tool_context,
+    )
+
+
+def _read_result_page(result_handle: str, page: int, page_size: int, sort_by: str, descending: bool,
+                      where: str, output_format: str, token_budget: int, tool_context) -> dict:
+    """
+    Internal body of `fetch_result_page`; reads rows from the result store only.
+    """
+    if output_format not in OUTPUT_FORMATS and output_format != "auto":
+        return {"error": f"Unknown output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}, auto."}
+    entry = _results.get(_session_id(tool_context), result_handle)
+    if entry is None:
+        return {
+            "error": f"Unknown or expired result handle '{result_handle}'.",
+            "details": "Run the query again with query_mysql_async and a page_size to get a new handle.",
+        }
+    recorder = _instruments.recorder("fetch_result_page", entry.sql)
+    response = _build_page(entry, page, page_size, sort_by, descending, where, output_format, token_budget, recorder)
+    recorder.finish(response)
+    return response
+
+
+def _build_page(entry, page: int, page_size: int, sort_by: str, descending: bool, where: str,
+                output_format: str, token_budget: int, recorder) -> dict:
+    """
+    Internal helper formatting one page of a stored result, after the optional
+    filter and sort.
+    """
+    # A page is at most one normal result's worth of rows, whatever was asked.
+    page_size = page_size if page_size and page_size > 0 else entry.page_size
+    page_size = min(page_size, MYSQL_MAX_RESULT_ROWS)
+    start = (page - 1) * page_size
+    if page < 1 or (page > 1 and start >= entry.row_count):
+        # Known without reading: a view never has more rows than the result.
+        total_pages = max(1, -(-entry.row_count // page_size))
+        return {"error": f"Page {page} is out of range; the result has {total_pages} page(s) of {page_size} rows."}
+    try:
+        if sort_by or where:
+            # Views stream the stored rows and keep only what the page needs.
+            page_rows, total_rows = entry.view(start, page_size, where, sort_by, descending)
+        else:
+            total_rows = entry.row_count
+            page_rows = entry.read(max(0, start), start + page_size)
+    except ValueError as e:
+        return {"error": str(e), "result_handle": entry.handle}
+    except OSError:
+        # The spill file was removed by an eviction racing with this read.
+        return {"error": f"Unknown or expired result handle '{entry.handle}'."}
+    recorder.lap("read")
+
+    total_pages = max(1, -(-total_rows // page_size))
+    if page > total_pages:
+        return {"error": f"Page {page} is out of range; the view has {total_pages} page(s) of {page_size} rows."}
+    output, format_info = format_rows(entry.description, page_rows, output_format, token_budget)
+    recorder.lap("format")
+
+    results_key = "results_markdown" if format_info["format"] == "markdown" else "results"
+    response = {
+        results_key: output,
+        "metadata": {
+            "result_handle": entry.handle,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "total_rows": total_rows,
+            "has_more": page < total_pages,
+            **format_info,
+        },
+    }
+    if sort_by:
+        response["metadata"]["sorted_by"] = f"{sort_by} {'DESC' if descending else 'ASC'}"
+    if where:
+        response["metadata"]["filter"] = where
+    if not entry.complete:
+        response["note"] = (
+            f"The handle holds the first {entry.row_count} rows of the query; later rows were not kept, "
+            "so sorted/filtered views cover those rows only. Refine the query in SQL for the full set."
+        )
+    return response
+
+
+async def fetch_result_page(result_handle: str, page: int = 2, sort_by: str = "", descending: bool = False,
+                            where: str = "", page_size: int = 0, output_format: str = MYSQL_RESULT_FORMAT,
+                            token_budget: int = MYSQL_RESULT_TOKEN_BUDGET, tool_context=None) -> dict:
+    """
+    Returns another page of a result kept by query_mysql_async (called with a
+    page_size), or a sorted/filtered view of it, without querying MySQL again.
+
+    Args:
+        result_handle (str): The 'result_handle' from the query's metadata.
+        page (int): 1-based page number of the (sorted/filtered) rows.
+        sort_by (str): Column to sort the stored rows on; empty keeps the query order.
+        descending (bool): Sort from the highest value.
+        where (str): Filter as "column op value", with op one of =, !=, <, <=,
+            >, >=, contains (e.g. "wins >= 10"); empty keeps every row.
+        page_size (int): Rows per page (at most MYSQL_MAX_RESULT_ROWS); 0 uses
+            the page_size of the query.
+        output_format (str): Result format, as in query_mysql_async.
+        token_budget (int): Maximum estimated tokens for the result text. 0 means no budget.
+        tool_context: Set by ADK; handles are only readable by their session.
+
+    Returns:
+        dict: The page in a 'results_markdown' (or 'results') key and a
+              'metadata' dict with page, total_pages and total_rows, or an
+              'error' key if the handle is unknown/expired or a parameter is invalid.
+    """
+    # Spilled results are read from disk, so the read runs off the event loop.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), _read_result_page, result_handle, page, page_size, sort_by, descending,
+        where, output_format, token_budget, tool_context,
+    )
+
+
+async def query_mysql_batch(queries: list[str], output_format: str = MYSQL_RESULT_FORMAT,
+                            token_budget: int = MYSQL_RESULT_TOKEN_BUDGET,
+                            timeout_seconds: float = MYSQL_BATCH_TIMEOUT_SECONDS) -> dict:
+    """
+    Executes several independent SQL queries concurrently and returns all their
+    results in one response. Use it when a question needs more than one query
+    whose SQL does not depend on another query's result.
+
+    Args:
+        queries (list[str]): The complete and valid SQL query strings to execute.
+        output_format (str): Result format applied to every query (see query_mysql).
+        token_budget (int): Maximum estimated tokens per query result. 0 means no budget.
+        timeout_seconds (float): Deadline for the whole batch; queries still running
+            are cancelled on the server when it passes. 0 means no deadline.
+
+    Returns:
+        dict: A dictionary with a 'results' list holding one query_mysql response
+              per query, in the order given (each with its 'query_index' and
+              either results or an 'error' key), and a 'metadata' dict with
+              counts and the elapsed time. An 'error' key is returned instead
+              if the batch itself is invalid.
+    """
+    if not isinstance(queries, list) or not queries:
+        return {"error": "query_mysql_batch expects a non-empty list of SQL query strings."}
+    if len(queries) > MYSQL_BATCH_MAX_QUERIES:
+        return {
+            "error": f"Too many queries in one batch ({len(queries)}); the limit is {MYSQL_BATCH_MAX_QUERIES}.",
+            "details": "Split the batch or combine related queries.",
+        }
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + timeout_seconds if timeout_seconds and timeout_seconds > 0 else None
+    # Per-batch cap, so one batch can't take every pooled connection; the shared
+    # executor still bounds the total across sessions.
+    semaphore = asyncio.Semaphore(max(1, MYSQL_BATCH_CONCURRENCY))
+
+    async def run(index: int, sql_query: str) -> dict:
+        async with semaphore:
+            if not isinstance(sql_query, str) or not sql_query.strip():
+                return {"query_index": index, "error": "Empty or non-string SQL query.", "sql_sent": sql_query}
+            query_timeout = MYSQL_QUERY_TIMEOUT_SECONDS
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return {
+                        "query_index": index,
+                        "error": "Batch deadline reached before the query could start.",
+                        "sql_sent": sql_query,
+                    }
+                # The remaining batch time becomes the query's own deadline, so the
+                # server-side cancellation of query_mysql enforces the batch deadline.
+                query_timeout = min(query_timeout, remaining) if query_timeout and query_timeout > 0 else remaining
+            response = await loop.run_in_executor(
+                _get_executor(), query_mysql, sql_query, output_format, token_budget, query_timeout
+            )
+            return {"query_index": index, **response}
+
+    results = await asyncio.gather(*(run(index, sql_query) for index, sql_query in enumerate(queries)))
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "results": results,
+        "metadata": {
+            "queries": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "elapsed_ms": round((loop.time() - start) * 1000, 3),
+        },
+    }
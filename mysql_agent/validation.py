@@ -0,0 +1,395 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# validation.py
+# Local validation of model-generated SQL: statement type, syntax and table /
+# column names are checked in-process against a cached schema snapshot, so
+# obviously invalid statements never cost a database round-trip.
+#
+# The MySQL dialect parser of `sqlglot` (in requirements.txt) is used; if it
+# can't be imported, only the statement type, statement count and table names
+# are checked, using the tokenizer in sqltext.py.
+import collections
+import difflib
+import hashlib
+import re
+import threading
+import time
+
+from .sqltext import normalize_sql, referenced_tables, statement_verb, tokenize_sql
+
+# Read-only statements allowed besides SELECT / WITH ... SELECT.
+_INTROSPECTION_WORDS = {"SHOW", "DESCRIBE", "DESC", "EXPLAIN"}
+
+# Words that make a statement (or an EXPLAIN ANALYZE of it) write or lock.
+_WRITE_WORDS = {
+    "INSERT", "UPDATE", "DELETE", "REPLACE", "DROP", "ALTER", "CREATE", "TRUNCATE", "RENAME",
+    "GRANT", "REVOKE", "CALL", "LOAD", "HANDLER", "LOCK", "UNLOCK", "SET", "DO", "INTO",
+}
+
+# Other statement keywords: anything else at the start is a syntax error.
+_STATEMENT_WORDS = _WRITE_WORDS | {
+    "ANALYZE", "BEGIN", "CHECK", "COMMIT", "DEALLOCATE", "EXECUTE", "FLUSH", "KILL", "OPTIMIZE",
+    "PREPARE", "PURGE", "RELEASE", "REPAIR", "RESET", "ROLLBACK", "SAVEPOINT", "START", "STOP",
+    "TABLE", "USE", "VALUES", "XA",
+}
+
+_QUALIFIED_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(?:`[^`]+`|\w+)\s*\.", re.IGNORECASE)
+_CTE_NAME_RE = re.compile(r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*`?(\w+)`?\s*(?:\([^)]*\)\s*)?AS\s*\(", re.IGNORECASE)
+
+_sqlglot = None
+
+
+def _load_sqlglot():
+    """Returns the sqlglot module, or False if it isn't installed."""
+    global _sqlglot
+    if _sqlglot is None:
+        try:
+            import sqlglot
+            import sqlglot.expressions  # noqa: F401
+            _sqlglot = sqlglot
+        except ImportError:
+            _sqlglot = False
+    return _sqlglot
+
+
+# =======================================================================
+# SCHEMA SNAPSHOT
+# =======================================================================
+
+class SchemaSnapshot:
+    """
+    Table and column names of the current database, read from
+    information_schema.columns and refreshed after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.database = None
+        self.case_sensitive = True
+        self.tables = {}  # table name -> {lower-cased column: column}
+        self.fingerprint = ""  # Hash of the table and column names; changes with the schema.
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def age(self) -> float:
+        return float("inf") if self.loaded_at is None else time.monotonic() - self.loaded_at
+
+    def get(self, connection, refresh: bool = False):
+        """Returns the snapshot, reloading it first if it is missing, expired or `refresh` is set."""
+        with self._lock:
+            if refresh or self.age >= self.ttl:
+                self._load(connection)
+            return self
+
+    def _load(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT DATABASE(), @@lower_case_table_names")
+            database, lower_case = cursor.fetchone()
+            cursor.execute(
+                "SELECT table_name, column_name FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() ORDER BY table_name, ordinal_position"
+            )
+            tables = collections.defaultdict(dict)
+            for table, column in cursor.fetchall():
+                tables[table][column.lower()] = column
+        finally:
+            cursor.close()
+        self.database = database
+        # lower_case_table_names=0 (the Linux default) makes table names case-sensitive.
+        self.case_sensitive = str(lower_case) == "0"
+        self.tables = dict(tables)
+        digest = hashlib.sha256(str(database).encode("utf-8"))
+        for table in sorted(self.tables):
+            digest.update(f"\n{table}:{','.join(self.tables[table].values())}".encode("utf-8"))
+        self.fingerprint = digest.hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+    def find_table(self, name: str):
+        """Returns the table name as stored, or None if there is no such table."""
+        if name in self.tables:
+            return name
+        if not self.case_sensitive:
+            for table in self.tables:
+                if table.lower() == name.lower():
+                    return table
+        return None
+
+
+# =======================================================================
+# PARSING
+# =======================================================================
+
+class ParsedStatement:
+    """What validation needs to know about a statement, extracted once and cached."""
+
+    def __init__(self, kind: str, error: str = None):
+        self.kind = kind          # "select", "introspection", "write" or "invalid"
+        self.error = error        # Reason for rejecting "write" / "invalid" statements.
+        self.tables = []          # [(schema or None, table, alias)] of real table references
+        self.columns = []         # [(qualifier or None, column)]
+        self.ctes = set()         # Lower-cased CTE names
+        self.output_aliases = set()  # Lower-cased projection aliases
+        self.derived = False      # True if a derived table or CTE provides columns
+        self.columns_checked = False  # False when columns weren't extracted (no parser)
+
+
+class SQLValidator:
+    """
+    Parses statements (with an LRU cache keyed by SQL hash, so repeated
+    statements skip parsing) and checks them against a SchemaSnapshot.
+    """
+
+    def __init__(self, cache_size: int = 512):
+        self.cache_size = cache_size
+        self._parsed = collections.OrderedDict()  # sha256 -> ParsedStatement
+        self._lock = threading.Lock()
+        self.parse_hits = 0
+        self.parse_misses = 0
+
+    def parse(self, sql: str) -> ParsedStatement:
+        """Returns the (cached) parse of a statement."""
+        key = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+        with self._lock:
+            parsed = self._parsed.get(key)
+            if parsed is not None:
+                self._parsed.move_to_end(key)
+                self.parse_hits += 1
+                return parsed
+            self.parse_misses += 1
+
+        sqlglot = _load_sqlglot()
+        parsed = _parse_with_sqlglot(sqlglot, sql) if sqlglot else _parse_with_tokenizer(sql)
+        with self._lock:
+            self._parsed[key] = parsed
+            while len(self._parsed) > self.cache_size:
+                self._parsed.popitem(last=False)
+        return parsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "parser": "sqlglot" if _load_sqlglot() else "tokenizer",
+                "parse_cache_entries": len(self._parsed),
+                "parse_cache_hits": self.parse_hits,
+                "parse_cache_misses": self.parse_misses,
+            }
+
+
+def check_statement(parsed: ParsedStatement):
+    """
+    Schema-independent checks: only read-only, single, parsable statements pass.
+
+    Returns:
+        dict or None: A structured rejection, or None if the statement may run.
+    """
+    if parsed.kind == "write":
+        return {
+            "error": f"Query rejected: {parsed.error}",
+            "suggestions": ["Only read-only SELECT statements can be executed; rewrite the request as a single SELECT."],
+        }
+    if parsed.kind == "invalid":
+        return {
+            "error": f"Query rejected by local validation: {parsed.error}",
+            "suggestions": ["Fix the MySQL syntax and send a single, complete SELECT statement."],
+        }
+    return None
+
+
+def check_identifiers(parsed: ParsedStatement, schema: SchemaSnapshot):
+    """
+    Resolves table and column names against the schema snapshot.
+
+    Returns:
+        dict or None: A rejection with the unknown names and suggestions (nearest
+                      table/column names), or None if every name resolved.
+    """
+    if parsed.kind != "select" or not schema.tables:
+        return None
+
+    problems, suggestions = [], []
+    resolved = collections.defaultdict(set)  # lower-cased alias or name -> real tables
+    outside = False  # Some table lives in another schema we have no snapshot of.
+    for database, name, alias in parsed.tables:
+        if database and database.lower() != (schema.database or "").lower():
+            outside = True
+            continue
+        if name.lower() in parsed.ctes:
+            continue
+        table = schema.find_table(name)
+        if table is None:
+            problems.append(f"unknown table `{name}`")
+            nearest = _nearest(name, schema.tables)
+            if nearest:
+                suggestions.append(f"Did you mean {_quoted(nearest)} instead of `{name}`?")
+            continue
+        resolved[(alias or name).lower()].add(table)
+        if not alias:
+            continue
+        # The bare name may still qualify columns when it isn't reused as an alias.
+        resolved.setdefault(name.lower(), {table})
+
+    if parsed.columns_checked and not problems:
+        in_scope = set().union(*resolved.values()) if resolved else set()
+        for qualifier, column in parsed.columns:
+            if qualifier:
+                candidates = sorted(resolved.get(qualifier.lower(), ()))
+                if not candidates:
+                    continue  # Alias of a derived table / CTE, or another schema.
+            elif parsed.derived or outside or column.lower() in parsed.output_aliases:
+                continue  # The column may come from a subquery, CTE or alias.
+            else:
+                candidates = sorted(in_scope)
+            if not candidates or any(column.lower() in schema.tables[table] for table in candidates):
+                continue
+            where = f" in table `{candidates[0]}`" if len(candidates) == 1 else f" in tables {_quoted(candidates)}"
+            problems.append(f"unknown column `{column}`{where}")
+            nearest = _nearest(column, {c: None for table in candidates for c in schema.tables[table].values()})
+            if nearest:
+                suggestions.append(f"Did you mean {_quoted(nearest)} instead of `{column}`?")
+            owners = [table for table, columns in schema.tables.items() if column.lower() in columns]
+            if owners:
+                suggestions.append(f"`{column}` exists in {_quoted(owners[:3])}; join that table to use it.")
+
+    if not problems:
+        return None
+    return {
+        "error": "Query rejected by local validation: " + "; ".join(dict.fromkeys(problems)) + ".",
+        "suggestions": list(dict.fromkeys(suggestions)),
+    }
+
+
+def _nearest(name: str, candidates) -> list:
+    by_lower = {candidate.lower(): candidate for candidate in candidates}
+    return [by_lower[match] for match in difflib.get_close_matches(name.lower(), list(by_lower), n=3, cutoff=0.6)]
+
+
+def _quoted(names) -> str:
+    return " or ".join(f"`{name}`" for name in names)
+
+
+# --- Parsers ---
+
+def _parse_with_sqlglot(sqlglot, sql: str) -> ParsedStatement:
+    exp = sqlglot.expressions
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read="mysql") if statement is not None]
+    except sqlglot.errors.ParseError as e:
+        detail = e.errors[0] if getattr(e, "errors", None) else {}
+        message = detail.get("description") or str(e).splitlines()[0]
+        if "<class" in message:
+            message = "unexpected or misplaced token"  # Parser-internal wording.
+        if detail.get("highlight"):
+            message += f" near '{detail['highlight']}' (line {detail.get('line')}, column {detail.get('col')})"
+        return ParsedStatement("invalid", f"syntax error: {message}.")
+    except Exception:
+        # A parser crash (not a syntax error) says nothing about the statement:
+        # classify it with the tokenizer instead of assuming a SELECT.
+        return _parse_with_tokenizer(sql)
+    if len(statements) != 1:
+        return ParsedStatement("invalid", "send exactly one statement per call.")
+
+    statement = statements[0]
+    query_types = (exp.Select, getattr(exp, "SetOperation", exp.Union))
+    if isinstance(statement, (getattr(exp, "Show", exp.Describe), exp.Describe)):
+        target = statement.this
+        if isinstance(statement, exp.Describe) and target is not None and not isinstance(
+            target, query_types + (exp.Table,)
+        ):
+            return ParsedStatement("write", "EXPLAIN is only allowed for SELECT statements.")
+        return ParsedStatement("introspection")
+    if not isinstance(statement, query_types):
+        return ParsedStatement("write", f"{statement.key.upper()} statements are not allowed.")
+    if statement.find(exp.Into) is not None:
+        return ParsedStatement("write", "SELECT ... INTO is not allowed.")
+    if any(select.args.get("locks") for select in statement.find_all(exp.Select)):
+        return ParsedStatement("write", "locking reads (FOR UPDATE / LOCK IN SHARE MODE) are not allowed.")
+
+    parsed = ParsedStatement("select")
+    parsed.columns_checked = True
+    parsed.ctes = {cte.alias.lower() for cte in statement.find_all(exp.CTE) if cte.alias}
+    parsed.derived = bool(parsed.ctes) or any(
+        isinstance(subquery.parent, (exp.From, exp.Join)) for subquery in statement.find_all(exp.Subquery)
+    )
+    parsed.output_aliases = {alias.alias.lower() for alias in statement.find_all(exp.Alias) if alias.alias}
+    for table in statement.find_all(exp.Table):
+        if table.name:
+            parsed.tables.append((table.db or None, table.name, table.alias or None))
+    for column in statement.find_all(exp.Column):
+        if isinstance(column.this, exp.Star) or not column.name:
+            continue
+        parsed.columns.append((column.table or None, column.name))
+    return parsed
+
+
+def _parse_with_tokenizer(sql: str) -> ParsedStatement:
+    tokens = [(kind, text) for kind, text in tokenize_sql(sql) if kind not in ("space", "comment")]
+    while tokens and tokens[-1] == ("other", ";"):
+        tokens.pop()
+    if not tokens:
+        return ParsedStatement("invalid", "the statement is empty.")
+    if ("other", ";") in tokens:
+        return ParsedStatement("invalid", "send exactly one statement per call.")
+    depth = 0
+    for kind, text in tokens:
+        if kind == "other":
+            depth += (text == "(") - (text == ")")
+            if depth < 0:
+                break
+        if kind == "other" and text in "'\"`":
+            return ParsedStatement("invalid", "syntax error: unterminated quoted string or identifier.")
+    if depth != 0:
+        return ParsedStatement("invalid", "syntax error: unbalanced parentheses.")
+
+    words = [text.upper() for kind, text in tokens if kind == "word"]
+    first = next((text for kind, text in tokens if kind != "other" or text != "("), "")
+    if words and words[0] in _INTROSPECTION_WORDS:
+        if words[0] == "EXPLAIN" and _WRITE_WORDS.intersection(words):
+            return ParsedStatement("write", "EXPLAIN is only allowed for SELECT statements.")
+        return ParsedStatement("introspection")
+    if first.upper() not in ("SELECT", "WITH"):
+        if words and words[0] in _STATEMENT_WORDS:
+            return ParsedStatement("write", f"{words[0]} statements are not allowed.")
+        return ParsedStatement("invalid", f"syntax error: unexpected '{first}' at the start of the statement.")
+    if words[0] == "WITH":
+        # The CTEs only read; the statement after them must be a SELECT too
+        # (WITH x AS (...) DELETE / UPDATE ... writes). Write words followed by
+        # "(" are functions (REPLACE(), INSERT()).
+        depth = 0
+        for index, (kind, text) in enumerate(tokens):
+            if kind == "other":
+                depth += (text == "(") - (text == ")")
+            elif kind == "word" and depth == 0 and text.upper() in _WRITE_WORDS and \
+                    tokens[index + 1:index + 2] != [("other", "(")]:
+                return ParsedStatement("write", f"WITH ... {text.upper()} statements are not allowed.")
+        verb = statement_verb(sql)
+        if verb != "SELECT":
+            if verb in _STATEMENT_WORDS:
+                return ParsedStatement("write", f"WITH ... {verb} statements are not allowed.")
+            return ParsedStatement("invalid", "syntax error: WITH must be followed by a SELECT statement.")
+    if "INTO" in words:
+        return ParsedStatement("write", "SELECT ... INTO is not allowed.")
+    if ("FOR" in words and "UPDATE" in words) or "SHARE" in words:
+        return ParsedStatement("write", "locking reads (FOR UPDATE / LOCK IN SHARE MODE) are not allowed.")
+
+    parsed = ParsedStatement("select")
+    normalized = normalize_sql(sql)
+    parsed.ctes = {name.lower() for name in _CTE_NAME_RE.findall(normalized)}
+    if not _QUALIFIED_TABLE_RE.search(normalized):
+        # referenced_tables() drops schema qualifiers, so tables of other schemas
+        # (information_schema.tables, ...) would look unknown: not checked then.
+        parsed.tables = [(None, name, None) for name in referenced_tables(normalized)]
+    return parsed
@@ -0,0 +1,122 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_cache.py
+# Result cache: keys, invalidation on table writes, TTL and size bounds.
+import time
+
+from mysql_agent.cache import InMemoryBackend, ResultCache, TableVersions, cache_key
+from mysql_agent.sqltext import normalize_sql, referenced_tables
+
+
+class VersionCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.connection.lookups += 1
+        self.rows = [(table, self.connection.update_times[table])
+                     for table in params if table in self.connection.update_times]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class VersionConnection:
+    """Serves information_schema.tables.UPDATE_TIME from a dict."""
+
+    def __init__(self, update_times):
+        self.update_times = update_times
+        self.lookups = 0
+
+    def cursor(self):
+        return VersionCursor(self)
+
+
+def test_key_ignores_spelling_but_not_options():
+    a = cache_key(normalize_sql("select *  from races -- all\n;"), "markdown", 0)
+    b = cache_key(normalize_sql("SELECT * FROM races"), "markdown", 0)
+    assert a == b
+    assert a != cache_key(normalize_sql("SELECT * FROM races"), "tsv", 0)
+    assert a != cache_key(normalize_sql("SELECT * FROM Races"), "markdown", 0)
+
+
+def test_write_to_a_read_table_invalidates():
+    connection = VersionConnection({"races": "2025-01-01 10:00:00", "results": "2025-01-01 10:00:00"})
+    versions = TableVersions(check_interval=0)
+    cache = ResultCache(InMemoryBackend(), ttl=60)
+    sql = normalize_sql("SELECT * FROM races JOIN results ON results.raceId = races.raceId")
+    key = cache_key(sql, "markdown", 0)
+
+    cache.set(key, {"results": "rows"}, versions.get(connection, referenced_tables(sql)))
+    assert cache.get(key, versions.get(connection, referenced_tables(sql))) == {"results": "rows"}
+
+    connection.update_times["results"] = "2025-01-01 10:05:00"  # Write to the joined table.
+    assert cache.get(key, versions.get(connection, referenced_tables(sql))) is None
+    assert cache.stats()["stale"] == 1
+    assert cache.get(key, versions.get(connection, referenced_tables(sql))) is None  # Entry was dropped.
+
+
+def test_versions_are_memoized_for_the_check_interval():
+    connection = VersionConnection({"races": "v1"})
+    versions = TableVersions(check_interval=60)
+    assert versions.get(connection, ["races"]) == {"races": "v1"}
+    connection.update_times["races"] = "v2"
+    assert versions.get(connection, ["races"]) == {"races": "v1"}
+    assert connection.lookups == 1
+
+
+def test_unknown_tables_get_no_version():
+    versions = TableVersions(check_interval=0)
+    assert versions.get(VersionConnection({}), ["cte_name"]) == {"cte_name": None}
+
+
+def test_entries_expire():
+    cache = ResultCache(InMemoryBackend(), ttl=0.05)
+    cache.set("k", {"results": 1}, {})
+    time.sleep(0.1)
+    assert cache.get("k", {}) is None
+
+
+def test_backend_evicts_least_recently_used():
+    backend = InMemoryBackend(max_entries=2)
+    for key in ("a", "b"):
+        backend.set(key, key, 60)
+    backend.get("a")
+    backend.set("c", "c", 60)
+    assert backend.get("b") is None and backend.get("a") == "a"
+    assert backend.stats()["evictions"] == 1
+
+
+class FailingBackend:
+    """A backend whose server is unreachable."""
+
+    def get(self, key):
+        raise ConnectionError("Error 111 connecting to localhost:6379. Connection refused.")
+
+    set = delete = get
+
+    def stats(self):
+        return {}
+
+
+def test_failing_backend_is_a_miss():
+    cache = ResultCache(FailingBackend(), ttl=60)
+    cache.set("k", {"results": 1}, {})
+    assert cache.get("k", {}) is None
+    assert cache.stats()["errors"] == 2 and cache.stats()["stores"] == 0
@@ -0,0 +1,121 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_callbacks.py
+# ADK callbacks of the question cache, driven through whole turns with
+# stand-in contexts: what gets stored, what a hit returns, and failed hits.
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("google.adk")
+from google.genai import types as genai_types  # noqa: E402
+
+from mysql_agent import callbacks  # noqa: E402
+from mysql_agent.question_cache import QuestionCache  # noqa: E402
+
+QUESTION = "Which 5 drivers have the most wins?"
+SQL = {"sql_query": "SELECT surname FROM drivers ORDER BY wins DESC LIMIT 5", "output_format": "markdown"}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = QuestionCache()
+    monkeypatch.setattr(callbacks, "_cache", cache)
+    monkeypatch.setattr(callbacks, "_turns", type(callbacks._turns)())
+    monkeypatch.setattr(callbacks.tools, "get_schema_fingerprint", lambda: "fp1")
+    return cache
+
+
+class Turn:
+    """Plays one invocation through the callbacks, like ADK's runner would."""
+
+    count = 0
+
+    def __init__(self, question=QUESTION, history=()):
+        Turn.count += 1
+        self.context = types.SimpleNamespace(
+            invocation_id=f"inv-{Turn.count}",
+            user_content=genai_types.Content(role="user", parts=[genai_types.Part(text=question)]),
+        )
+        contents = [genai_types.Content(role="user", parts=[genai_types.Part(text=text)]) for text in history]
+        self.request = types.SimpleNamespace(contents=contents + [self.context.user_content])
+
+    def model_call(self):
+        return asyncio.run(callbacks.before_model_callback(self.context, self.request))
+
+    def tool(self, name, args, response):
+        return callbacks.after_tool_callback(types.SimpleNamespace(name=name), args, self.context, response)
+
+    def end(self):
+        asyncio.run(callbacks.after_agent_callback(self.context))
+
+
+def _answered_by(*calls, question=QUESTION):
+    turn = Turn(question)
+    assert turn.model_call() is None
+    for name, args, response in calls:
+        turn.tool(name, args, response)
+    turn.end()
+
+
+OK = {"results_markdown": "| surname |", "metadata": {}}
+
+
+def test_single_query_is_stored_and_reused(cache):
+    _answered_by(("query_mysql_async", SQL, OK))
+    assert cache.stats()["entries"] == 1
+
+    turn = Turn("which five drivers have the highest wins")
+    response = turn.model_call()
+    call = response.content.parts[0].function_call
+    assert call.name == "query_mysql_async" and dict(call.args) == SQL
+    annotated = turn.tool("query_mysql_async", SQL, OK)
+    assert annotated["metadata"]["sql_cache"]["cached_question"] == QUESTION
+    turn.end()
+
+
+@pytest.mark.parametrize("extra", [
+    ("query_mysql_batch", {"queries": ["SELECT 1", "SELECT 2"]}, {"results": []}),
+    ("fetch_result_page", {"result_handle": "res_x", "page": 2}, OK),
+    ("query_mysql_async", {"sql_query": "SELECT 1"}, OK),
+])
+def test_turn_with_other_reads_is_not_stored(cache, extra):
+    _answered_by(("query_mysql_async", SQL, OK), extra)
+    assert cache.stats()["entries"] == 0
+
+
+def test_failed_attempt_then_success_is_stored(cache):
+    _answered_by(("query_mysql_async", {"sql_query": "SELECT nope"}, {"error": "Unknown column"}),
+                 ("query_mysql_async", SQL, OK))
+    assert cache.stats()["entries"] == 1
+
+
+def test_follow_up_question_is_not_stored(cache):
+    turn = Turn("and in 2020?", history=[QUESTION])
+    turn.model_call()
+    turn.tool("query_mysql_async", SQL, OK)
+    turn.end()
+    assert cache.stats()["entries"] == 0
+
+
+def test_failing_cached_sql_is_dropped(cache):
+    cache.store(QUESTION, SQL, "fp1")
+    turn = Turn()
+    assert turn.model_call() is not None
+    response = turn.tool("query_mysql_async", SQL, {"error": "Table 'drivers' doesn't exist"})
+    assert "dropped from the cache" in response["note"]
+    turn.end()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,150 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_formatting.py
+# Single-pass formatters: per-type cell conversion, escaping in each format
+# and fitting a token budget.
+import csv
+import datetime
+import decimal
+import io
+import json
+
+import pytest
+
+from mysql_agent import formatting
+from mysql_agent.formatting import (
+    OUTPUT_FORMATS,
+    estimate_length,
+    estimate_tokens,
+    format_columnar_json,
+    format_markdown_table,
+    format_rows,
+    format_tsv,
+)
+
+DESCRIPTION = [("raceId", 3), ("name", 253), ("date", 10), ("time", 11), ("points", 246), ("raw", 252)]
+ROWS = [
+    (1, "Bahrain | GP", datetime.date(2024, 3, 2), datetime.timedelta(hours=15), decimal.Decimal("25.5"), b"\x00\xff"),
+    (2, "Monaco\nGP", None, "15:00:00", decimal.Decimal("0"), b"plain"),
+    (3, "Tab\there", datetime.datetime(2024, 5, 26, 13, 0), None, None, None),
+]
+
+
+def test_markdown_table():
+    lines = format_markdown_table(DESCRIPTION, ROWS).splitlines()
+    assert lines[0] == "| raceId | name | date | time | points | raw |"
+    assert lines[1] == "| --- | --- | --- | --- | --- | --- |"
+    assert lines[2] == "| 1 | Bahrain \\| GP | 2024-03-02 | 15:00:00 | 25.5 | 0x00ff |"
+    assert lines[3] == "| 2 | Monaco<br>GP | NULL | 15:00:00 | 0 | plain |"
+    assert lines[4] == "| 3 | Tab\there | 2024-05-26T13:00:00 | NULL | NULL | NULL |"
+    assert len(lines) == 5
+
+
+def test_tsv_keeps_one_line_per_row():
+    lines = format_tsv(DESCRIPTION, ROWS).splitlines()
+    assert len(lines) == 4
+    assert lines[2].split("\t")[1] == "Monaco\\nGP"
+    assert lines[3].split("\t")[1] == "Tab\\there"
+
+
+def test_csv_round_trips():
+    text, info = format_rows(DESCRIPTION, ROWS, "csv")
+    parsed = list(csv.reader(io.StringIO(text)))
+    assert parsed[0] == [column[0] for column in DESCRIPTION]
+    assert parsed[2][1] == "Monaco\nGP" and parsed[3][1] == "Tab\there"
+    assert parsed[1][4] == "25.5" and parsed[3][4] == "NULL"
+    assert info["rows_shown"] == 3
+
+
+def test_json_keeps_numbers_and_nulls():
+    data = json.loads(format_columnar_json(DESCRIPTION, ROWS))
+    assert data["columns"] == [column[0] for column in DESCRIPTION]
+    assert data["rows"][0][0] == 1 and data["rows"][0][4] == "25.5"  # DECIMAL stays exact.
+    assert data["rows"][1][2] is None and data["rows"][0][2] == "2024-03-02"
+
+
+def test_summary():
+    rows = [(i, f"driver{i}") for i in range(20)]
+    text, info = format_rows([("wins", 3), ("name", 253)], rows, "summary")
+    assert "Rows: 20" in text and "- wins: 0 NULL, min=0, max=19" in text
+    assert "First 5 rows:" in text and "driver19" in text and "driver10" not in text
+    assert info["format"] == "summary"
+
+
+@pytest.mark.parametrize("output_format", OUTPUT_FORMATS)
+def test_empty_result(output_format):
+    text, info = format_rows(DESCRIPTION, [], output_format)
+    assert info["rows_shown"] == 0
+    if output_format != "json":
+        assert text == "No results found."
+
+
+def test_auto_picks_the_shortest_format():
+    text, info = format_rows(DESCRIPTION, ROWS, "auto")
+    assert info["format"] in ("tsv", "csv", "json")
+    assert len(text) == min(len(format_rows(DESCRIPTION, ROWS, name)[0]) for name in ("tsv", "csv", "json"))
+    assert info["estimated_tokens_saved"] > 0
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        format_rows(DESCRIPTION, ROWS, "xml")
+
+
+@pytest.mark.parametrize("output_format", ["markdown", "tsv", "csv", "json"])
+def test_token_budget_truncates_rows(output_format):
+    rows = [(i, f"driver number {i}") for i in range(500)]
+    description = [("id", 3), ("name", 253)]
+    text, info = format_rows(description, rows, output_format, token_budget=400)
+    assert 0 < info["rows_shown"] < 500
+    assert info["estimated_tokens"] == estimate_tokens(text) <= 400
+    assert f"driver number {info['rows_shown'] - 1}" in text
+    assert f"driver number {info['rows_shown']}" not in text
+
+
+def test_budget_too_small_for_one_row_falls_back_to_summary():
+    rows = [(i, "x" * 400) for i in range(50)]
+    text, info = format_rows([("id", 3), ("blob", 253)], rows, "tsv", token_budget=20)
+    assert info["format"] == "summary" and text.startswith("Rows: 50")
+
+
+def _rendered(monkeypatch):
+    """Records the format and row count of every full render."""
+    calls = []
+    for name, formatter in list(formatting._FORMATTERS.items()):
+        def recording(description, rows, name=name, formatter=formatter):
+            calls.append((name, len(rows)))
+            return formatter(description, rows)
+        monkeypatch.setitem(formatting._FORMATTERS, name, recording)
+    return calls
+
+
+LARGE = [(i, f"driver number {i}", decimal.Decimal(i) / 4) for i in range(5000)]
+LARGE_DESCRIPTION = [("id", 3), ("name", 253), ("points", 246)]
+
+
+@pytest.mark.parametrize("output_format", ["tsv", "auto"])
+def test_only_the_chosen_format_is_rendered_in_full(monkeypatch, output_format):
+    calls = _rendered(monkeypatch)
+    text, info = format_rows(LARGE_DESCRIPTION, LARGE, output_format)
+    assert [call for call in calls if call[1] == len(LARGE)] == [(info["format"], len(LARGE))]
+    assert info["estimated_tokens_saved"] > 0
+
+
+@pytest.mark.parametrize("output_format", ["markdown", "tsv", "csv", "json"])
+def test_length_estimate_is_close(output_format):
+    exact = len(formatting._FORMATTERS[output_format](LARGE_DESCRIPTION, LARGE))
+    assert abs(estimate_length(LARGE_DESCRIPTION, LARGE, output_format) - exact) < exact * 0.05
+    assert estimate_length(DESCRIPTION, ROWS, output_format) == len(format_rows(DESCRIPTION, ROWS, output_format)[0])
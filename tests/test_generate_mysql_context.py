@@ -0,0 +1,257 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_generate_mysql_context.py
+# Context generator: column profiling and table harvesting against scripted
+# cursors and connections.
+import re
+
+import pytest
+
+gmc = pytest.importorskip("mysql_agent.generate_mysql_context")
+
+
+class ScriptedCursor:
+    """
+    Answers the generator's statements from a table's rows (row estimate =
+    len(rows) unless given); statements containing `fail_on` raise a MySQL error.
+    """
+
+    def __init__(self, rows, columns=(), fail_on=None, statements=None, row_estimate=-1):
+        self.rows = rows
+        self.row_estimate = len(rows) if row_estimate == -1 else row_estimate
+        self.columns = columns
+        self.fail_on = fail_on
+        self.result = []
+        self.description = [(name,) for name, _ in columns]
+        self.statements = [] if statements is None else statements
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if self.fail_on and self.fail_on in sql:
+            raise gmc.Error(msg=f"Lost connection during '{self.fail_on}'", errno=2013)
+        if sql.startswith("DESCRIBE"):
+            self.result = [(name, column_type, "YES", "", None, "") for name, column_type in self.columns]
+        elif sql.startswith("SET") or sql.startswith("KILL"):
+            self.result = []
+        elif "information_schema.tables" in sql:
+            self.result = [(self.row_estimate,)]
+        elif "information_schema.statistics" in sql:
+            self.result = []
+        else:
+            limit = re.search(r"LIMIT (\d+);$", sql)
+            self.result = list(self.rows[:int(limit.group(1))] if limit else self.rows)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        result, self.result = self.result, []
+        return result
+
+    def fetchmany(self, size):
+        batch, self.result = self.result[:size], self.result[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class ScriptedConnection:
+    def __init__(self, connection_id=7, **cursor_args):
+        self.connection_id = connection_id
+        self.cursor_args = cursor_args
+        self.statements = []
+
+    def is_connected(self):
+        return True
+
+    def cursor(self):
+        return ScriptedCursor(statements=self.statements, **self.cursor_args)
+
+    def close(self):
+        pass
+
+
+def test_base_type():
+    assert gmc._base_type("int unsigned") == "int"
+    assert gmc._base_type("decimal(10,2)") == "decimal"
+    assert gmc._base_type("enum('print','paint')") == "enum"
+    assert gmc._base_type("point") == "point"
+
+
+def test_enum_and_point_columns_are_not_numeric():
+    columns = [
+        ("id", "int unsigned"),
+        ("finish", "enum('print','paint')"),
+        ("location", "point"),
+        ("points", "decimal(5,2)"),
+    ]
+    # Profiled columns are read numeric first: id, points, finish.
+    rows = [(1, 2.5, "print"), (2, 4.5, "paint"), (3, None, "print")]
+    lines = gmc.get_column_data_analysis(ScriptedCursor(rows), "results", columns)
+    text = "\n".join(lines)
+    assert "- **id**: Numeric. MIN=`1`, MAX=`3`, AVG=`2.00`" in text
+    assert "- **finish**: Text. Distinct Values=`2`" in text
+    assert "- **points**: Numeric. MIN=`2.5`, MAX=`4.5`, AVG=`3.50`" in text
+    assert "location" not in text
+
+
+def test_unconvertible_numeric_column_is_skipped_not_fatal():
+    columns = [("id", "int"), ("code", "int")]
+    rows = [(1, 10), (2, "n/a"), (3, 30)]
+    lines = gmc.get_column_data_analysis(ScriptedCursor(rows), "codes", columns)
+    text = "\n".join(lines)
+    assert "- **id**: Numeric. MIN=`1`, MAX=`3`" in text
+    assert "- **code**: Numeric. Values could not be profiled." in text
+
+
+@pytest.mark.parametrize("row_estimate", [None, 3])  # Missing, or stale statistics.
+def test_table_of_unknown_size_is_sampled(monkeypatch, row_estimate):
+    monkeypatch.setattr(gmc, "CONTEXT_PROFILE_SAMPLE_ROWS", 10)
+    monkeypatch.setattr(gmc, "CONTEXT_FULL_SCAN_MAX_ROWS", 0)  # No aggregate statement.
+    rows = [(i, f"driver{i}") for i in range(1000)]
+    cursor = ScriptedCursor(rows, row_estimate=row_estimate)
+    lines = gmc.get_column_data_analysis(cursor, "drivers", [("id", "int"), ("name", "varchar(50)")])
+    profile = [sql for sql in cursor.statements if sql.startswith("SELECT `id`, `name`")]
+    assert profile == ["SELECT `id`, `name` FROM `drivers` LIMIT 10;" if row_estimate is None
+                       else "SELECT `id`, `name` FROM `drivers` LIMIT 11;"]
+    text = "\n".join(lines)
+    assert "exact" not in text and "sample" in text
+    assert "- **name**: Text. Distinct Values=`" in text
+
+
+RACES_COLUMNS = [("raceId", "int"), ("name", "varchar(255)")]
+RACES_ROWS = [(1, "Bahrain"), (2, "Monaco")]
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """Makes the harvester's workers connect to a ScriptedConnection built from the given arguments."""
+    connections = []
+
+    def install(**connection_args):
+        def fake_connect(**params):
+            connections.append(ScriptedConnection(**connection_args))
+            return connections[-1]
+        monkeypatch.setattr(gmc.mysql.connector, "connect", fake_connect)
+        return connections
+
+    return install
+
+
+def test_worker_sessions_read_current_statistics(connect):
+    connections = connect(rows=RACES_ROWS, columns=RACES_COLUMNS)
+    harvester = gmc.TableHarvester({}, workers=1, table_timeout=0)
+    harvester.process_table("races")
+    assert connections[0].statements[0].startswith("SET SESSION information_schema_stats_expiry = 0")
+
+
+def test_clean_table_is_cacheable(connect):
+    connect(rows=RACES_ROWS, columns=RACES_COLUMNS)
+    harvester = gmc.TableHarvester({}, workers=1, table_timeout=0)
+    schema, examples, analysis = harvester.process_table("races")
+    assert schema == ["`raceId`: **INT**", "`name`: **VARCHAR(255)**"]
+    assert "| 1 | Bahrain |" in examples
+    assert harvester.failed == set()
+
+
+@pytest.mark.parametrize("fail_on", ["DESCRIBE", "LIMIT %s", "`name` FROM `races`"])
+def test_degraded_table_is_not_cached(connect, fail_on):
+    connect(rows=RACES_ROWS, columns=RACES_COLUMNS, fail_on=fail_on)
+    harvester = gmc.TableHarvester({}, workers=1, table_timeout=0)
+    harvester.process_table("races")
+    assert harvester.failed == {"races"}
+
+
+class RacingLock:
+    """A lock that runs `on_acquire(n)` each time it is taken (n = 1, 2, ...)."""
+
+    def __init__(self, on_acquire):
+        self._lock = gmc.threading.Lock()
+        self.on_acquire = on_acquire
+        self.acquired = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.acquired += 1
+        self.on_acquire(self.acquired)
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+
+class KillCursor:
+    def __init__(self, lock):
+        self.lock = lock
+        self.killed = []
+
+    def execute(self, sql):
+        assert self.lock.locked(), "KILL must run while the harvester's lock is held"
+        self.killed.append(sql)
+
+
+def test_overdue_table_is_killed_under_the_lock():
+    harvester = gmc.TableHarvester({}, workers=1, table_timeout=10)
+    harvester._lock = RacingLock(lambda n: None)
+    harvester._running["races"] = (7, gmc.time.monotonic() - 60)
+    harvester._running["drivers"] = (8, gmc.time.monotonic())
+    kill_cursor = KillCursor(harvester._lock)
+    harvester._enforce_timeouts(kill_cursor)
+    assert kill_cursor.killed == ["KILL 7"]
+    assert harvester._timed_out == {"races"}
+
+
+def test_table_finished_before_the_kill_is_not_killed():
+    harvester = gmc.TableHarvester({}, workers=1, table_timeout=10)
+
+    def worker_moves_on(n):
+        if n == 2:  # Between listing the overdue tables and killing: same connection, next table.
+            harvester._running.pop("races")
+            harvester._running["drivers"] = (7, gmc.time.monotonic())
+
+    harvester._lock = RacingLock(worker_moves_on)
+    harvester._running["races"] = (7, gmc.time.monotonic() - 60)
+    kill_cursor = KillCursor(harvester._lock)
+    harvester._enforce_timeouts(kill_cursor)
+    assert kill_cursor.killed == []
+    assert harvester._timed_out == set()
+
+
+def test_tables_missing_from_the_cache_are_processed():
+    entry = {"fingerprint": "fp-races", "schema": [], "examples": "", "analysis": []}
+    cache = {"tables": {"races": entry, "results": {"fingerprint": None}}}
+    fingerprints = {"races": "fp-races"}  # No fingerprint for a view.
+    tables = ["races", "results", "drivers", "standings_view"]
+    assert gmc.tables_to_process(tables, cache, fingerprints) == ["results", "drivers", "standings_view"]
+    assert gmc.tables_to_process(tables, cache, fingerprints, {"races"}) == tables
+    assert gmc.cached_table(cache, "races") is entry and gmc.cached_table(cache, "drivers") is None
+
+
+def test_phase_timings_cover_one_run(monkeypatch, capsys):
+    monkeypatch.setattr(gmc, "CONTEXT_METRICS_FILE", "")
+
+    def one_phase(force, selected_tables, table_durations):
+        with gmc._timed_phase("harvest"):
+            pass
+
+    monkeypatch.setattr(gmc, "_generate", one_phase)
+    monkeypatch.setitem(gmc._phase_totals, "harvest", 100.0)  # Left over from an earlier run.
+    gmc.main()
+    harvest = [line for line in capsys.readouterr().out.splitlines() if "harvest" in line]
+    assert len(harvest) == 1 and float(harvest[0].split()[1].rstrip("s")) < 1
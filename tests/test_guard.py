@@ -0,0 +1,111 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_guard.py
+# Cost guard: plan summaries from EXPLAIN FORMAT=JSON (MySQL and MariaDB
+# shapes) and rejections with suggestions.
+import json
+
+from mysql_agent.guard import check_plan, explain_plan
+
+
+class PlanCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append(sql)
+        if sql.startswith("EXPLAIN FORMAT=JSON"):
+            self.result = [(json.dumps(self.connection.plan),)]
+        elif "information_schema.statistics" in sql:
+            self.result = [(column,) for column in self.connection.indexes.get(params[0], [])]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class PlanConnection:
+    """Answers EXPLAIN with a fixed plan and index lookups from a dict."""
+
+    def __init__(self, plan, indexes=None):
+        self.plan = plan
+        self.indexes = indexes or {}
+        self.statements = []
+
+    def cursor(self):
+        return PlanCursor(self)
+
+
+# MySQL: results x races without a join condition (Cartesian join through a join buffer).
+CARTESIAN_PLAN = {"query_block": {
+    "cost_info": {"query_cost": "5230000.50"},
+    "nested_loop": [
+        {"table": {"table_name": "races", "access_type": "ALL", "rows_examined_per_scan": 900,
+                   "rows_produced_per_join": 900}},
+        {"table": {"table_name": "results", "access_type": "ALL", "rows_examined_per_scan": 26000,
+                   "rows_produced_per_join": 23400000, "using_join_buffer": "hash join"}},
+    ],
+}}
+
+# MariaDB: an indexed lookup, reported with rows / filtered.
+LOOKUP_PLAN = {"query_block": {"table": {
+    "table_name": "drivers", "access_type": "const", "key": "PRIMARY", "rows": 1, "filtered": 100,
+}}}
+
+
+def test_explain_summarizes_a_nested_loop():
+    connection = PlanConnection(CARTESIAN_PLAN)
+    summary = explain_plan(connection, "SELECT * FROM races, results")
+    assert connection.statements == ["EXPLAIN FORMAT=JSON SELECT * FROM races, results"]
+    assert summary["estimated_rows_examined"] == 900 + 900 * 26000
+    assert summary["estimated_cost"] == 5230000.5
+    assert [table["table"] for table in summary["tables"]] == ["races", "results"]
+    assert summary["tables"][1]["join_buffer"] and not summary["tables"][0]["join_buffer"]
+
+
+def test_explain_reads_mariadb_plans():
+    summary = explain_plan(PlanConnection(LOOKUP_PLAN), "SELECT * FROM drivers WHERE driverId = 1")
+    assert summary["estimated_rows_examined"] == 1 and summary["estimated_cost"] is None
+    assert summary["tables"] == [{"table": "drivers", "access_type": "const", "key": "PRIMARY",
+                                  "rows_per_scan": 1, "join_buffer": False}]
+
+
+def test_cheap_plan_passes():
+    connection = PlanConnection(LOOKUP_PLAN)
+    assert check_plan(connection, explain_plan(connection, "SELECT 1"), 10_000_000, 0) is None
+
+
+def test_expensive_plan_is_rejected_with_suggestions():
+    connection = PlanConnection(CARTESIAN_PLAN, indexes={"results": ["resultId", "raceId", "driverId", "statusId"]})
+    summary = explain_plan(connection, "SELECT * FROM races, results")
+    rejection = check_plan(connection, summary, 10_000_000, 1_000_000)
+    assert rejection["error"].startswith("Query rejected by the cost guard: estimated rows examined 23,400,900")
+    assert "estimated cost 5,230,000 exceeds the limit of 1,000,000" in rejection["error"]
+    suggestions = "\n".join(rejection["suggestions"])
+    assert "`results` is joined through a join buffer" in suggestions
+    assert "`results` is fully scanned (~26,000 rows)" in suggestions
+    assert "such as `resultId`, `raceId`, `driverId`." in suggestions
+    assert "`races` is fully scanned" not in suggestions  # Small tables are fine to scan.
+
+
+def test_disabled_thresholds_never_reject():
+    connection = PlanConnection(CARTESIAN_PLAN)
+    assert check_plan(connection, explain_plan(connection, "SELECT 1"), 0, 0) is None
@@ -0,0 +1,143 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_metrics.py
+# Metrics registry (Prometheus text export) and the per-call recorder of the
+# SQL tools, including the slow-query log.
+import json
+import time
+import urllib.request
+
+from mysql_agent.metrics import NULL_RECORDER, MetricsRegistry, ToolInstruments
+
+
+def _lines(registry):
+    return registry.render_prometheus().splitlines()
+
+
+def test_counter_and_histogram_render_as_prometheus_text():
+    registry = MetricsRegistry(namespace="test")
+    calls = registry.counter("calls_total", "Calls.", ("tool",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1), labelnames=("tool",))
+    calls.inc("query")
+    calls.inc("query", amount=2)
+    latency.observe(0.05, "query")
+    latency.observe(0.5, "query")
+    latency.observe(5, "query")
+
+    lines = _lines(registry)
+    assert "# TYPE test_calls_total counter" in lines
+    assert 'test_calls_total{tool="query"} 3' in lines
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{tool="query",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{tool="query",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{tool="query",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_sum{tool="query"} 5.55' in lines
+    assert 'test_latency_seconds_count{tool="query"} 3' in lines
+    assert latency.quantile(0.5, "query") == 1 and latency.quantile(0.5, "other") == 0.0
+
+
+def test_labels_are_escaped():
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("errors_total", "Errors.", ("message",)).inc('say "hi"\n')
+    assert 'test_errors_total{message="say \\"hi\\"\\n"} 1' in _lines(registry)
+
+
+def test_collectors_add_gauges_and_broken_ones_are_skipped():
+    registry = MetricsRegistry(namespace="test")
+    registry.register_collector(lambda: [("pool_open", "Open connections.", "gauge", [({"endpoint": "db"}, 4)])])
+    registry.register_collector(lambda: 1 / 0)
+    lines = _lines(registry)
+    assert "# TYPE test_pool_open gauge" in lines and 'test_pool_open{endpoint="db"} 4' in lines
+
+
+def test_metrics_file_and_http_endpoint(tmp_path):
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("calls_total", "Calls.").inc()
+    path = tmp_path / "metrics.prom"
+    registry.write_prometheus_file(str(path))
+    assert "test_calls_total 1" in path.read_text().splitlines()
+
+    server = registry.start_http_server(0, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+            assert "test_calls_total 1" in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+
+
+# --- Tool instruments ---
+
+def test_disabled_instruments_return_the_null_recorder():
+    instruments = ToolInstruments()
+    recorder = instruments.recorder("query_mysql", "SELECT 1")
+    assert recorder is NULL_RECORDER
+    recorder.outcome = "rejected"  # Ignored, like every other call on it.
+    recorder.lap("execute")
+    recorder.finish({})
+
+
+def test_recorded_call_updates_the_metrics():
+    registry = MetricsRegistry()
+    instruments = ToolInstruments(registry)
+    recorder = instruments.recorder("query_mysql", "SELECT 1")
+    recorder.lap("acquire")
+    recorder.lap("execute")
+    recorder.finish({"results": "a\tb\n1\t2", "metadata": {"rows_read": 1}})
+
+    failed = instruments.recorder("query_mysql", "SELECT nope")
+    failed.errno = 1054
+    failed.finish({"error": "Failed to execute SQL query in MySQL."})
+    rejected = instruments.recorder("query_mysql", "DROP TABLE races")
+    rejected.outcome = "rejected"
+    rejected.finish({"error": "Only SELECT statements are allowed."})
+
+    lines = _lines(registry)
+    assert 'mysql_agent_tool_calls_total{tool="query_mysql",outcome="ok"} 1' in lines
+    assert 'mysql_agent_tool_calls_total{tool="query_mysql",outcome="error"} 1' in lines
+    assert 'mysql_agent_tool_calls_total{tool="query_mysql",outcome="rejected"} 1' in lines
+    assert 'mysql_agent_mysql_errors_total{tool="query_mysql",errno="1054"} 1' in lines
+    assert 'mysql_agent_result_rows_total{tool="query_mysql"} 1' in lines
+    assert 'mysql_agent_result_bytes_total{tool="query_mysql"} 7' in lines
+    assert 'mysql_agent_tool_phase_seconds_count{tool="query_mysql",phase="execute"} 1' in lines
+    assert 'mysql_agent_tool_duration_seconds_count{tool="query_mysql"} 3' in lines
+
+
+def test_slow_calls_are_logged(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    instruments = ToolInstruments(slow_query_seconds=0.01, slow_query_log=str(path))
+    fast = instruments.recorder("query_mysql", "SELECT 1")
+    fast.finish({"results": "1", "metadata": {"rows_read": 1}})
+    slow = instruments.recorder("query_mysql", "SELECT * FROM results")
+    time.sleep(0.02)
+    slow.lap("execute")
+    slow.finish({"results": "...", "metadata": {"rows_read": 1000, "estimated_rows_examined": 26000,
+                                                 "sql_executed": "SELECT * FROM results LIMIT 1001"}})
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["sql"] == "SELECT * FROM results" and entry["sql_executed"].endswith("LIMIT 1001")
+    assert entry["outcome"] == "ok" and entry["rows_read"] == 1000
+    assert entry["plan"] == {"estimated_rows_examined": 26000}
+    assert entry["elapsed_ms"] >= 20 and set(entry["phases_ms"]) == {"execute"}
+
+
+def test_slow_query_log_falls_back_to_the_logger(tmp_path, caplog):
+    instruments = ToolInstruments(slow_query_seconds=0.001, slow_query_log=str(tmp_path / "missing" / "slow.jsonl"))
+    recorder = instruments.recorder("query_mysql", "SELECT 1")
+    time.sleep(0.01)
+    with caplog.at_level("WARNING", logger="mysql_agent.slow_query"):
+        recorder.finish({"error": "timeout"})
+    assert '"sql": "SELECT 1"' in caplog.text
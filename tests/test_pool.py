@@ -0,0 +1,174 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_pool.py
+# Connection pool against a fake connector: reuse, overflow, timeout,
+# recycling and reconnect on borrow.
+import threading
+import time
+
+import pytest
+
+from mysql_agent.pool import ConnectionPool, PoolTimeoutError, is_connection_error
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        self.pings = []
+        self.fail_rollback = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.pings.append(reconnect)
+        if not self.alive:
+            if not reconnect:
+                raise OSError("MySQL server has gone away")
+            self.alive = True
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise OSError("Lost connection to MySQL server during query")
+
+    def close(self):
+        self.closed = True
+
+
+class Connector:
+    """Zero-argument connect factory that numbers the connections it opens."""
+
+    def __init__(self):
+        self.opened = []
+        self.error = None
+
+    def __call__(self):
+        if self.error is not None:
+            raise self.error
+        self.opened.append(FakeConnection(len(self.opened) + 1))
+        return self.opened[-1]
+
+
+@pytest.fixture
+def connector():
+    return Connector()
+
+
+def test_connections_are_reused(connector):
+    pool = ConnectionPool(connector, pool_size=2, max_overflow=0)
+    first, _ = pool.acquire()
+    pool.release(first)
+    again, wait = pool.acquire()
+    assert again is first and len(connector.opened) == 1
+    assert again.pings == [False] and wait < 0.1
+    assert pool.stats()["borrows"] == 2 and pool.stats()["open"] == 1
+
+
+def test_overflow_connections_are_closed_on_release(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=1)
+    first, _ = pool.acquire()
+    overflow, _ = pool.acquire()
+    pool.release(first)
+    pool.release(overflow)
+    assert overflow.closed and not first.closed
+    assert pool.stats()["open"] == 1 and pool.stats()["idle"] == 1
+
+
+def test_exhausted_pool_times_out(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+
+def test_waiter_gets_the_released_connection(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0, pool_timeout=5)
+    held, _ = pool.acquire()
+    threading.Timer(0.1, pool.release, args=(held,)).start()
+    connection, wait = pool.acquire()
+    assert connection is held and wait >= 0.05
+    assert pool.stats()["wait_max_ms"] >= 50
+
+
+def test_old_idle_connections_are_recycled(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0, recycle_seconds=0.05)
+    first, _ = pool.acquire()
+    pool.release(first)
+    time.sleep(0.1)
+    second, _ = pool.acquire()
+    assert second is not first and first.closed
+    assert pool.stats()["open"] == 1
+
+
+def test_dropped_connection_is_reconnected_on_borrow(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0)
+    first, _ = pool.acquire()
+    pool.release(first)
+    first.alive = False  # Server restarted while the connection was idle.
+    again, _ = pool.acquire()
+    assert again is first and first.pings[-2:] == [False, True]
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_failed_connect_frees_the_slot(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    connector.error = OSError("Can't connect to MySQL server")
+    with pytest.raises(OSError):
+        pool.acquire()
+    connector.error = None
+    connection, _ = pool.acquire()
+    assert connection.number == 1
+
+
+@pytest.mark.parametrize("discard, fail_rollback", [(True, False), (False, True)])
+def test_broken_connections_are_not_kept(connector, discard, fail_rollback):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0)
+    connection, _ = pool.acquire()
+    connection.fail_rollback = fail_rollback
+    pool.release(connection, discard=discard)
+    assert connection.closed and pool.stats()["open"] == 0 and pool.stats()["idle"] == 0
+
+
+def test_context_manager_discards_on_connection_errors(connector):
+    pool = ConnectionPool(connector, pool_size=1, max_overflow=0)
+    error = OSError("Lost connection")
+    error.errno = 2013
+    with pytest.raises(OSError):
+        with pool.connection() as (connection, _):
+            raise error
+    assert connection.closed
+    with pytest.raises(ValueError):
+        with pool.connection() as (connection, _):
+            raise ValueError("not a connection problem")
+    assert not connection.closed and pool.stats()["idle"] == 1
+
+
+def test_close_closes_idle_connections(connector):
+    pool = ConnectionPool(connector, pool_size=2, max_overflow=0)
+    a, _ = pool.acquire()
+    b, _ = pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    pool.close()
+    assert a.closed and b.closed and pool.stats()["open"] == 0
+
+
+def test_is_connection_error():
+    class InterfaceError(Exception):
+        errno = None
+
+    lost, syntax = Exception("gone"), Exception("syntax")
+    lost.errno, syntax.errno = 2006, 1064
+    assert is_connection_error(lost) and is_connection_error(InterfaceError())
+    assert not is_connection_error(syntax) and not is_connection_error(ValueError())
@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_question_cache.py
+# Question -> SQL cache: matching of paraphrases, anchors, invalidation,
+# expiry and persistence.
+import time
+
+import pytest
+
+from mysql_agent.question_cache import QuestionCache, question_anchors
+
+ARGS = {"sql_query": "SELECT forename, surname FROM drivers ORDER BY wins DESC LIMIT 5"}
+
+
+@pytest.fixture
+def cache():
+    cache = QuestionCache(threshold=0.8)
+    cache.store("Which 5 drivers have the most wins?", ARGS, "fp1")
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "Which 5 drivers have the most wins?",
+    "which five drivers have the highest wins",
+    "Which 5 drivers have most wins",
+])
+def test_paraphrase_hits(cache, question):
+    entry, score = cache.lookup(question, "fp1")
+    assert entry.args == ARGS and score >= 0.8
+
+
+@pytest.mark.parametrize("question", [
+    "Which 10 drivers have the most wins?",  # Different number.
+    "Which 5 constructors have the most wins?",  # Different subject.
+    "Which 5 drivers have the most wins at Monza?",  # A name the cached question lacks.
+])
+def test_different_question_misses(cache, question):
+    assert cache.lookup(question, "fp1") is None
+
+
+def test_anchors():
+    # Numbers, quoted values and capitalized words after the first one (stemmed like every term).
+    assert question_anchors("How many wins did Lewis Hamilton have in 2020?") == {"lewi", "hamilton", "2020"}
+    assert question_anchors("Races in 'monaco'") == {"monaco"}
+
+
+def test_schema_change_invalidates(cache):
+    assert cache.lookup("Which 5 drivers have the most wins?", "fp2") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 1
+
+
+def test_invalidate_drops_the_entry(cache):
+    cache.invalidate("Which 5 drivers have the most wins?")
+    assert cache.lookup("Which 5 drivers have the most wins?", "fp1") is None
+
+
+def test_entries_expire():
+    cache = QuestionCache(ttl=0.001)
+    cache.store("How many races were held in 2020?", ARGS, "fp1")
+    time.sleep(0.01)
+    assert cache.lookup("How many races were held in 2020?", "fp1") is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = QuestionCache(max_entries=2)
+    cache.store("How many races in 2019?", ARGS, "fp1")
+    cache.store("How many races in 2020?", ARGS, "fp1")
+    cache.lookup("How many races in 2019?", "fp1")
+    cache.store("How many races in 2021?", ARGS, "fp1")
+    assert cache.lookup("How many races in 2020?", "fp1") is None
+    assert cache.lookup("How many races in 2019?", "fp1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "questions.json")
+    QuestionCache(path=path).store("How many races were held in 2020?", ARGS, "fp1")
+    reloaded = QuestionCache(path=path)
+    entry, _ = reloaded.lookup("How many races were held in 2020?", "fp1")
+    assert entry.args == ARGS
+
+
+def test_failed_save_is_logged(tmp_path, caplog):
+    cache = QuestionCache(path=str(tmp_path / "missing" / "questions.json"))
+    with caplog.at_level("WARNING", logger="mysql_agent.question_cache"):
+        cache.store("How many races were held in 2020?", ARGS, "fp1")
+    assert "Could not write the question cache" in caplog.text
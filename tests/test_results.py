@@ -0,0 +1,188 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_results.py
+# Result handles: storage, spilling, session isolation, eviction and the
+# sorted/filtered views served by fetch_result_page.
+import asyncio
+import types
+
+import pytest
+
+from mysql_agent import results, tools
+from mysql_agent.results import ResultStore, build_filter
+
+DESCRIPTION = [("driver", 253), ("wins", 3), ("team", 253)]
+ROWS = [(f"driver{i:04d}", (i * 7) % 50 if i % 10 else None, f"team{i % 3}") for i in range(2500)]
+
+
+@pytest.fixture(params=["memory", "spilled"])
+def entry(request, tmp_path):
+    spill_bytes = 1 if request.param == "spilled" else 1 << 30
+    store = ResultStore(spill_bytes=spill_bytes, spill_dir=str(tmp_path))
+    handle = store.put("s1", "SELECT ...", DESCRIPTION, ROWS, page_size=100)
+    stored = store.get("s1", handle)
+    assert (stored.path is not None) == (request.param == "spilled")
+    return stored
+
+
+def _expected(where="", sort_by="", descending=False):
+    rows = list(ROWS)
+    if where:
+        rows = [row for row in rows if build_filter(DESCRIPTION, where)(row)]
+    if sort_by:
+        index = [column[0] for column in DESCRIPTION].index(sort_by)
+        present = sorted((row for row in rows if row[index] is not None),
+                         key=lambda row: row[index], reverse=descending)
+        rows = present + [row for row in rows if row[index] is None]
+    return rows
+
+
+def test_read_spans_blocks(entry):
+    assert entry.read(990, 1010) == ROWS[990:1010]
+    assert entry.read(2400) == ROWS[2400:]
+    assert entry.read(3000, 3100) == []
+
+
+@pytest.mark.parametrize("where, sort_by, descending", [
+    ("wins >= 40", "", False),
+    ("", "wins", False),
+    ("", "wins", True),
+    ("team = team1", "driver", True),
+    ("team contains 2", "wins", False),
+])
+@pytest.mark.parametrize("start", [0, 100, 1900])
+def test_view_matches_a_full_sort(entry, where, sort_by, descending, start):
+    expected = _expected(where, sort_by, descending)
+    rows, total = entry.view(start, 100, where, sort_by, descending)
+    assert total == len(expected)
+    assert rows == expected[start:start + 100]
+
+
+def test_view_holds_at_most_start_plus_count_rows(entry, monkeypatch):
+    selected = []
+    original = results.heapq.nsmallest
+
+    def recording_nsmallest(n, iterable, key=None):
+        selected.append(n)
+        assert not isinstance(iterable, list)  # Streamed, not materialized.
+        return original(n, iterable, key=key)
+
+    monkeypatch.setattr(results.heapq, "nsmallest", recording_nsmallest)
+    rows, total = entry.view(200, 100, sort_by="wins")
+    assert selected == [300] and total == len(ROWS)
+
+
+def test_view_sorts_mixed_types_as_text(tmp_path):
+    store = ResultStore(spill_dir=str(tmp_path))
+    handle = store.put("s1", "SELECT ...", [("value", 253)], [(3,), ("b",), (None,), ("a",)])
+    rows, _ = store.get("s1", handle).view(0, 10, sort_by="value")
+    assert rows == [(3,), ("a",), ("b",), (None,)]
+
+
+@pytest.mark.parametrize("expression", ["nope", "missing = 1"])
+def test_invalid_filter(entry, expression):
+    with pytest.raises(ValueError):
+        entry.view(0, 10, where=expression)
+
+
+def test_handles_belong_to_their_session(tmp_path):
+    store = ResultStore(spill_dir=str(tmp_path))
+    handle = store.put("s1", "SELECT 1", DESCRIPTION, ROWS[:10])
+    assert store.get("s2", handle) is None
+    assert store.get("s1", handle) is not None
+
+
+def test_session_limits_evict_least_recently_used(tmp_path):
+    store = ResultStore(max_handles=2, spill_dir=str(tmp_path))
+    first = store.put("s1", "SELECT 1", DESCRIPTION, ROWS[:10])
+    second = store.put("s1", "SELECT 2", DESCRIPTION, ROWS[:10])
+    store.get("s1", first)
+    third = store.put("s1", "SELECT 3", DESCRIPTION, ROWS[:10])
+    assert store.get("s1", second) is None
+    assert store.get("s1", first) and store.get("s1", third)
+    assert store.stats()["evictions"] == 1
+
+
+def test_handles_expire(tmp_path):
+    store = ResultStore(ttl=0, spill_bytes=1, spill_dir=str(tmp_path))
+    handle = store.put("s1", "SELECT 1", DESCRIPTION, ROWS[:10])
+    assert store.get("s1", handle) is None
+    assert store.stats()["expirations"] == 1 and store.stats()["disk_bytes"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_writer_spills_blocks_while_rows_arrive(tmp_path):
+    store = ResultStore(spill_bytes=10_000, spill_dir=str(tmp_path))
+    writer = store.writer("s1", "SELECT ...", DESCRIPTION, page_size=100)
+    for start in range(0, len(ROWS), 300):
+        writer.append(ROWS[start:start + 300])
+        assert len(writer._pending) < results.SPILL_BLOCK_ROWS or writer.entry.path is None
+    assert writer.entry.path is not None
+    handle = writer.commit(complete=False)
+    stored = store.get("s1", handle)
+    assert stored.read() == ROWS and not stored.complete
+    assert store.stats()["spills"] == 1 and store.stats()["disk_bytes"] == stored.size
+
+
+def test_aborted_writer_leaves_nothing(tmp_path):
+    store = ResultStore(spill_bytes=1, spill_dir=str(tmp_path))
+    writer = store.writer("s1", "SELECT ...", DESCRIPTION)
+    writer.append(ROWS)
+    writer.abort()
+    assert list(tmp_path.iterdir()) == [] and store.stats()["handles"] == 0
+
+
+# --- fetch_result_page ---
+
+@pytest.fixture
+def stored_handle(monkeypatch, tmp_path):
+    store = ResultStore(spill_bytes=1, spill_dir=str(tmp_path))
+    monkeypatch.setattr(tools, "_results", store)
+    monkeypatch.setattr(tools, "MYSQL_MAX_RESULT_ROWS", 500)
+    return store.put("session-a", "SELECT ...", DESCRIPTION, ROWS, page_size=100)
+
+
+def _fetch(handle, session="session-a", **kwargs):
+    context = types.SimpleNamespace(session=types.SimpleNamespace(id=session))
+    kwargs.setdefault("output_format", "tsv")
+    return asyncio.run(tools.fetch_result_page(handle, tool_context=context, **kwargs))
+
+
+def test_fetch_page(stored_handle):
+    response = _fetch(stored_handle, page=3)
+    assert response["metadata"]["page"] == 3 and response["metadata"]["total_pages"] == 25
+    assert "driver0200" in response["results"] and "driver0300" not in response["results"]
+
+
+def test_page_size_is_capped(stored_handle):
+    response = _fetch(stored_handle, page=1, page_size=100000)
+    assert response["metadata"]["page_size"] == 500
+    assert response["metadata"]["rows_shown"] == 500
+
+
+def test_page_past_the_end_is_refused_without_a_read(stored_handle, monkeypatch):
+    monkeypatch.setattr(results.StoredResult, "iter_rows", lambda self: pytest.fail("read the whole result"))
+    assert "out of range" in _fetch(stored_handle, page=40, sort_by="wins")["error"]
+
+
+def test_sorted_filtered_view(stored_handle):
+    response = _fetch(stored_handle, page=1, page_size=5, where="wins >= 45", sort_by="wins", descending=True)
+    expected = _expected("wins >= 45", "wins", True)
+    assert response["metadata"]["total_rows"] == len(expected)
+    assert response["results"].splitlines()[1].startswith(expected[0][0])
+
+
+def test_other_session_cannot_fetch(stored_handle):
+    assert "Unknown or expired" in _fetch(stored_handle, session="session-b")["error"]
@@ -0,0 +1,297 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_routing.py
+# Read routing across replicas and the primary: weights, lag checks,
+# failover of unreachable endpoints and the primary_reads modes.
+import collections
+import math
+import random
+
+import pytest
+
+from mysql_agent.pool import PoolTimeoutError
+from mysql_agent.routing import (
+    Endpoint,
+    EndpointRouter,
+    NoEndpointError,
+    parse_endpoints,
+    read_replica_lag,
+)
+
+
+class StatusCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql):
+        self.connection.statements.append(sql)
+        if sql in self.connection.unsupported:
+            raise Exception(f"You have an error in your SQL syntax near '{sql}'")
+        self.rows = self.connection.status
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StatusConnection:
+    """Answers SHOW REPLICA/SLAVE STATUS with the given rows."""
+
+    def __init__(self, status=(), unsupported=()):
+        self.status = list(status)
+        self.unsupported = set(unsupported)
+        self.statements = []
+
+    def cursor(self, dictionary=None):
+        return StatusCursor(self)
+
+
+def replica_status(lag):
+    return [{"Seconds_Behind_Source": lag}]
+
+
+class FakePool:
+    """Hands out one connection per endpoint, or fails the way it is told to."""
+
+    def __init__(self, endpoint, lag=0):
+        self.endpoint = endpoint
+        self.connection = StatusConnection(replica_status(lag))
+        self.error = None
+        self.borrowed = 0
+        self.released = []
+
+    def acquire(self):
+        if self.error is not None:
+            raise self.error
+        self.borrowed += 1
+        return self.connection, 0.0
+
+    def release(self, connection, discard=False):
+        self.released.append(discard)
+
+    def stats(self):
+        return {"pool_size": 1, "max_overflow": 0, "open": 1, "idle": 1, "borrows": self.borrowed,
+                "reconnects": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0}
+
+
+def make_router(replicas=(("replica-1", 1.0), ("replica-2", 1.0)), primary_reads="never", **kwargs):
+    primary = Endpoint("primary", role="primary")
+    endpoints = [Endpoint(host, weight=weight) for host, weight in replicas]
+    kwargs.setdefault("check_interval", 0)
+    return EndpointRouter(FakePool, primary, endpoints, primary_reads=primary_reads, **kwargs)
+
+
+def pools(router):
+    return {endpoint.name: endpoint.pool for endpoint in router.endpoints}
+
+
+def route_names(router, count):
+    names = collections.Counter()
+    for _ in range(count):
+        route = router.acquire()
+        names[route.endpoint.name] += 1
+        router.release(route)
+    return names
+
+
+# --- parse_endpoints / read_replica_lag ---
+
+def test_parse_endpoints():
+    assert parse_endpoints("replica-1:3307=3, replica-2 ,, 10.0.0.5=0.5") == [
+        ("replica-1", 3307, 3.0), ("replica-2", None, 1.0), ("10.0.0.5", None, 0.5),
+    ]
+    assert parse_endpoints("") == []
+    with pytest.raises(ValueError):
+        parse_endpoints("replica-1=0")
+
+
+@pytest.mark.parametrize("status, expected", [
+    (replica_status(12), 12.0),
+    (replica_status(None), math.inf),  # Replication stopped.
+    ([], 0.0),  # Not a replica.
+])
+def test_read_replica_lag(status, expected):
+    assert read_replica_lag(StatusConnection(status)) == expected
+
+
+def test_read_replica_lag_falls_back_to_slave_status():
+    connection = StatusConnection([{"Seconds_Behind_Master": 4}], unsupported={"SHOW REPLICA STATUS"})
+    assert read_replica_lag(connection) == 4.0
+    assert connection.statements == ["SHOW REPLICA STATUS", "SHOW SLAVE STATUS"]
+
+
+def test_read_replica_lag_without_privilege():
+    connection = StatusConnection(unsupported={"SHOW REPLICA STATUS", "SHOW SLAVE STATUS"})
+    assert read_replica_lag(connection) is None
+
+
+# --- Endpoint choice ---
+
+def test_reads_are_spread_by_weight():
+    random.seed(7)
+    router = make_router(replicas=(("replica-1", 3.0), ("replica-2", 1.0)))
+    names = route_names(router, 2000)
+    assert set(names) == {"replica-1", "replica-2"}
+    assert 0.7 < names["replica-1"] / 2000 < 0.8
+
+
+@pytest.mark.parametrize("primary_reads, expected", [
+    ("never", {"replica-1", "replica-2"}),
+    ("fallback", {"replica-1", "replica-2"}),
+    ("always", {"replica-1", "replica-2", "primary"}),
+])
+def test_primary_reads_modes(primary_reads, expected):
+    random.seed(1)
+    assert set(route_names(make_router(primary_reads=primary_reads), 200)) == expected
+
+
+def test_without_replicas_the_primary_serves_reads():
+    router = make_router(replicas=())
+    route = router.acquire()
+    assert route.endpoint.role == "primary" and not route.skipped
+    assert route.metadata() == {"endpoint": "primary", "role": "primary"}
+
+
+def test_invalid_primary_reads_mode():
+    with pytest.raises(ValueError):
+        make_router(primary_reads="sometimes")
+
+
+# --- Failover ---
+
+def test_unreachable_replica_is_marked_down_and_skipped():
+    router = make_router(retry_seconds=60)
+    pools(router)["replica-1"].error = ConnectionError("Can't connect to MySQL server")
+
+    for _ in range(10):
+        route = router.acquire()
+        assert route.endpoint.name == "replica-2"
+        router.release(route)
+
+    replica = router.stats()["replica-1"]
+    assert not replica["healthy"] and replica["failures"] == 1  # Tried once, then skipped while down.
+    assert "Can't connect" in replica["last_error"]
+    assert router.pool_stats()["failovers"] >= 1
+
+
+def test_fallback_uses_the_primary_only_when_no_replica_is_usable():
+    router = make_router(primary_reads="fallback")
+    for pool in pools(router).values():
+        if pool.endpoint.role == "replica":
+            pool.error = ConnectionError("down")
+    route = router.acquire()
+    assert route.endpoint.name == "primary"
+    assert {name for name, _ in route.skipped} == {"replica-1", "replica-2"}
+    assert route.metadata()["skipped"][0]["reason"] == "unreachable"
+
+
+def test_every_endpoint_down_raises_the_last_error():
+    router = make_router(primary_reads="never")
+    for pool in pools(router).values():
+        pool.error = ConnectionError("down")
+    with pytest.raises(ConnectionError):
+        router.acquire()
+
+
+def test_endpoints_marked_down_are_retried_as_a_last_resort():
+    router = make_router(replicas=(("replica-1", 1.0),), retry_seconds=60)
+    pool = pools(router)["replica-1"]
+    pool.error = ConnectionError("down")
+    with pytest.raises(ConnectionError):
+        router.acquire()
+
+    pool.error = None  # Recovered while still marked down.
+    route = router.acquire()
+    assert route.endpoint.name == "replica-1"
+    assert router.stats()["replica-1"]["healthy"] and router.stats()["replica-1"]["failures"] == 0
+
+
+def test_exhausted_pool_fails_over_without_marking_down():
+    router = make_router()
+    pools(router)["replica-1"].error = PoolTimeoutError("pool exhausted")
+    route = router.acquire()
+    assert route.endpoint.name == "replica-2"
+    assert router.stats()["replica-1"]["healthy"]
+
+
+def test_failed_release_marks_the_endpoint_down_with_backoff():
+    router = make_router(replicas=(("replica-1", 1.0),), retry_seconds=10)
+    endpoint = router.replicas[0]
+    route = router.acquire()
+    router.release(route, failed=True)
+    assert endpoint.pool.released == [True]  # The broken connection is discarded.
+    first = endpoint.down_until
+
+    router.release(router.acquire(), failed=True)  # Recovered by the retry, then failed again.
+    assert endpoint.failures == 1 and endpoint.down_until > first
+
+    router._mark_down(endpoint, None)
+    router._mark_down(endpoint, None)
+    assert endpoint.failures == 3
+
+
+def test_no_endpoint_allowed():
+    router = make_router(replicas=())
+    router._tiers, router.endpoints = [[]], []
+    with pytest.raises(NoEndpointError):
+        router.acquire()
+
+
+# --- Replica lag ---
+
+def test_lagging_replica_is_skipped():
+    router = make_router(max_lag=30)
+    pools(router)["replica-1"].connection.status = replica_status(120)
+    for _ in range(10):
+        route = router.acquire()
+        assert route.endpoint.name == "replica-2" and not route.lag_exceeded
+        router.release(route)
+
+
+def test_stopped_replication_is_reported():
+    router = make_router(replicas=(("replica-1", 1.0),), primary_reads="fallback", max_lag=30)
+    pools(router)["replica-1"].connection.status = replica_status(None)
+    route = router.acquire()
+    assert route.endpoint.name == "primary"
+    assert route.metadata()["skipped"] == [{"endpoint": "replica-1", "reason": "replication stopped"}]
+
+
+def test_least_lagged_replica_is_used_when_all_lag():
+    router = make_router(max_lag=30)
+    pools(router)["replica-1"].connection.status = replica_status(300)
+    pools(router)["replica-2"].connection.status = replica_status(90)
+    route = router.acquire()
+    assert route.endpoint.name == "replica-2" and route.lag_exceeded
+    metadata = route.metadata()
+    assert metadata["lag_exceeded"] and metadata["lag_seconds"] == 90.0
+    assert [entry["endpoint"] for entry in metadata["skipped"]] == ["replica-1"]
+
+
+def test_lag_is_checked_at_most_every_interval():
+    router = make_router(replicas=(("replica-1", 1.0),), max_lag=30, check_interval=60)
+    connection = pools(router)["replica-1"].connection
+    route_names(router, 5)
+    assert connection.statements == ["SHOW REPLICA STATUS"]
+
+
+def test_lag_check_disabled():
+    router = make_router(replicas=(("replica-1", 1.0),), max_lag=0)
+    connection = pools(router)["replica-1"].connection
+    connection.status = replica_status(1000)
+    assert router.acquire().endpoint.name == "replica-1"
+    assert connection.statements == []
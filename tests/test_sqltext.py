@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_sqltext.py
+# SQL text helpers: statement type, cacheability, table extraction and
+# execution limits.
+import pytest
+
+from mysql_agent.sqltext import (
+    add_execution_limits,
+    is_cacheable,
+    is_select,
+    normalize_sql,
+    referenced_tables,
+    statement_verb,
+)
+
+
+@pytest.mark.parametrize("sql, verb", [
+    ("SELECT 1", "SELECT"),
+    ("(SELECT 1) UNION (SELECT 2)", "SELECT"),
+    ("WITH x AS (SELECT 1) SELECT * FROM x", "SELECT"),
+    ("WITH x(a, b) AS (SELECT 1, 2), y AS (SELECT 3) SELECT * FROM x, y", "SELECT"),
+    ("WITH x AS (SELECT 1) (SELECT * FROM x)", "SELECT"),
+    ("WITH x AS (SELECT 1) DELETE FROM races", "DELETE"),
+    ("WITH x AS (SELECT 1) UPDATE races SET year = 1", "UPDATE"),
+    ("show tables", "SHOW"),
+])
+def test_statement_verb(sql, verb):
+    assert statement_verb(sql) == verb
+    assert is_select(sql) == (verb == "SELECT")
+
+
+def test_limit_not_added_to_writes():
+    sql = "WITH x AS (SELECT 1) DELETE FROM races"
+    assert add_execution_limits(sql, 1000, 1001) == sql
+
+
+def test_execution_limits():
+    assert add_execution_limits("SELECT * FROM races;", 5000, 1001) == (
+        "SELECT /*+ MAX_EXECUTION_TIME(5000) */ * FROM races LIMIT 1001"
+    )
+    assert add_execution_limits("SELECT * FROM races LIMIT 5", 0, 1001) == "SELECT * FROM races LIMIT 5"
+    assert add_execution_limits(
+        "SELECT * FROM races WHERE raceId IN (SELECT raceId FROM results LIMIT 5)", 0, 10
+    ).endswith(") LIMIT 10")
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("SELECT EXTRACT(YEAR FROM date) AS y FROM races", ["races"]),
+    ("SELECT SUBSTRING(surname FROM 1 FOR 3) FROM drivers", ["drivers"]),
+    ("SELECT TRIM(LEADING 'x' FROM name) FROM races", ["races"]),
+    ("SELECT * FROM races JOIN results ON results.raceId = races.raceId", ["races", "results"]),
+    ("SELECT * FROM races r LEFT JOIN results AS s USING (raceId)", ["races", "results"]),
+    ("SELECT * FROM races, drivers d WHERE 1", ["drivers", "races"]),
+    ("SELECT * FROM races WHERE raceId IN (SELECT raceId FROM results)", ["races", "results"]),
+    ("SELECT * FROM (SELECT * FROM `laps`) t", ["laps"]),
+    ("SELECT 'FROM fake' FROM races", ["races"]),
+])
+def test_referenced_tables(sql, tables):
+    assert referenced_tables(normalize_sql(sql)) == tables
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM user",
+    "SELECT user, host FROM accounts WHERE user = 'x'",
+    "SELECT now FROM events",
+    "WITH u AS (SELECT 1 AS user) SELECT user FROM u",
+])
+def test_cacheable(sql):
+    assert is_cacheable(normalize_sql(sql))
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT USER()",
+    "SELECT user ()",
+    "SELECT * FROM events WHERE day = CURRENT_DATE",
+    "SELECT NOW(), name FROM races",
+    "SELECT * FROM races ORDER BY RAND() LIMIT 1",
+    "SELECT * FROM races FOR UPDATE",
+    "SELECT 1; SELECT 2",
+    "SHOW TABLES",
+])
+def test_not_cacheable(sql):
+    assert not is_cacheable(normalize_sql(sql))
@@ -0,0 +1,253 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_tools.py
+# The query tool against an in-memory connection: deadlines and cancellation.
+import re
+import sys
+import time
+import types
+
+import pytest
+
+from mysql_agent import results, tools
+from mysql_agent.routing import Endpoint, Route
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = [("raceId", 3), ("name", 253)]
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        self.rows = list(self.connection.rows)
+        limit = re.search(r"LIMIT (\d+)$", sql)
+        if limit:
+            self.rows = self.rows[:int(limit.group(1))]
+
+    def fetchmany(self, size=1):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=()):
+        self.connection_id = 42
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self, buffered=None, dictionary=None):
+        return FakeCursor(self)
+
+
+class FakeRouter:
+    """Hands out one connection; records how it was released."""
+
+    def __init__(self, connection):
+        self.endpoint = Endpoint("db", role="primary")
+        self.connection = connection
+        self.released = []
+
+    def acquire(self):
+        return Route(self.endpoint, self.connection, 0.0, [])
+
+    def release(self, route, discard=False, failed=False):
+        self.released.append({"discard": discard, "failed": failed})
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """Configures tools for a fake server: no validation, cache or metrics export."""
+    for name in ("MYSQL_HOST", "MYSQL_DATABASE", "MYSQL_USER", "MYSQL_PASSWORD"):
+        monkeypatch.setattr(tools, name, "test")
+    monkeypatch.setattr(tools, "MYSQL_VALIDATION_ENABLED", False)
+    monkeypatch.setattr(tools, "MYSQL_CACHE_ENABLED", False)
+    monkeypatch.setattr(tools, "_cache", None)
+    fake = FakeRouter(FakeConnection(rows=[(1, "Bahrain"), (2, "Monaco")]))
+    monkeypatch.setattr(tools, "_get_router", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def kills(monkeypatch):
+    killed = []
+    monkeypatch.setattr(tools, "_kill_query", lambda connection_id, endpoint=None: killed.append(connection_id))
+    return killed
+
+
+def test_deadline_timer_starts_when_armed(kills):
+    deadline = tools._QueryDeadline(FakeConnection(), 0.05)
+    time.sleep(0.1)
+    assert kills == [] and not deadline.expired  # Not armed: nothing to cancel yet.
+    assert deadline.arm() is False
+    assert deadline.expired and kills == []
+
+
+def test_armed_deadline_kills_the_statement(kills):
+    deadline = tools._QueryDeadline(FakeConnection(), 0.05)
+    assert deadline.arm() is True
+    time.sleep(0.2)
+    assert deadline.expired and kills == [42]
+
+
+def test_finished_deadline_never_kills(kills):
+    deadline = tools._QueryDeadline(FakeConnection(), 0.05)
+    deadline.arm()
+    deadline.finish()
+    time.sleep(0.2)
+    assert not deadline.expired and kills == []
+
+
+def test_query_runs_within_deadline(router, kills, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_GUARD_ENABLED", False)
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 5)
+    assert "Monaco" in response["results"]
+    assert kills == []
+    assert router.released == [{"discard": False, "failed": False}]
+
+
+def test_deadline_spent_before_execute_never_runs_the_statement(router, kills, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_GUARD_ENABLED", True)
+
+    def slow_explain(connection, sql):
+        time.sleep(0.2)
+        return None
+
+    monkeypatch.setattr(tools, "explain_plan", slow_explain)
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0.1)
+    assert response["error"] == "Query timed out and was cancelled."
+    assert router.connection.executed == []  # Not sent without a deadline.
+    assert kills == []  # EXPLAIN was not killed in place of the statement.
+    assert router.released[0]["discard"] is True
+
+
+def test_failed_cancel_is_logged(monkeypatch, caplog):
+    def refuse(**params):
+        raise tools.Error("Can't connect to MySQL server")
+
+    monkeypatch.setattr(tools, "_driver", lambda: types.SimpleNamespace(connect=refuse))
+    with caplog.at_level("WARNING", logger="mysql_agent.tools"):
+        tools._kill_query(42)
+    assert "Could not cancel query on connection 42" in caplog.text
+
+
+# --- Result cache failures ---
+
+class FailingBackend:
+    def get(self, key):
+        raise ConnectionError("Error 111 connecting to localhost:6379. Connection refused.")
+
+    set = delete = get
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def cached(router, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_GUARD_ENABLED", False)
+    monkeypatch.setattr(tools, "MYSQL_CACHE_ENABLED", True)
+    monkeypatch.setattr(tools, "_table_versions", types.SimpleNamespace(get=lambda connection, tables: {}))
+    return router
+
+
+def test_failing_cache_backend_runs_the_query_uncached(cached, monkeypatch):
+    monkeypatch.setattr(tools, "_cache", tools.ResultCache(FailingBackend()))
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0)
+    assert "Monaco" in response["results"]
+    assert tools.get_cache_stats()["errors"] == 2
+
+
+def test_missing_redis_package_falls_back_to_memory(cached, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_CACHE_BACKEND", "redis")
+    monkeypatch.setitem(sys.modules, "redis", None)  # import redis -> ImportError
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0)
+    assert "Monaco" in response["results"]
+    assert isinstance(tools._cache.backend, tools.InMemoryBackend)
+    assert tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0)["metadata"]["cache"] == "hit"
+
+
+# --- Truncated results ---
+
+@pytest.fixture
+def many_rows(router, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_GUARD_ENABLED", True)
+    monkeypatch.setattr(tools, "explain_plan", lambda connection, sql: None)
+    monkeypatch.setattr(tools, "MYSQL_MAX_RESULT_ROWS", 3)
+    monkeypatch.setattr(tools, "MYSQL_AUTO_LIMIT", 4)
+    router.connection.rows = [(i, f"race{i}") for i in range(10)]
+    return router
+
+
+def test_auto_limited_truncation_keeps_the_connection(many_rows):
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0)
+    assert response["metadata"]["more_rows_available"] and response["metadata"]["rows_read"] == 3
+    assert many_rows.connection.executed[-1].endswith(" LIMIT 4")
+    assert many_rows.released == [{"discard": False, "failed": False}]
+
+
+def test_auto_limit_with_a_few_rows_left_drains_them(many_rows, monkeypatch):
+    monkeypatch.setattr(tools, "MYSQL_AUTO_LIMIT", 6)
+    tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0)
+    assert many_rows.released == [{"discard": False, "failed": False}]
+
+
+@pytest.mark.parametrize("sql, max_bytes", [
+    ("SELECT raceId, name FROM races LIMIT 8", 1 << 20),  # The user's LIMIT: the rest is unbounded.
+    ("SELECT raceId, name FROM races", 10),  # Stopped by the byte budget.
+])
+def test_unbounded_remainder_discards_the_connection(many_rows, monkeypatch, sql, max_bytes):
+    monkeypatch.setattr(tools, "MYSQL_MAX_RESULT_BYTES", max_bytes)
+    response = tools.query_mysql(sql, "tsv", 0, 0)
+    assert response["metadata"]["more_rows_available"]
+    assert many_rows.released == [{"discard": True, "failed": False}]
+
+
+# --- Paged results ---
+
+@pytest.fixture
+def paged(many_rows, monkeypatch, tmp_path):
+    monkeypatch.setattr(tools, "MYSQL_RESULT_STORE_MAX_ROWS", 5000)
+    monkeypatch.setattr(tools, "_results", tools.ResultStore(spill_bytes=1, spill_dir=str(tmp_path)))
+    many_rows.connection.rows = [(i, f"race{i}") for i in range(2500)]
+    return types.SimpleNamespace(session=types.SimpleNamespace(id="session-a"))
+
+
+def test_paged_query_streams_rows_into_the_store(paged, monkeypatch):
+    appended = []
+    original = results.ResultWriter.append
+
+    def recording_append(self, rows):
+        appended.append(len(rows))
+        original(self, rows)
+
+    monkeypatch.setattr(results.ResultWriter, "append", recording_append)
+    response = tools.query_mysql("SELECT raceId, name FROM races", "tsv", 0, 0, page_size=100, tool_context=paged)
+    metadata = response["metadata"]
+    assert metadata["rows_stored"] == 2500 and metadata["total_pages"] == 25 and metadata["rows_shown"] == 100
+    assert max(appended) <= tools.MYSQL_FETCH_BATCH_SIZE and sum(appended) == 2500
+    stored = tools._results.get("session-a", metadata["result_handle"])
+    assert stored.read(2400, 2402) == [(2400, "race2400"), (2401, "race2401")]
+
+
+def test_single_page_result_is_not_stored(paged, tmp_path):
+    response = tools.query_mysql("SELECT raceId, name FROM races LIMIT 50", "tsv", 0, 0,
+                                 page_size=100, tool_context=paged)
+    assert "result_handle" not in response["metadata"] and response["metadata"]["rows_read"] == 50
+    assert tools._results.stats()["handles"] == 0 and list(tmp_path.iterdir()) == []
@@ -0,0 +1,187 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# test_validation.py
+# Local SQL validation: statement checks with both parsers (sqlglot and the
+# tokenizer fallback) and name resolution against a schema snapshot.
+import pytest
+
+from mysql_agent import validation
+from mysql_agent.validation import (
+    SchemaSnapshot,
+    SQLValidator,
+    _parse_with_tokenizer,
+    check_identifiers,
+    check_statement,
+)
+
+
+def _parse_with_sqlglot(sql):
+    sqlglot = pytest.importorskip("sqlglot")
+    return validation._parse_with_sqlglot(sqlglot, sql)
+
+
+PARSERS = [
+    pytest.param(_parse_with_tokenizer, id="tokenizer"),
+    pytest.param(_parse_with_sqlglot, id="sqlglot"),
+]
+
+
+@pytest.fixture
+def schema():
+    snapshot = SchemaSnapshot()
+    snapshot.database = "f1"
+    snapshot.case_sensitive = True
+    snapshot.tables = {
+        "races": {"raceid": "raceId", "year": "year", "name": "name", "date": "date"},
+        "drivers": {"driverid": "driverId", "surname": "surname", "nationality": "nationality"},
+        "results": {"raceid": "raceId", "driverid": "driverId", "points": "points"},
+    }
+    return snapshot
+
+
+@pytest.mark.parametrize("parse", PARSERS)
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM races",
+    "WITH x AS (SELECT 1 AS n) SELECT n FROM x",
+    "WITH RECURSIVE x(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM x WHERE n < 5) SELECT n FROM x",
+    "WITH x AS (SELECT name FROM races) SELECT REPLACE(name, 'a', 'b') FROM x",
+])
+def test_reads_pass(parse, sql):
+    parsed = parse(sql)
+    assert parsed.kind == "select"
+    assert check_statement(parsed) is None
+
+
+@pytest.mark.parametrize("parse", PARSERS)
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM races",
+    "UPDATE races SET year = 1",
+    "WITH x AS (SELECT 1) DELETE FROM races",
+    "WITH x AS (SELECT 1) UPDATE races SET year = 1",
+    "WITH x AS (SELECT 1), y AS (SELECT 2) INSERT INTO races (year) SELECT 1",
+    "SELECT year INTO @y FROM races LIMIT 1",
+    "SELECT * FROM races FOR UPDATE",
+])
+def test_writes_rejected(parse, sql):
+    parsed = parse(sql)
+    assert parsed.kind == "write"
+    assert check_statement(parsed)["error"].startswith("Query rejected")
+
+
+@pytest.mark.parametrize("sql", ["SELECT 1; DELETE FROM races", "SELECT (1", "SELCT 1", ""])
+def test_tokenizer_rejects_invalid(sql):
+    parsed = _parse_with_tokenizer(sql)
+    assert parsed.kind == "invalid"
+
+
+def test_parse_cache():
+    validator = SQLValidator(cache_size=2)
+    first = validator.parse("SELECT 1")
+    assert validator.parse("SELECT 1") is first
+    validator.parse("SELECT 2")
+    validator.parse("SELECT 3")
+    assert validator.stats()["parse_cache_entries"] == 2
+    assert validator.parse("SELECT 1") is not first
+
+
+@pytest.mark.parametrize("parse", PARSERS)
+@pytest.mark.parametrize("sql", [
+    "SELECT EXTRACT(YEAR FROM date) AS y FROM races",
+    "SELECT SUBSTRING(surname FROM 1 FOR 3) FROM drivers",
+    "SELECT TRIM(BOTH ' ' FROM surname) FROM drivers",
+    "SELECT r.name FROM races r JOIN results ON results.raceId = r.raceId",
+    "SELECT surname FROM drivers WHERE driverId IN (SELECT driverId FROM results)",
+])
+def test_known_names_pass(parse, schema, sql):
+    assert check_identifiers(parse(sql), schema) is None
+
+
+@pytest.mark.parametrize("parse", PARSERS)
+def test_unknown_table_suggests_nearest(parse, schema):
+    rejection = check_identifiers(parse("SELECT * FROM race"), schema)
+    assert "unknown table `race`" in rejection["error"]
+    assert any("`races`" in suggestion for suggestion in rejection["suggestions"])
+
+
+def test_unknown_table_in_join_and_subquery(schema):
+    parsed = _parse_with_tokenizer("SELECT * FROM races JOIN driver ON 1 WHERE year IN (SELECT year FROM result)")
+    rejection = check_identifiers(parsed, schema)
+    assert "unknown table `driver`" in rejection["error"]
+    assert "unknown table `result`" in rejection["error"]
+
+
+def test_unknown_column_with_sqlglot(schema):
+    rejection = check_identifiers(_parse_with_sqlglot("SELECT surnme FROM drivers"), schema)
+    assert "unknown column `surnme`" in rejection["error"]
+    assert any("`surname`" in suggestion for suggestion in rejection["suggestions"])
+
+
+def test_other_schema_not_checked(schema):
+    parsed = _parse_with_tokenizer("SELECT * FROM information_schema.tables")
+    assert check_identifiers(parsed, schema) is None
+
+
+class _Cursor:
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+
+    def execute(self, sql):
+        if "DATABASE()," in sql:
+            self.rows = [("f1", 0)]
+        else:
+            self.rows = [(table, column) for table, columns in self.tables.items() for column in columns]
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self):
+        return _Cursor(self.tables)
+
+
+def test_schema_fingerprint_changes_with_columns():
+    tables = {"races": ["raceId", "year"]}
+    snapshot = SchemaSnapshot(ttl=300)
+    first = snapshot.get(_Connection(tables)).fingerprint
+    assert first and snapshot.get(_Connection({"races": ["raceId"]})).fingerprint == first  # Not reloaded yet.
+    changed = snapshot.get(_Connection({"races": ["raceId", "year", "round"]}), refresh=True).fingerprint
+    assert changed != first
+
+
+@pytest.mark.parametrize("sql, kind", [
+    ("DELETE FROM races", "write"),
+    ("WITH r AS (SELECT 1) UPDATE races SET year = 2000", "write"),
+    ("SELECT 1; DROP TABLE races", "invalid"),
+    ("SELECT * FROM races", "select"),
+])
+def test_sqlglot_crash_falls_back_to_the_tokenizer(monkeypatch, sql, kind):
+    sqlglot = pytest.importorskip("sqlglot")
+
+    def crash(sql, read=None):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(sqlglot, "parse", crash)
+    assert validation._parse_with_sqlglot(sqlglot, sql).kind == kind